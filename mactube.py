@@ -11,30 +11,42 @@ from tkinter import filedialog, messagebox
 import os
 import sys
 import re
+import glob
 import time
 import threading
 import json
-import io
-import queue
 from pathlib import Path
 from datetime import datetime
+from contextlib import contextmanager
 
 # Imports pour le téléchargement
 import yt_dlp
-import requests
 
 # Imports personnalisés
 from mactube_theme import MacTubeTheme, setup_mactube_theme
-from mactube_components import MacTubeNavigation, MacTubeCard, MacTubeProgressBar, MacTubeThumbnail
+from mactube_components import MacTubeNavigation, MacTubeCard, MacTubeProgressBar, MacTubeThumbnail, MacTubeVirtualList
 from mactube_ffmpeg import get_ffmpeg_path
 from mactube_audio import MacTubeAudioExtractor
 from transcodeur import MacTubeTranscoder
 from mactube_help import create_help_menu
+from mactube_queue import (
+    MacTubeWorkerPool, MacTubeDedupIndex, MacTubeTaskToken, TaskCancelled, TaskPaused, current_worker
+)
+from mactube_metadata import (
+    MacTubeMetadataResolver, extract_video_id, extract_info, download_with_info, extraction_counter,
+    is_info_fresh, downloaded_filepath
+)
+from mactube_cache import MacTubeMetadataCache
+from mactube_progress import MacTubeProgressSlot, SAMPLE_INTERVAL_MS, format_speed, format_eta
+from mactube_journal import MacTubeQueueJournal
+from mactube_bandwidth import MacTubeBandwidthGovernor
+from mactube_fragments import MacTubeFragmentTuner, HTTP_CHUNK_SIZE
+from mactube_thumbnails import MacTubeThumbnailService
 
 class DownloadTask:
     """Tâche de téléchargement pour la file d'attente"""
     
-    def __init__(self, url, quality, output_format, filename, download_path, task_type="video"):
+    def __init__(self, url, quality, output_format, filename, download_path, task_type="video", info=None):
         self.url = url
         self.quality = quality
         self.output_format = output_format
@@ -48,38 +60,86 @@ class DownloadTask:
         self.eta = "Calcul..."
         self.created_at = datetime.now()
         self.id = f"task_{int(time.time())}_{id(self)}"
-        self.video_title = self._extract_video_title()
+        self.video_id = extract_video_id(url)
+        # Infos yt-dlp (analyse ou résolution en arrière-plan), réutilisées pour le téléchargement
+        self.info = info
+        self.has_custom_title = bool(
+            self.filename and self.filename not in ("Nom personnalisé (optionnel)", "%(title)s")
+        )
+        self.video_title = self._initial_title()
+        if info and not self.has_custom_title:
+            self.video_title = info.get('title') or self.video_title
+        # Fichier final, connu une fois le téléchargement terminé
+        self.output_file = None
+        # Compteurs bruts écrits par le hook yt-dlp, échantillonnés par l'interface
+        self.progress_slot = MacTubeProgressSlot()
+        # Annulation / pause demandées depuis l'interface, et fichier .part en cours
+        self.token = MacTubeTaskToken()
+        self.partial_file = None
+        # Fragments simultanés utilisés (DASH/HLS), et mesure de débit du format fragmenté en cours
+        self.fragment_workers = None
+        self.fragment_sample = None
+    
+    @property
+    def dedup_key(self):
+        """Clé de déduplication : même vidéo, même qualité, même format"""
+        return (self.video_id or self.url, self.quality, self.output_format)
+    
+    def to_dict(self):
+        """Sérialise la tâche pour le journal de la file"""
+        return {
+            'kind': 'download',
+            'id': self.id,
+            'url': self.url,
+            'quality': self.quality,
+            'output_format': self.output_format,
+            'filename': self.filename,
+            'download_path': self.download_path,
+            'task_type': self.task_type,
+            'video_title': self.video_title,
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Recrée une tâche à partir du journal (sans infos yt-dlp : les URLs de flux ont expiré)"""
+        task = cls(data['url'], data['quality'], data['output_format'], data['filename'],
+                   data['download_path'], data.get('task_type', 'video'))
+        task.id = data['id']
+        task.video_title = data.get('video_title') or task.video_title
+        return task
     
-    def _extract_video_title(self):
-        """Extrait le titre de la vidéo depuis l'URL ou le nom de fichier"""
-        if self.filename and self.filename != "Nom personnalisé (optionnel)" and self.filename != "%(title)s":
+    def _initial_title(self):
+        """Titre provisoire (sans accès réseau) en attendant les métadonnées"""
+        if self.has_custom_title:
             return self.filename
-        elif "youtube.com" in self.url or "youtu.be" in self.url:
-            # Extraire l'ID de la vidéo pour un titre court
-            import re
-            video_id_match = re.search(r'(?:youtube\.com/watch\?v=|youtu\.be/)([a-zA-Z0-9_-]+)', self.url)
-            if video_id_match:
-                video_id = video_id_match.group(1)
-                # Essayer d'extraire le vrai titre de la vidéo
-                try:
-                    import yt_dlp
-                    ydl_opts = {'quiet': True, 'no_warnings': True}
-                    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                        info = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
-                        return info.get('title', f"YouTube Video ({video_id[:8]}...)")
-                except:
-                    return f"YouTube Video ({video_id[:8]}...)"
+        if self.video_id:
+            return f"YouTube Video ({self.video_id[:8]}...)"
         return "Vidéo inconnue"
     
 class TranscodeTask:
     """Tâche de transcodage pour la file d'attente"""
     
-    def __init__(self, input_path, output_format, quality, output_path, task_type, download_path):
+    def __init__(self, input_path, output_format, quality, output_path, task_type, download_path, profile=None,
+                 segmented=False, targets=None):
         self.input_path = input_path
         self.output_format = output_format
         self.quality = quality
         self.output_path = output_path
-        self.task_type = task_type  # "video_conversion", "audio_extraction", "audio_conversion"
+        self.task_type = task_type  # "video_conversion", "audio_extraction", "audio_conversion", "audio_multi"
+        self.profile = profile  # Profil d'encodage vidéo ("Rapide", "Équilibré", "Archive")
+        self.segmented = segmented  # Encodage par segments en parallèle (vidéos longues)
+        self.on_finished = None  # Rappel de fin de tâche (conversion par lot)
+        # Sorties multiples ("audio_multi") : un fichier par cible, avec son propre état
+        self.outputs = [
+            {
+                'output_format': target['output_format'],
+                'quality': target['quality'],
+                'path': str(Path(output_path).with_suffix(target['output_format'])),
+                'codec': None,
+                'status': "En attente",
+            }
+            for target in targets or []
+        ]
         self.download_path = download_path
         self.status = "En attente"
         self.progress = 0
@@ -88,6 +148,44 @@ class TranscodeTask:
         self.created_at = datetime.now()
         self.id = f"transcode_{int(time.time())}_{id(self)}"
         self.filename = Path(input_path).name
+        # Métadonnées du fichier d'entrée (durée, flux, codecs), renseignées par le transcodeur
+        self.probe = None
+        # Stratégie retenue (remux, partial, transcode), codecs et durée réelle du transcodage
+        self.strategy = None
+        self.codec_plan = None
+        self.elapsed = None
+        # Début du dernier lancement : à l'annulation, seuls les fichiers écrits depuis sont supprimés
+        self.started_at = None
+        # Annulation / pause demandées depuis l'interface (FFmpeg est interrompu)
+        self.token = MacTubeTaskToken()
+    
+    def to_dict(self):
+        """Sérialise la tâche pour le journal de la file"""
+        return {
+            'kind': 'transcode',
+            'id': self.id,
+            'input_path': self.input_path,
+            'output_format': self.output_format,
+            'quality': self.quality,
+            'output_path': self.output_path,
+            'task_type': self.task_type,
+            'download_path': self.download_path,
+            'profile': self.profile,
+            'segmented': self.segmented,
+            'targets': [
+                {'output_format': output['output_format'], 'quality': output['quality']}
+                for output in self.outputs
+            ],
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Recrée une tâche à partir du journal (le transcodage repart du début)"""
+        task = cls(data['input_path'], data['output_format'], data['quality'], data['output_path'],
+                   data['task_type'], data['download_path'], profile=data.get('profile'),
+                   segmented=data.get('segmented', False), targets=data.get('targets') or None)
+        task.id = data['id']
+        return task
 
 class MacTubeApp:
     """Application MacTube - YouTube Downloader pour macOS"""
@@ -112,14 +210,37 @@ class MacTubeApp:
             print("⚠️ FFmpeg non trouvé, utilisation du système")
         
         # File d'attente des téléchargements
-        self.download_queue = queue.Queue()
-        self.download_threads = []
-        self.active_tasks = {}  # Stocker {task_id: task} pour les tâches actives
+        # Deux voies indépendantes : réseau (yt-dlp) et CPU (transcodages FFmpeg)
+        self.cpu_count = os.cpu_count() or 2
         self.max_concurrent_downloads = 2  # Nombre max de téléchargements simultanés
-        self.queue_worker_running = False
+        self.max_concurrent_transcodes = max(1, self.cpu_count // 2)  # Nombre max de transcodages simultanés
+        # Cache disque des métadonnées (titres et formats des vidéos déjà analysées)
+        self.metadata_cache = MacTubeMetadataCache()
+        # Résolution des titres en arrière-plan (jamais sur le thread Tk)
+        self.metadata_resolver = MacTubeMetadataResolver(
+            self.ffmpeg_path,
+            on_resolved=lambda task: self.root.after(0, self.schedule_queue_refresh),
+            cache=self.metadata_cache
+        )
+        self.io_pool = MacTubeWorkerPool("io", self._run_queue_task, self.max_concurrent_downloads)
+        self.cpu_pool = MacTubeWorkerPool("cpu", self._run_queue_task, self.max_concurrent_transcodes)
+        self.active_tasks = {}  # Stocker {task_id: task} pour les tâches actives
+        self.paused_tasks = {}  # {task_id: task} : tâches mises en pause (emplacement libéré)
+        # Tâches en file ou en cours par (ID vidéo, qualité, format), pour éviter les doublons
+        self.dedup_index = MacTubeDedupIndex()
+        # Journal persistant de la file (reprise après un arrêt brutal)
+        self.queue_journal = MacTubeQueueJournal()
+        # Débit global partagé par tous les téléchargements de la file
+        self.bandwidth = MacTubeBandwidthGovernor()
+        # Nombre de fragments DASH/HLS téléchargés en parallèle (réglé d'après le débit mesuré)
+        self.fragment_tuner = MacTubeFragmentTuner()
         
         # Système anti-flickering (débounce)
         self._queue_refresh_job = None
+        # Ticker unique de rafraîchissement de la file (actif seulement si la file n'est pas vide)
+        self._queue_ticker_job = None
+        self.queue_tick_stats = {'ticks': 0, 'last_ms': 0.0, 'max_ms': 0.0, 'total_ms': 0.0}
+        self._ticks_since_refresh = 0
         
         # Création de la fenêtre principale
         self.setup_main_window()
@@ -244,6 +365,8 @@ class MacTubeApp:
         
         # Miniature (à gauche)
         self.thumbnail = MacTubeThumbnail(info_frame)
+        # Miniatures chargées hors du thread Tk (cache mémoire + disque)
+        self.thumbnail_service = MacTubeThumbnailService(deliver=lambda callback: self.root.after(0, callback))
         self.thumbnail.pack(side="left", padx=(0, 20))
         
         # Informations vidéo (à droite)
@@ -408,6 +531,9 @@ class MacTubeApp:
         # Charger l'historique initial
         self.refresh_history()
     
+    # Largeurs minimales des colonnes de la file (Tâche, Progression, Vitesse, Temps, Statut, Fichier)
+    QUEUE_COLUMN_WIDTHS = (280, 150, 80, 80, 100, 160)
+    
     def create_queue_tab(self):
         """Crée le tab de la file d'attente"""
         self.queue_frame = ctk.CTkFrame(
@@ -436,43 +562,25 @@ class MacTubeApp:
         self.queue_list_frame = ctk.CTkFrame(self.queue_card.content_frame, fg_color="transparent")
         self.queue_list_frame.pack(fill="both", expand=True, pady=(0, 10))
         
-        # Zone de liste avec grille globale pour un alignement parfait
-        self.queue_list_container = ctk.CTkFrame(self.queue_list_frame, fg_color="transparent")
-        self.queue_list_container.pack(fill="both", expand=True)
-        
-        # Configuration de la grille globale avec largeurs fixes
-        self.queue_list_container.grid_columnconfigure(0, weight=0, minsize=200)  # Tâche
-        self.queue_list_container.grid_columnconfigure(1, weight=0, minsize=150)  # Progression
-        self.queue_list_container.grid_columnconfigure(2, weight=0, minsize=80)   # Vitesse
-        self.queue_list_container.grid_columnconfigure(3, weight=0, minsize=80)   # Temps
-        self.queue_list_container.grid_columnconfigure(4, weight=0, minsize=100)  # Statut
-        self.queue_list_container.grid_columnconfigure(5, weight=0, minsize=100)  # Fichier
-        
-        # En-têtes dans la grille globale (ligne 0)
-        task_header = MacTubeTheme.create_label_body(self.queue_list_container, "Tâche")
-        task_header.grid(row=0, column=0, sticky="w", padx=5, pady=5)
-        
-        progress_header = MacTubeTheme.create_label_body(self.queue_list_container, "Progression")
-        progress_header.grid(row=0, column=1, sticky="w", padx=5, pady=5)
-        
-        speed_header = MacTubeTheme.create_label_body(self.queue_list_container, "Vitesse")
-        speed_header.grid(row=0, column=2, sticky="w", padx=5, pady=5)
-        
-        time_header = MacTubeTheme.create_label_body(self.queue_list_container, "Temps")
-        time_header.grid(row=0, column=3, sticky="w", padx=5, pady=5)
-        
-        status_header = MacTubeTheme.create_label_body(self.queue_list_container, "Statut")
-        status_header.grid(row=0, column=4, sticky="w", padx=5, pady=5)
-        
-        file_header = MacTubeTheme.create_label_body(self.queue_list_container, "Fichier")
-        file_header.grid(row=0, column=5, sticky="w", padx=5, pady=5)
+        # En-têtes : mêmes largeurs de colonnes que les lignes
+        header_frame = ctk.CTkFrame(self.queue_list_frame, fg_color="transparent")
+        header_frame.pack(fill="x")
+        self._configure_queue_columns(header_frame)
+        for column, header in enumerate(("Tâche", "Progression", "Vitesse", "Temps", "Statut", "Fichier")):
+            MacTubeTheme.create_label_body(header_frame, header).grid(row=0, column=column, sticky="w", padx=5, pady=5)
         
         # Séparateur visuel
-        separator = ctk.CTkFrame(self.queue_list_container, height=2, fg_color="gray")
-        separator.grid(row=1, column=0, columnspan=6, sticky="ew", pady=5)
-        
-        # Compteur de lignes pour la grille
-        self.queue_row_counter = 2
+        separator = ctk.CTkFrame(self.queue_list_frame, height=2, fg_color="gray")
+        separator.pack(fill="x", pady=5)
+        
+        # Liste virtualisée : un pool de lignes réaffectées à la tranche visible
+        self.queue_list = MacTubeVirtualList(
+            self.queue_list_frame,
+            create_row=self._create_download_row,
+            bind_row=self._update_download_row,
+            empty_text="📋 Aucune tâche dans la file d'attente"
+        )
+        self.queue_list.pack(fill="both", expand=True)
         
         # Boutons d'action
         buttons_frame = ctk.CTkFrame(self.queue_card.content_frame, fg_color="transparent")
@@ -604,6 +712,86 @@ class MacTubeApp:
         )
         self.max_downloads_label.pack(side="right")
         
+        # Nombre max de transcodages simultanés (voie CPU)
+        max_transcodes_frame = ctk.CTkFrame(self.settings_card.content_frame, fg_color="transparent")
+        max_transcodes_frame.pack(fill="x", pady=(0, 10))
+        
+        MacTubeTheme.create_label_body(max_transcodes_frame, "⚙️ Transcodages simultanés :").pack(side="left")
+        
+        max_transcodes = max(2, self.cpu_count)
+        self.max_transcodes_slider = ctk.CTkSlider(
+            max_transcodes_frame,
+            from_=1,
+            to=max_transcodes,
+            number_of_steps=max_transcodes - 1,
+            command=self.update_max_transcodes
+        )
+        self.max_transcodes_slider.pack(side="left", fill="x", expand=True, padx=(10, 10))
+        self.max_transcodes_slider.set(self.max_concurrent_transcodes)
+        
+        self.max_transcodes_label = MacTubeTheme.create_label_body(
+            max_transcodes_frame,
+            f"{self.max_concurrent_transcodes}"
+        )
+        self.max_transcodes_label.pack(side="right")
+        
+        # Durée de conservation du cache des métadonnées
+        cache_frame = ctk.CTkFrame(self.settings_card.content_frame, fg_color="transparent")
+        cache_frame.pack(fill="x", pady=(0, 10))
+        
+        MacTubeTheme.create_label_body(cache_frame, "🗃️ Cache des métadonnées :").pack(side="left")
+        
+        self.cache_ttl_combo = ctk.CTkComboBox(
+            cache_frame,
+            values=list(self.CACHE_TTL_CHOICES),
+            command=self.update_cache_ttl,
+            width=140
+        )
+        self.cache_ttl_combo.pack(side="left", padx=(10, 10))
+        self.cache_ttl_combo.set("7 jours")
+        
+        self.cache_stats_label = MacTubeTheme.create_label_body(cache_frame, self._cache_stats_text())
+        self.cache_stats_label.pack(side="right")
+        
+        # Débit maximal global des téléchargements et plage horaire sans limite
+        bandwidth_frame = ctk.CTkFrame(self.settings_card.content_frame, fg_color="transparent")
+        bandwidth_frame.pack(fill="x", pady=(0, 10))
+        
+        MacTubeTheme.create_label_body(bandwidth_frame, "🌐 Débit maximal :").pack(side="left")
+        
+        self.bandwidth_combo = ctk.CTkComboBox(
+            bandwidth_frame,
+            values=list(self.BANDWIDTH_CHOICES),
+            command=self.update_bandwidth_limit,
+            width=140
+        )
+        self.bandwidth_combo.pack(side="left", padx=(10, 10))
+        self.bandwidth_combo.set("Illimité")
+        
+        self.bandwidth_schedule_combo = ctk.CTkComboBox(
+            bandwidth_frame,
+            values=list(self.BANDWIDTH_SCHEDULES),
+            command=self.update_bandwidth_schedule,
+            width=220
+        )
+        self.bandwidth_schedule_combo.pack(side="left")
+        self.bandwidth_schedule_combo.set("Toute la journée")
+        
+        # Fragments DASH/HLS téléchargés en parallèle par tâche
+        fragments_frame = ctk.CTkFrame(self.settings_card.content_frame, fg_color="transparent")
+        fragments_frame.pack(fill="x", pady=(0, 10))
+        
+        MacTubeTheme.create_label_body(fragments_frame, "🧩 Fragments simultanés :").pack(side="left")
+        
+        self.fragments_combo = ctk.CTkComboBox(
+            fragments_frame,
+            values=list(self.FRAGMENT_CHOICES),
+            command=self.update_fragment_workers,
+            width=140
+        )
+        self.fragments_combo.pack(side="left", padx=(10, 10))
+        self.fragments_combo.set("Auto")
+        
         # Bouton pour vider la file d'attente
         self.clear_queue_button = MacTubeTheme.create_button_secondary(
             self.settings_card.content_frame,
@@ -616,27 +804,111 @@ class MacTubeApp:
     def update_max_downloads(self, value):
         """Met à jour le nombre max de téléchargements simultanés"""
         self.max_concurrent_downloads = int(value)
+        self.io_pool.resize(self.max_concurrent_downloads)
         self.max_downloads_label.configure(text=f"{self.max_concurrent_downloads}")
         print(f"✅ Nombre max de téléchargements mis à jour: {self.max_concurrent_downloads}")
     
+    # Durées de validité proposées pour le cache des métadonnées (secondes)
+    CACHE_TTL_CHOICES = {
+        "Désactivé": 0,
+        "1 jour": 24 * 3600,
+        "7 jours": 7 * 24 * 3600,
+        "30 jours": 30 * 24 * 3600,
+    }
+    
+    def update_cache_ttl(self, choice):
+        """Met à jour la durée de validité du cache des métadonnées"""
+        self.metadata_cache.set_ttl(self.CACHE_TTL_CHOICES.get(choice, 0))
+        self.cache_stats_label.configure(text=self._cache_stats_text())
+        print(f"✅ Cache des métadonnées: {choice}")
+    
+    # Limites de débit global proposées (octets/s, 0 = illimité)
+    BANDWIDTH_CHOICES = {
+        "Illimité": 0,
+        "1 MB/s": 1024 * 1024,
+        "2 MB/s": 2 * 1024 * 1024,
+        "5 MB/s": 5 * 1024 * 1024,
+        "10 MB/s": 10 * 1024 * 1024,
+        "20 MB/s": 20 * 1024 * 1024,
+    }
+    
+    # Plages horaires sans limite (heure de début, heure de fin)
+    BANDWIDTH_SCHEDULES = {
+        "Toute la journée": None,
+        "Illimité la nuit (22h-7h)": (22, 7),
+        "Illimité hors bureau (19h-8h)": (19, 8),
+    }
+    
+    def update_bandwidth_limit(self, choice):
+        """Met à jour le débit maximal partagé par les téléchargements"""
+        self.bandwidth.set_rate(self.BANDWIDTH_CHOICES.get(choice, 0))
+        print(f"✅ Débit maximal: {choice}")
+    
+    def update_bandwidth_schedule(self, choice):
+        """Met à jour la plage horaire sans limite de débit"""
+        self.bandwidth.set_schedule(self.BANDWIDTH_SCHEDULES.get(choice))
+        print(f"✅ Plage sans limite: {choice}")
+    
+    # Fragments simultanés proposés (None = réglage automatique d'après le débit)
+    FRAGMENT_CHOICES = {
+        "Auto": None,
+        "1": 1,
+        "2": 2,
+        "4": 4,
+        "8": 8,
+        "16": 16,
+    }
+    
+    def update_fragment_workers(self, choice):
+        """Met à jour le nombre de fragments DASH/HLS téléchargés en parallèle"""
+        self.fragment_tuner.set_fixed(self.FRAGMENT_CHOICES.get(choice))
+        print(f"✅ Fragments simultanés: {choice}")
+    
+    def _cache_stats_text(self):
+        """Résumé du cache des métadonnées pour les paramètres"""
+        stats = self.metadata_cache.stats()
+        return f"{stats['entries']} vidéos, {stats['hit_rate'] * 100:.0f}% de hits"
+    
+    def update_max_transcodes(self, value):
+        """Met à jour le nombre max de transcodages simultanés"""
+        self.max_concurrent_transcodes = int(value)
+        self.cpu_pool.resize(self.max_concurrent_transcodes)
+        self.max_transcodes_label.configure(text=f"{self.max_concurrent_transcodes}")
+        print(f"✅ Nombre max de transcodages mis à jour: {self.max_concurrent_transcodes}")
+    
+    def _queue_pools(self):
+        """Retourne les voies de la file d'attente (réseau puis CPU)"""
+        return (self.io_pool, self.cpu_pool)
+    
+    def _waiting_tasks(self):
+        """Retourne les tâches en attente de toutes les voies"""
+        waiting = []
+        for pool in self._queue_pools():
+            waiting.extend(pool.scheduler.pending())
+        return waiting
+    
+    def _running_tasks(self):
+        """Retourne les tâches en cours d'exécution sur un worker (hors tâches terminées ou en erreur)"""
+        running = []
+        for pool in self._queue_pools():
+            running.extend(w.current_task for w in pool.workers() if w.current_task is not None)
+        return running
+    
     def clear_download_queue(self):
         """Vide la file d'attente des téléchargements et nettoie les fichiers temporaires"""
         if messagebox.askyesno("Confirmation", "Voulez-vous vraiment vider la file d'attente et nettoyer les fichiers temporaires ?"):
-            # Vider la file
-            while not self.download_queue.empty():
-                try:
-                    self.download_queue.get_nowait()
-                    self.download_queue.task_done()
-                except queue.Empty:
-                    break
-            
-            # Arrêter les téléchargements en cours
-            for thread in self.download_threads:
-                if thread.is_alive():
-                    # Note: On ne peut pas forcer l'arrêt d'un thread, mais on peut marquer les tâches
-                    pass
-            
-            self.download_threads = []
+            # Ne plus alimenter un lot de transcodage en cours
+            if hasattr(self, 'transcoder'):
+                self.transcoder.cancel_batch()
+            # Vider la file, puis annuler les tâches en pause et en cours
+            for pool in self._queue_pools():
+                for task in pool.scheduler.clear():
+                    task.token.cancel()
+                    task.status = "Annulé ❌"
+                    self._task_done(task)
+            for task in list(self.paused_tasks.values()) + list(self.active_tasks.values()):
+                self._cancel_task(task)
+            self.schedule_queue_refresh()
             
             # Nettoyer les fichiers temporaires
             self._cleanup_temp_files()
@@ -657,22 +929,10 @@ class MacTubeApp:
                 paths_to_clean.add(self.download_path)
             
             # Ajouter les chemins de toutes les tâches dans la file d'attente
-            if hasattr(self, 'download_queue'):
-                # Créer une copie de la queue pour l'itérer
-                temp_queue = queue.Queue()
-                while not self.download_queue.empty():
-                    try:
-                        task = self.download_queue.get_nowait()
-                        if hasattr(task, 'download_path'):
-                            paths_to_clean.add(task.download_path)
-                        # Remettre la tâche dans la queue
-                        temp_queue.put(task)
-                    except queue.Empty:
-                        break
-                
-                # Restaurer la queue
-                while not temp_queue.empty():
-                    self.download_queue.put(temp_queue.get())
+            if hasattr(self, 'io_pool'):
+                for task in self._waiting_tasks():
+                    if hasattr(task, 'download_path'):
+                        paths_to_clean.add(task.download_path)
             
             # Ajouter les chemins des tâches actives
             if hasattr(self, 'active_tasks'):
@@ -793,73 +1053,227 @@ class MacTubeApp:
         self.url_entry.focus()
     
     def start_queue_worker(self):
-        """Démarre le gestionnaire de file d'attente"""
-        self.queue_worker_running = True
-        threading.Thread(target=self._queue_worker, daemon=True).start()
-        print("✅ Gestionnaire de file d'attente démarré")
-    
-    def _queue_worker(self):
-        """Gestionnaire principal de la file d'attente"""
-        while self.queue_worker_running:
+        """Démarre le pool de workers de la file d'attente"""
+        for pool in self._queue_pools():
+            pool.start()
+        print(f"✅ Gestionnaire de file d'attente démarré "
+              f"(réseau: {self.io_pool.size}, CPU: {self.cpu_pool.size} workers)")
+        self._restore_queue()
+    
+    def _restore_queue(self):
+        """Reconstruit la file à partir du journal (tâches inachevées du dernier lancement)"""
+        entries = self.queue_journal.load()
+        if not entries:
+            return
+        
+        # Les tâches interrompues en cours d'exécution repartent en premier
+        entries.sort(key=lambda entry: entry['state'] != 'active')
+        downloads, transcodes = [], []
+        for entry in entries:
+            data = entry['task']
             try:
-                # Attendre une tâche
-                task = self.download_queue.get(timeout=1)
-                
-                # Vérifier le nombre de téléchargements actifs
-                active_downloads = len([t for t in self.download_threads if t.is_alive()])
-                
-                if active_downloads < self.max_concurrent_downloads:
-                    print(f"🚀 Lancement du téléchargement: {task.id}")
-                    
-                    # Stocker la tâche comme active
-                    self.active_tasks[task.id] = task
-                    
-                    # Lancer le téléchargement ou le transcodage selon le type de tâche
-                    if hasattr(task, 'url'):  # Tâche de téléchargement
-                        handler = self._download_task_thread if getattr(task, 'task_type', 'video') == 'video' else self._download_audio_task_thread
-                        download_thread = threading.Thread(target=handler, args=(task,), daemon=True)
-                        download_thread.start()
-                        self.download_threads.append(download_thread)
-                    else:  # Tâche de transcodage
-                        handler = self._transcode_task_thread
-                        transcode_thread = threading.Thread(target=handler, args=(task,), daemon=True)
-                        transcode_thread.start()
-                        self.download_threads.append(transcode_thread)
-                    
-                    # Nettoyer les threads terminés
-                    self.download_threads = [t for t in self.download_threads if t.is_alive()]
-                    
-                    # Marquer la tâche comme traitée seulement après le lancement
-                    self.download_queue.task_done()
-                else:
-                    print(f"⏳ Téléchargement en attente (limite atteinte): {task.id}")
-                    # Remettre la tâche en file d'attente
-                    self.download_queue.put(task)
-                    time.sleep(2)  # Attendre un peu
-                
-            except queue.Empty:
+                task = (TranscodeTask if data.get('kind') == 'transcode' else DownloadTask).from_dict(data)
+            except (KeyError, TypeError) as e:
+                print(f"⚠️ Tâche du journal ignorée: {e}")
                 continue
+            offset = entry['offset']
+            if hasattr(task, 'url') and offset and offset.get('file'):
+                # Fichier .part connu du journal : nettoyable si la tâche est annulée
+                task.partial_file = offset['file']
+            if entry['state'] == 'active' and offset and offset.get('total'):
+                # Le fichier .part est repris par yt-dlp (continuedl)
+                print(f"♻️ Reprise de {task.id} à {offset['bytes'] / offset['total'] * 100:.0f}% ({offset['file']})")
+            if entry['state'] == 'paused':
+                # Reste en pause : reprise manuelle depuis la file
+                task.status = "En pause ⏸️"
+                if hasattr(task, 'url'):
+                    self.dedup_index.claim(task)
+                self.paused_tasks[task.id] = task
+            elif isinstance(task, TranscodeTask):
+                transcodes.append(task)
+            elif self.history.find(task.dedup_key) is None and self.dedup_index.claim(task) is None:
+                downloads.append(task)
+            else:
+                # Déjà téléchargée (arrêt juste avant la fin de la tâche) ou en double
+                self.queue_journal.finish(task)
+        
+        self.io_pool.submit_many(downloads)
+        self.cpu_pool.submit_many(transcodes)
+        self.root.after(0, self._update_queue_display)
+        self.root.after(0, self._ensure_queue_ticker)
+        print(f"♻️ File restaurée depuis le journal: {len(downloads)} téléchargements, {len(transcodes)} transcodages")
+    
+    def _run_queue_task(self, task):
+        """Exécute une tâche de la file sur le worker courant"""
+        print(f"🚀 Lancement du téléchargement: {task.id}")
+        
+        # Stocker la tâche comme active
+        self.active_tasks[task.id] = task
+        self.queue_journal.state(task, 'active')
+        
+        # Lancer le téléchargement ou le transcodage selon le type de tâche
+        if hasattr(task, 'url'):  # Tâche de téléchargement
+            handler = self._download_task_thread if getattr(task, 'task_type', 'video') == 'video' else self._download_audio_task_thread
+        else:  # Tâche de transcodage
+            handler = self._transcode_task_thread
+        
+        outcome = None
+        try:
+            # Annulée ou mise en pause avant même de démarrer
+            task.token.check()
+            handler(task)
+        except TaskPaused:
+            outcome = "paused"
+        except TaskCancelled:
+            outcome = "cancelled"
+        finally:
+            if outcome is None and task.token.requested and not task.status.startswith("Terminé"):
+                # Interruption encapsulée dans une autre erreur (ex: DownloadError de yt-dlp)
+                outcome = "cancelled" if task.token.cancelled else "paused"
+            if outcome is not None:
+                self.active_tasks.pop(task.id, None)
+            
+            if outcome == "paused":
+                # L'emplacement est libéré ; la reprise repartira du fichier partiel
+                task.status = "En pause ⏸️"
+                task.speed = "0 MB/s"
+                task.eta = "En pause"
+                self.paused_tasks[task.id] = task
+                self.queue_journal.state(task, 'paused')
+                print(f"⏸️ Tâche mise en pause: {task.id}")
+            else:
+                if outcome == "cancelled":
+                    task.status = "Annulé ❌"
+                    self._discard_partial_output(task)
+                    print(f"❌ Tâche annulée: {task.id}")
+                self._task_done(task)
+            self.root.after(0, self.schedule_queue_refresh)
+    
+    def _task_done(self, task):
+        """Sortie définitive d'une tâche : journal, index des doublons et rappel de fin"""
+        self.queue_journal.finish(task)
+        if hasattr(task, 'url'):
+            self.dedup_index.release(task)
+            self.bandwidth.release(task.id)
+        on_finished = getattr(task, 'on_finished', None)
+        if on_finished:
+            try:
+                on_finished(task)
             except Exception as e:
-                print(f"❌ Erreur dans le gestionnaire de file d'attente: {e}")
-                # En cas d'erreur, marquer la tâche comme traitée pour éviter le blocage
+                print(f"⚠️ Erreur dans le rappel de fin de tâche: {e}")
+    
+    def _discard_partial_output(self, task):
+        """Supprime les fichiers incomplets d'une tâche annulée"""
+        if hasattr(task, 'url'):
+            paths = self._partial_download_files(task.partial_file)
+        elif task.started_at is None:
+            paths = []  # Jamais lancée : rien n'a été écrit
+        else:
+            if task.outputs:
+                paths = [output['path'] for output in task.outputs if output['status'] == "⏳"]
+            else:
+                paths = [task.output_path]
+            # Une sortie qui existait déjà (annulation pendant l'analyse ou avant la concaténation) est conservée
+            paths = [path for path in paths if self._written_since(path, task.started_at)]
+        for path in paths:
+            if path and os.path.exists(path):
                 try:
-                    self.download_queue.task_done()
-                except:
-                    pass
-    
-    def add_to_queue(self, url, quality, output_format, filename, download_path, task_type="video", silent: bool = False):
+                    os.remove(path)
+                    print(f"🧹 Fichier incomplet supprimé: {path}")
+                except OSError as e:
+                    print(f"⚠️ Impossible de supprimer {path}: {e}")
+    
+    @staticmethod
+    def _written_since(path, started_at):
+        """Indique si un fichier a été écrit depuis `started_at` (horodatage)"""
+        try:
+            return os.path.getmtime(path) >= started_at
+        except (OSError, TypeError):
+            return False
+    
+    @staticmethod
+    def _partial_download_files(partial_file):
+        """Fichier .part d'un téléchargement et ses annexes yt-dlp (fragments -Frag*, état .ytdl)"""
+        if not partial_file:
+            return []
+        base = partial_file[:-len('.part')] if partial_file.endswith('.part') else partial_file
+        return [partial_file, f"{base}.ytdl", *glob.glob(f"{glob.escape(partial_file)}-Frag*")]
+    
+    def _pool_for(self, task):
+        """Voie d'une tâche : réseau pour les téléchargements, CPU pour les transcodages"""
+        return self.io_pool if hasattr(task, 'url') else self.cpu_pool
+    
+    @contextmanager
+    def _task_ydl(self, ydl_opts, task):
+        """Fournit une instance YoutubeDL pour une tâche de la file
+        
+        Sur un worker du pool, l'instance est réutilisée d'une tâche à l'autre
+        tant que les options sont identiques (même qualité, format, dossier).
+        Le hook de progression suit alors la tâche courante du worker.
+        Une instance ayant rencontré une erreur est jetée.
+        Le nombre de fragments simultanés, hors de la clé de réutilisation,
+        est fixé à chaque téléchargement d'après le réglage en vigueur.
+        """
+        task.fragment_workers = self.fragment_tuner.level
+        task.fragment_sample = None  # Nouvelle mesure à chaque lancement (reprise après pause)
+        worker = current_worker()
+        if worker is None:
+            opts = dict(ydl_opts)
+            opts['progress_hooks'] = [lambda d: self._task_progress_hook(d, task)]
+            opts['concurrent_fragment_downloads'] = task.fragment_workers
+            with yt_dlp.YoutubeDL(opts) as ydl:
+                yield ydl
+            return
+        
+        key = ('ydl', repr(sorted(ydl_opts.items())))
+        
+        def factory():
+            opts = dict(ydl_opts)
+            opts['progress_hooks'] = [lambda d: self._task_progress_hook(d, worker.current_task)]
+            return yt_dlp.YoutubeDL(opts)
+        
+        ydl = worker.get_resource(key, factory)
+        # yt-dlp relit ce paramètre au début de chaque format téléchargé
+        ydl.params['concurrent_fragment_downloads'] = task.fragment_workers
+        try:
+            yield ydl
+        except BaseException:
+            worker.discard_resource(key)
+            raise
+        # yt-dlp conserve un code de retour non nul après un échec
+        if getattr(ydl, '_download_retcode', 0):
+            worker.discard_resource(key)
+    
+    def add_to_queue(self, url, quality, output_format, filename, download_path, task_type="video", silent: bool = False, info=None):
         """Ajoute une tâche à la file d'attente
         
         silent: si True, n'affiche pas de pop-up de confirmation (utilisé par le bulk)
+        info: dict yt-dlp déjà extrait (analyse), réutilisé pour le téléchargement
         """
-        task = DownloadTask(url, quality, output_format, filename, download_path, task_type)
-        self.download_queue.put(task)
-        
-        # Mettre à jour l'interface
+        task = DownloadTask(url, quality, output_format, filename, download_path, task_type, info=info)
+        
+        # Doublons : fichier déjà téléchargé, ou même vidéo déjà en file/en cours
+        entry = self.history.find(task.dedup_key)
+        if entry is not None:
+            print(f"⏭️ Déjà téléchargé, ignoré: {task.url} → {entry['file']}")
+            if not silent:
+                messagebox.showinfo("Déjà téléchargé", f"Cette vidéo a déjà été téléchargée :\n\n{entry['file']}")
+            return None
+        existing = self.dedup_index.claim(task)
+        if existing is not None:
+            print(f"🔁 Déjà dans la file d'attente: {task.url} ({existing.id})")
+            if not silent:
+                messagebox.showinfo("Déjà dans la file", f"Cette vidéo est déjà dans la file d'attente :\n\n{existing.video_title}")
+            return existing
+        
+        # Journaliser avant de distribuer : l'ajout précède toujours les changements d'état
+        self.queue_journal.enqueue(task)
+        self.io_pool.submit(task)
+        self.metadata_resolver.resolve(task)
+        
+        # Mettre à jour l'interface et s'assurer que le ticker tourne
         self.root.after(0, self._update_queue_display)
-        
-        # Programmer des mises à jour régulières de la file d'attente
-        self._schedule_queue_updates()
+        self.root.after(0, self._ensure_queue_ticker)
         
         print(f"✅ Tâche ajoutée à la file d'attente: {task.id}")
         
@@ -869,16 +1283,62 @@ class MacTubeApp:
         
         return task
     
-    def add_transcode_to_queue(self, input_path, output_format, quality, output_path, task_type, download_path, silent: bool = False):
-        """Ajoute une tâche de transcodage à la file d'attente"""
-        task = TranscodeTask(input_path, output_format, quality, output_path, task_type, download_path)
-        self.download_queue.put(task)
+    def add_many_to_queue(self, urls, quality, output_format, filename, download_path, task_type="audio",
+                          batch_size=500, on_progress=None):
+        """Ajoute un flux d'URLs à la file d'attente par lots (ingestion bulk)
+        
+        Appelable depuis un thread : `urls` peut être un générateur, consommé
+        au fil de l'eau. Pas de pop-up ni de résolution anticipée des titres
+        (elle se fait au téléchargement). on_progress(n) reçoit le total ajouté
+        après chaque lot. Retourne le nombre de tâches ajoutées.
+        """
+        added = 0
+        skipped = 0
+        batch = []
+        for url in urls:
+            task = DownloadTask(url, quality, output_format, filename, download_path, task_type)
+            if self.history.find(task.dedup_key) is not None or self.dedup_index.claim(task) is not None:
+                skipped += 1
+                continue
+            batch.append(task)
+            if len(batch) >= batch_size:
+                self.queue_journal.enqueue_many(batch)
+                self.io_pool.submit_many(batch)
+                added += len(batch)
+                batch = []
+                if on_progress:
+                    on_progress(added)
+                self.root.after(0, self._update_queue_display)
+        if batch:
+            self.queue_journal.enqueue_many(batch)
+            self.io_pool.submit_many(batch)
+            added += len(batch)
+            if on_progress:
+                on_progress(added)
         
         # Mettre à jour l'interface
         self.root.after(0, self._update_queue_display)
+        if added:
+            self.root.after(0, self._ensure_queue_ticker)
+        
+        print(f"✅ {added} tâches ajoutées à la file d'attente (bulk), {skipped} doublons ignorés")
+        return added
+    
+    def add_transcode_to_queue(self, input_path, output_format, quality, output_path, task_type, download_path, silent: bool = False,
+                               profile=None, segmented=False, on_finished=None, targets=None):
+        """Ajoute une tâche de transcodage à la file d'attente
         
-        # Programmer des mises à jour régulières de la file d'attente
-        self._schedule_queue_updates()
+        on_finished(task) est appelé depuis le worker une fois la tâche terminée (ou en erreur)
+        """
+        task = TranscodeTask(input_path, output_format, quality, output_path, task_type, download_path,
+                             profile=profile, segmented=segmented, targets=targets)
+        task.on_finished = on_finished
+        self.queue_journal.enqueue(task)
+        self.cpu_pool.submit(task)
+        
+        # Mettre à jour l'interface et s'assurer que le ticker tourne
+        self.root.after(0, self._update_queue_display)
+        self.root.after(0, self._ensure_queue_ticker)
         
         print(f"✅ Tâche de transcodage ajoutée à la file d'attente: {task.id}")
         
@@ -916,13 +1376,70 @@ class MacTubeApp:
                 f"Dossier: {task.download_path}"
             )
     
-    def _schedule_queue_updates(self):
-        """Programme des mises à jour régulières de la file d'attente"""
-        if hasattr(self, 'queue_frame'):
-            # Mettre à jour toutes les 2 secondes
-            self.root.after(2000, self.schedule_queue_refresh)
-            # Programmer la prochaine mise à jour
-            self.root.after(2000, self._schedule_queue_updates)
+    # Période de reconstruction complète de la liste de la file (ms) ; le ticker
+    # lui-même échantillonne la progression toutes les SAMPLE_INTERVAL_MS
+    QUEUE_TICK_MS = 2000
+    
+    def _ensure_queue_ticker(self):
+        """Démarre le ticker de la file s'il ne tourne pas déjà (thread Tk uniquement)"""
+        if self._queue_ticker_job is None:
+            self._queue_ticker_job = self.root.after(SAMPLE_INTERVAL_MS, self._queue_tick)
+    
+    def _queue_has_work(self):
+        """Indique si des tâches sont en cours ou en attente sur l'une des voies
+        
+        Décidé par les ordonnanceurs et non par `active_tasks` : une tâche en
+        erreur y reste (sa ligne est visible jusqu'à son retrait) sans occuper
+        d'emplacement.
+        """
+        return any(
+            pool.scheduler.active_count or not pool.scheduler.empty() for pool in self._queue_pools()
+        )
+    
+    def _queue_tick(self):
+        """Tick unique de l'application : échantillonne la progression et rafraîchit la file tant qu'elle n'est pas vide"""
+        self._queue_ticker_job = None
+        started = time.perf_counter()
+        changed = self._sample_progress()
+        self._ticks_since_refresh += 1
+        if self._ticks_since_refresh * SAMPLE_INTERVAL_MS >= self.QUEUE_TICK_MS:
+            # Liste complète (nouvelles tâches, tâches terminées, compteurs des voies)
+            self._ticks_since_refresh = 0
+            self._refresh_queue_list()
+        elif changed and hasattr(self, 'queue_list'):
+            # Entre deux : seules les lignes visibles sont remises à jour
+            self.queue_list.refresh()
+        cost_ms = (time.perf_counter() - started) * 1000
+        
+        stats = self.queue_tick_stats
+        stats['ticks'] += 1
+        stats['last_ms'] = cost_ms
+        stats['max_ms'] = max(stats['max_ms'], cost_ms)
+        stats['total_ms'] += cost_ms
+        
+        if self._queue_has_work():
+            self._queue_ticker_job = self.root.after(SAMPLE_INTERVAL_MS, self._queue_tick)
+        else:
+            print(f"💤 File vide : ticker arrêté après {stats['ticks']} ticks "
+                  f"(moyenne {stats['total_ms'] / stats['ticks']:.1f} ms, max {stats['max_ms']:.1f} ms)")
+    
+    def _sample_progress(self):
+        """Lit les compteurs des téléchargements en cours : vitesse lissée et temps restant
+        
+        Retourne True si une ligne peut avoir changé : téléchargement ayant
+        progressé, ou transcodage en cours (il écrit sa progression lui-même).
+        """
+        changed = False
+        for task in self._running_tasks():
+            slot = getattr(task, 'progress_slot', None)
+            if slot is None:
+                changed = True
+            elif slot.sample():
+                task.progress = slot.percent
+                task.speed = format_speed(slot.speed)
+                task.eta = format_eta(slot.eta)
+                changed = True
+        return changed
     
     def _update_queue_display(self):
         """Met à jour l'affichage de la file d'attente"""
@@ -956,15 +1473,25 @@ class MacTubeApp:
                 'format': format_selector,
                 'outtmpl': output_template,
                 'merge_output_format': task.output_format.lstrip('.'),
-                'progress_hooks': [lambda d: self._task_progress_hook(d, task)],
                 'verbose': True,  # Plus de debug
                 'ffmpeg_location': ffmpeg_path,  # Utiliser FFmpeg du projet
+                'continuedl': True,  # Reprendre un fichier .part existant (redémarrage)
+                'http_chunk_size': HTTP_CHUNK_SIZE,  # Requêtes par plages (formats non fragmentés)
             }
             
+            # Métadonnées partagées avec le résolveur (pas de nouvelle extraction)
+            info = self.metadata_resolver.get_info(task)
+            task.token.check()
+            
             # Lancer le téléchargement
             print(f"🚀 Lancement de yt-dlp...")
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                result = ydl.download([task.url])
+            with self._task_ydl(ydl_opts, task) as ydl:
+                if info is not None:
+                    task.output_file = downloaded_filepath(download_with_info(ydl, info))
+                    result = 0
+                else:
+                    extraction_counter.record(task.url)
+                    result = ydl.download([task.url])
             
             print(f"📊 Résultat yt-dlp: {result}")
             
@@ -981,11 +1508,15 @@ class MacTubeApp:
             # Ajouter à l'historique
             self.history.add_download(
                 task.filename, task.url, task.download_path, 
-                task.output_format, task.quality
+                task.output_format, task.quality,
+                video_id=task.video_id, file=task.output_file
             )
             
-            print(f"✅ Téléchargement terminé avec succès: {task.id}")
+            print(f"✅ Téléchargement terminé avec succès: {task.id} "
+                  f"(extractions pour cette URL: {extraction_counter.count(task.url)})")
             
+        except (TaskCancelled, TaskPaused):
+            raise
         except Exception as e:
             print(f"❌ Erreur de téléchargement: {task.id} - {e}")
             import traceback
@@ -1020,6 +1551,14 @@ class MacTubeApp:
                 return "bestaudio/best"
 
             format_selector = audio_selector_from_quality(task.quality)
+            target_codec = task.output_format.lstrip('.')
+            if target_codec in ('m4a', 'aac'):
+                # Préférer la piste AAC d'origine : FFmpegExtractAudio la copie sans ré-encodage
+                format_selector = f"bestaudio[acodec^=mp4a]/{format_selector}"
+            
+            # Débit demandé ("Qualité maximale" → meilleure qualité VBR)
+            bitrate = ''.join(c for c in task.quality if c.isdigit())
+            preferred_quality = bitrate or '0'
 
             # Chemin de sortie modèle sans ID (préserve le titre)
             output_template = os.path.join(task.download_path, f"%(title)s.%(ext)s")
@@ -1035,11 +1574,12 @@ class MacTubeApp:
                 'postprocessors': [{
                     'key': 'FFmpegExtractAudio',
                     # Mapper ".ogg" vers le codec FFmpeg 
-                    'preferredcodec': ('vorbis' if task.output_format.lstrip('.') == 'ogg' else task.output_format.lstrip('.')),
-                    'preferredquality': '192',
+                    'preferredcodec': ('vorbis' if target_codec == 'ogg' else target_codec),
+                    'preferredquality': preferred_quality,
                 }],
-                'progress_hooks': [lambda d: self._task_progress_hook(d, task)],
                 'ffmpeg_location': ffmpeg_path,
+                'continuedl': True,  # Reprendre un fichier .part existant (redémarrage)
+                'http_chunk_size': HTTP_CHUNK_SIZE,  # Requêtes par plages (formats non fragmentés)
                 # Ajouter des options de compatibilité
                 'extractaudio': True,
                 'audioformat': task.output_format.lstrip('.'),
@@ -1048,10 +1588,19 @@ class MacTubeApp:
 
             print(f"🔧 Audio yt-dlp: format={format_selector}, codec={task.output_format}")
 
+            # Métadonnées partagées avec le résolveur (pas de nouvelle extraction)
+            info = self.metadata_resolver.get_info(task)
+            task.token.check()
+
             # Essayer d'abord avec le format demandé
             try:
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    result = ydl.download([clean_url])
+                with self._task_ydl(ydl_opts, task) as ydl:
+                    if info is not None:
+                        task.output_file = downloaded_filepath(download_with_info(ydl, info))
+                        result = 0
+                    else:
+                        extraction_counter.record(clean_url)
+                        result = ydl.download([clean_url])
                 
                 if result == 0:
                     print(f"✅ Extraction audio réussie avec le format demandé")
@@ -1059,33 +1608,35 @@ class MacTubeApp:
                     raise Exception(f"yt-dlp a retourné le code {result}")
 
             except yt_dlp.utils.DownloadError as e:
+                # Interruption demandée (encapsulée par yt-dlp) : pas de nouvel essai
+                task.token.check()
                 print(f"⚠️  Format demandé non disponible, essai avec fallback: {e}")
                 
-                # Lister les formats disponibles pour debug
-                try:
-                    with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
-                        info = ydl.extract_info(clean_url, download=False)
-                        if 'formats' in info:
-                            audio_formats = [f for f in info['formats'] if f.get('acodec') != 'none']
-                            print(f"🔍 Formats audio disponibles: {len(audio_formats)}")
-                            for fmt in audio_formats[:5]:  # Afficher les 5 premiers
-                                print(f"   - {fmt.get('format_id', 'N/A')}: {fmt.get('acodec', 'N/A')} "
-                                      f"({fmt.get('abr', 'N/A')} kbps)")
-                except Exception as debug_e:
-                    print(f"⚠️  Impossible de lister les formats: {debug_e}")
+                # Lister les formats disponibles pour debug (depuis l'info déjà extraite)
+                if info and 'formats' in info:
+                    audio_formats = [f for f in info['formats'] if f.get('acodec') != 'none']
+                    print(f"🔍 Formats audio disponibles: {len(audio_formats)}")
+                    for fmt in audio_formats[:5]:  # Afficher les 5 premiers
+                        print(f"   - {fmt.get('format_id', 'N/A')}: {fmt.get('acodec', 'N/A')} "
+                              f"({fmt.get('abr', 'N/A')} kbps)")
                 
                 # Essayer avec un format plus générique
                 ydl_opts['format'] = "bestaudio/best"
                 ydl_opts['postprocessors'] = [{
                     'key': 'FFmpegExtractAudio',
                     'preferredcodec': 'mp3',  # Fallback sur MP3
-                    'preferredquality': '192',
+                    'preferredquality': preferred_quality,
                 }]
                 
                 print(f"🔄 Essai avec format fallback: {ydl_opts['format']}")
                 
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    result = ydl.download([clean_url])
+                with self._task_ydl(ydl_opts, task) as ydl:
+                    if info is not None:
+                        task.output_file = downloaded_filepath(download_with_info(ydl, info))
+                        result = 0
+                    else:
+                        extraction_counter.record(clean_url)
+                        result = ydl.download([clean_url])
                 
                 if result != 0:
                     raise Exception(f"Fallback échoué avec le code {result}")
@@ -1099,11 +1650,15 @@ class MacTubeApp:
             # Historique
             self.history.add_download(
                 task.filename, task.url, task.download_path,
-                task.output_format, task.quality
+                task.output_format, task.quality,
+                video_id=task.video_id, file=task.output_file
             )
 
-            print(f"✅ Extraction audio terminée: {task.id}")
+            print(f"✅ Extraction audio terminée: {task.id} "
+                  f"(extractions pour cette URL: {extraction_counter.count(task.url)})")
 
+        except (TaskCancelled, TaskPaused):
+            raise
         except yt_dlp.utils.DownloadError as e:
             print(f"❌ Erreur de téléchargement yt-dlp: {e}")
             task.status = f"Erreur format: {str(e)}"
@@ -1116,24 +1671,61 @@ class MacTubeApp:
             self.root.after(0, lambda: self._update_task_status(task))
     
     def _task_progress_hook(self, d, task):
-        """Hook de progression pour une tâche"""
-        if d['status'] == 'downloading':
-            # Mettre à jour la progression
-            if 'total_bytes' in d and d['total_bytes']:
-                task.progress = (d['downloaded_bytes'] / d['total_bytes']) * 100
-            elif 'total_bytes_estimate' in d and d['total_bytes_estimate']:
-                task.progress = (d['downloaded_bytes'] / d['total_bytes_estimate']) * 100
-            
-            # Mettre à jour la vitesse
-            if 'speed' in d and d['speed']:
-                task.speed = f"{d['speed'] / (1024*1024):.1f} MB/s"
+        """Hook de progression pour une tâche (à chaque bloc : compteurs bruts seulement)"""
+        # Point de contrôle : lève TaskCancelled/TaskPaused, ce qui interrompt yt-dlp
+        task.token.check()
+        task.progress_slot.write(d)
+        if d.get('status') == 'finished':
+            # Débit d'un format fragmenté, pour le réglage des fragments simultanés
+            sample = task.fragment_sample
+            if sample is not None and sample['solo']:
+                downloaded = (d.get('downloaded_bytes') or d.get('total_bytes') or 0) - sample['start_bytes']
+                self.fragment_tuner.record(task.fragment_workers, downloaded, time.monotonic() - sample['started'])
+            task.fragment_sample = None
+        elif d.get('status') == 'downloading':
+            task.partial_file = d.get('tmpfilename') or task.partial_file
+            if 'fragment_index' in d:
+                self._track_fragment_sample(task, d)
+            # Part du débit global : attend ici si la tâche l'a dépassée (interruptible)
+            self.bandwidth.throttle(
+                task.id, d.get('downloaded_bytes') or 0, d.get('filename'),
+                should_stop=lambda: task.token.requested
+            )
+            # Position dans le fichier .part, pour la reprise après redémarrage (limitée dans le temps)
+            self.queue_journal.offset(
+                task, d.get('downloaded_bytes') or 0,
+                d.get('total_bytes') or d.get('total_bytes_estimate'),
+                d.get('tmpfilename') or d.get('filename')
+            )
+    
+    def _track_fragment_sample(self, task, d):
+        """Suit les octets réellement reçus pendant ce lancement pour le format fragmenté en cours
+        
+        La base est le premier compteur vu (un .part repris compte déjà les
+        lancements précédents). La mesure n'est retenue que si la tâche a eu
+        le lien pour elle seule : ni autre téléchargement en cours sur un worker
+        (les tâches en erreur restent dans `active_tasks`), ni limite de débit.
+        """
+        sample = task.fragment_sample
+        if sample is None or sample['file'] != d.get('filename'):
+            sample = task.fragment_sample = {
+                'file': d.get('filename'),
+                'start_bytes': d.get('downloaded_bytes') or 0,
+                'started': time.monotonic(),
+                'solo': True,
+            }
+        if sample['solo']:
+            downloads = sum(1 for other in self._running_tasks() if hasattr(other, 'url'))
+            if downloads > 1 or self.bandwidth.current_limit():
+                sample['solo'] = False
     
     def _show_transcode_confirmation(self, task, task_type):
         """Affiche une pop-up de confirmation pour l'ajout d'une tâche de transcodage"""
         task_names = {
             "video_conversion": "Conversion Vidéo",
             "audio_extraction": "Extraction Audio",
-            "audio_conversion": "Conversion Audio"
+            "audio_conversion": "Conversion Audio",
+            "audio_multi": "Sorties multiples"
         }
         
         task_name = task_names.get(task_type, "Transcodage")
@@ -1216,6 +1808,7 @@ class MacTubeApp:
         """Thread pour traiter une tâche de transcodage"""
         try:
             print(f"🔄 Début du transcodage: {task.id} - {task.filename}")
+            task.started_at = time.time()
             task.status = "Transcodage en cours..."
             self.root.after(0, lambda: self._update_task_status(task))
             
@@ -1225,8 +1818,13 @@ class MacTubeApp:
             else:
                 raise Exception("Module transcodeur non disponible")
             
-            # Marquer comme terminé
-            task.status = "Terminé ✅"
+            # Marquer comme terminé (avec l'état de chaque sortie pour les sorties multiples)
+            if task.outputs:
+                task.status = "Terminé ✅ (" + " ".join(f"{o['output_format']} {o['status']}" for o in task.outputs) + ")"
+            elif task.strategy in (None, "transcode"):
+                task.status = "Terminé ✅"
+            else:
+                task.status = f"Terminé ✅ ({task.strategy})"
             task.progress = 100
             
             # Retirer de la liste des tâches actives
@@ -1237,6 +1835,8 @@ class MacTubeApp:
             
             print(f"✅ Transcodage terminé avec succès: {task.id}")
             
+        except (TaskCancelled, TaskPaused):
+            raise
         except Exception as e:
             print(f"❌ Erreur lors du transcodage: {e}")
             task.status = f"Erreur: {str(e)}"
@@ -1260,55 +1860,31 @@ class MacTubeApp:
         """Met à jour la liste des tâches de la file d'attente avec alignement parfait"""
         if hasattr(self, 'queue_frame'):
             # Compter les tâches
-            active_downloads = len(self.active_tasks)
-            try:
-                waiting_tasks = list(self.download_queue.queue)
-            except Exception:
-                waiting_tasks = []
-            queue_size = len(waiting_tasks)
-            
-            # Mettre à jour le label d'information
-            self.queue_info_label.configure(
-                text=f"📊 Téléchargements en cours: {active_downloads} | En attente: {queue_size}"
-            )
-            
-            # Nettoyer la liste existante (garder les en-têtes)
-            widgets_to_remove = []
-            for widget in self.queue_list_container.winfo_children():
-                if widget.grid_info()['row'] >= 2:  # Garder en-têtes et séparateur
-                    widgets_to_remove.append(widget)
-            
-            for widget in widgets_to_remove:
-                widget.destroy()
-            
-            # Réinitialiser le compteur de lignes
-            self.queue_row_counter = 2
-            
-            # Créer les lignes pour les tâches actives
-            for task_id, task in self.active_tasks.items():
-                title = self._get_task_title(task)
-                self._create_download_row(
-                    title=title,
-                    status=task.status,
-                    progress=task.progress,
-                    speed=task.speed,
-                    eta=task.eta,
-                    state="active",
-                    file_display=self._get_file_display(task)
-                )
-            
-            # Créer les lignes pour les tâches en attente
-            for task in waiting_tasks:
-                title = self._get_task_title(task)
-                self._create_download_row(
-                    title=title,
-                    status="En attente",
-                    progress=0,
-                    speed="0 MB/s",
-                    eta="En attente",
-                    state="waiting",
-                    file_display=self._get_file_display(task)
+            waiting_tasks = self._waiting_tasks()
+            
+            # Mettre à jour le label d'information (une section par voie)
+            lanes = []
+            for label, pool in (("📥 Réseau", self.io_pool), ("⚙️ CPU", self.cpu_pool)):
+                stats = pool.stats()
+                workers = " ".join(f"{w['utilisation'] * 100:.0f}%" for w in stats['workers'])
+                lanes.append(
+                    f"{label}: {stats['active']}/{stats['max_active']} en cours, "
+                    f"{stats['pending']} en attente, "
+                    f"latence {stats['last_latency_ms']:.0f} ms, workers {workers}"
                 )
+            bandwidth = self.bandwidth.stats()
+            limit = format_speed(bandwidth['limit']) if bandwidth['limit'] else "illimité"
+            lanes.append(f"🌐 {format_speed(bandwidth['rate'])} (limite: {limit})")
+            fragments = self.fragment_tuner.stats()
+            lanes.append(f"🧩 Fragments: {fragments['level']} ({'auto' if fragments['auto'] else 'fixe'})")
+            lanes.append(f"🔄 Rafraîchissement: {self.queue_tick_stats['last_ms']:.1f} ms")
+            self.queue_info_label.configure(text="📊 " + " | ".join(lanes))
+            
+            # Seule la tranche visible est liée à des widgets
+            items = [(task, "active") for task in list(self.active_tasks.values())]
+            items += [(task, "paused") for task in list(self.paused_tasks.values())]
+            items += [(task, "waiting") for task in waiting_tasks]
+            self.queue_list.set_items(items)
     
     def schedule_queue_refresh(self, delay_ms: int = 120):
         """Planifie un rafraîchissement de la file d'attente avec débounce anti-flickering"""
@@ -1317,26 +1893,6 @@ class MacTubeApp:
         if hasattr(self, 'root'):
             self._queue_refresh_job = self.root.after(delay_ms, self._refresh_queue_list)
     
-    def _show_empty_state(self):
-        """Affiche l'état vide de la file d'attente"""
-        # Nettoyer les anciennes lignes
-        widgets_to_remove = []
-        for widget in self.queue_list_container.winfo_children():
-            if widget.grid_info()['row'] >= 2:  # Garder en-têtes et séparateur
-                widgets_to_remove.append(widget)
-        
-        for widget in widgets_to_remove:
-            widget.destroy()
-        
-        # Afficher le message d'état vide
-        empty_label = MacTubeTheme.create_label_body(
-            self.queue_list_container,
-            "📋 Aucune tâche dans la file d'attente"
-        )
-        empty_label.grid(row=2, column=0, columnspan=6, pady=20)
-    
-
-    
     def _get_task_title(self, task):
         """Génère le titre d'affichage pour une tâche"""
         # Gérer les tâches de transcodage
@@ -1344,7 +1900,8 @@ class MacTubeApp:
             task_names = {
                 "video_conversion": "Conversion Vidéo",
                 "audio_extraction": "Extraction Audio",
-                "audio_conversion": "Conversion Audio"
+                "audio_conversion": "Conversion Audio",
+                "audio_multi": "Sorties multiples"
             }
             task_name = task_names.get(task.task_type, "Transcodage")
             return self._truncate_text(f"{task_name}: {task.filename}", 42)
@@ -1367,83 +1924,169 @@ class MacTubeApp:
     
 
     
-    def _create_download_row(self, title, status, progress, speed, eta, state, file_display=None):
-        """Crée une ligne d'affichage pour un téléchargement avec alignement parfait"""
-        # Utiliser la grille globale du conteneur principal
-        current_row = self.queue_row_counter
+    def _configure_queue_columns(self, frame):
+        for column, width in enumerate(self.QUEUE_COLUMN_WIDTHS):
+            frame.grid_columnconfigure(column, weight=0, minsize=width)
+    
+    def _create_download_row(self, parent):
+        """Crée les widgets d'une ligne réutilisable de la file d'attente"""
+        frame = ctk.CTkFrame(parent, fg_color="transparent")
+        self._configure_queue_columns(frame)
         
         # Titre de la tâche (colonne 0) - aligné à gauche
-        title_label = MacTubeTheme.create_label_body(self.queue_list_container, title)
-        title_label.grid(row=current_row, column=0, sticky="w", padx=5, pady=2)
+        title_label = MacTubeTheme.create_label_body(frame, "")
+        title_label.grid(row=0, column=0, sticky="w", padx=5, pady=2)
         
-        # Barre de progression (colonne 1) - centrée
-        progress_frame = ctk.CTkFrame(self.queue_list_container, fg_color="transparent")
-        progress_frame.grid(row=current_row, column=1, sticky="ew", padx=5, pady=2)
+        # Barre de progression et pourcentage (colonne 1)
+        progress_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        progress_frame.grid(row=0, column=1, sticky="ew", padx=5, pady=2)
         progress_frame.grid_columnconfigure(0, weight=1)
-        
         progress_bar = ctk.CTkProgressBar(progress_frame, width=120, height=12)
         progress_bar.grid(row=0, column=0, pady=2)
-        progress_bar.set(progress / 100)
-        
-        # Couleur de la barre selon le statut
-        if state == "active":
-            progress_bar.configure(progress_color="green")
-        elif state == "waiting":
-            progress_bar.configure(progress_color="orange")
-        else:
-            progress_bar.configure(progress_color="blue")
-        
-        progress_label = MacTubeTheme.create_label_body(progress_frame, f"{progress:.1f}%")
+        progress_label = MacTubeTheme.create_label_body(progress_frame, "")
         progress_label.grid(row=1, column=0, pady=2)
         
-        # Vitesse (colonne 2) - centrée
-        speed_label = MacTubeTheme.create_label_body(self.queue_list_container, speed)
-        speed_label.grid(row=current_row, column=2, sticky="ew", padx=5, pady=2)
-        
-        # Temps restant (colonne 3) - centré
-        eta_label = MacTubeTheme.create_label_body(self.queue_list_container, eta)
-        eta_label.grid(row=current_row, column=3, sticky="ew", padx=5, pady=2)
-        
-        # Statut (colonne 4) - centré
-        status_color = "green" if state == "active" else "orange" if state == "waiting" else "red"
-        status_label = MacTubeTheme.create_label_body(self.queue_list_container, status)
-        status_label.grid(row=current_row, column=4, sticky="ew", padx=5, pady=2)
-        
-        # Fichier (colonne 5) - affiche le nom de fichier tronqué + bouton
-        file_frame = ctk.CTkFrame(self.queue_list_container, fg_color="transparent")
-        file_frame.grid(row=current_row, column=5, sticky="ew", padx=5, pady=2)
+        # Vitesse, temps restant et statut (colonnes 2 à 4)
+        speed_label = MacTubeTheme.create_label_body(frame, "")
+        speed_label.grid(row=0, column=2, sticky="ew", padx=5, pady=2)
+        eta_label = MacTubeTheme.create_label_body(frame, "")
+        eta_label.grid(row=0, column=3, sticky="ew", padx=5, pady=2)
+        status_label = MacTubeTheme.create_label_body(frame, "")
+        status_label.grid(row=0, column=4, sticky="ew", padx=5, pady=2)
+        
+        # Fichier : nom tronqué + bouton d'action (colonne 5)
+        file_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        file_frame.grid(row=0, column=5, sticky="ew", padx=5, pady=2)
         file_frame.grid_columnconfigure(0, weight=1)
-        file_label = MacTubeTheme.create_label_body(file_frame, file_display or self._truncate_text(title, 28))
+        file_label = MacTubeTheme.create_label_body(file_frame, "")
         file_label.grid(row=0, column=0, sticky="w")
         
-        if state == "active":
-            pause_btn = MacTubeTheme.create_button_secondary(
-                file_frame, "⏸️", command=lambda: self._pause_download(title), width=30
-            )
-            pause_btn.grid(row=0, column=1, padx=4)
-        elif state == "waiting":
-            remove_btn = MacTubeTheme.create_button_secondary(
-                file_frame, "❌", command=lambda: self._remove_from_queue(title), width=30
-            )
-            remove_btn.grid(row=0, column=1, padx=4)
-        
-        # Incrémenter le compteur de lignes
-        self.queue_row_counter += 1
-    
-    def _pause_download(self, title):
-        """Met en pause un téléchargement spécifique"""
-        messagebox.showinfo("Pause", f"Pause du téléchargement: {title}")
-        # TODO: Implémenter la pause individuelle
+        row = {
+            'frame': frame,
+            'task': None,
+            'title': title_label,
+            'progress_bar': progress_bar,
+            'progress': progress_label,
+            'speed': speed_label,
+            'eta': eta_label,
+            'status': status_label,
+            'file': file_label,
+            'values': {},
+        }
+        # Boutons d'action : agissent sur la tâche actuellement liée à la ligne
+        row['pause_button'] = MacTubeTheme.create_button_secondary(
+            file_frame, "⏸️", command=lambda: self._pause_download(row['task']), width=30
+        )
+        row['resume_button'] = MacTubeTheme.create_button_secondary(
+            file_frame, "▶️", command=lambda: self._resume_download(row['task']), width=30
+        )
+        row['remove_button'] = MacTubeTheme.create_button_secondary(
+            file_frame, "❌", command=lambda: self._remove_from_queue(row['task']), width=30
+        )
+        return row
+    
+    def _update_download_row(self, row, item):
+        """Lie une ligne à une tâche : seuls les champs modifiés depuis le dernier affichage sont reconfigurés"""
+        task, state = item
+        row['task'] = task
+        if state in ("active", "paused"):
+            values = {
+                'title': self._get_task_title(task),
+                'progress': round(task.progress, 1),
+                'speed': task.speed,
+                'eta': task.eta,
+                'status': task.status,
+                'file': self._get_file_display(task),
+                'state': state,
+            }
+        else:
+            values = {
+                'title': self._get_task_title(task),
+                'progress': 0.0,
+                'speed': "0 MB/s",
+                'eta': "En attente",
+                'status': "En attente",
+                'file': self._get_file_display(task),
+                'state': state,
+            }
+        previous = row['values']
+        
+        for field in ('title', 'speed', 'eta', 'status', 'file'):
+            if previous.get(field) != values[field]:
+                row[field].configure(text=values[field])
+        
+        if previous.get('progress') != values['progress']:
+            row['progress_bar'].set(values['progress'] / 100)
+            row['progress'].configure(text=f"{values['progress']:.1f}%")
+        
+        if previous.get('state') != state:
+            # Couleur de la barre et boutons d'action selon l'état
+            colors = {"active": "green", "paused": "gray", "waiting": "orange"}
+            row['progress_bar'].configure(progress_color=colors[state])
+            buttons = {
+                "active": ('pause_button', 'remove_button'),
+                "paused": ('resume_button', 'remove_button'),
+                "waiting": ('remove_button',),
+            }[state]
+            for name in ('pause_button', 'resume_button', 'remove_button'):
+                row[name].grid_remove()
+            for column, name in enumerate(buttons, start=1):
+                row[name].grid(row=0, column=column, padx=(4, 0))
+        
+        row['values'] = values
+    
+    def _pause_download(self, task):
+        """Met en pause une tâche en cours (l'emplacement est libéré au prochain point de contrôle)"""
+        if task is None or task.id not in self.active_tasks:
+            return
+        task.token.pause()
+        task.status = "Mise en pause..."
+        self.schedule_queue_refresh()
     
-    def _remove_from_queue(self, title):
-        """Retire une tâche de la file d'attente"""
-        if messagebox.askyesno("Confirmation", f"Retirer {title} de la file d'attente ?"):
-            # TODO: Implémenter la suppression individuelle
-            messagebox.showinfo("Succès", f"{title} retiré de la file d'attente")
+    def _resume_download(self, task):
+        """Reprend une tâche en pause, en tête de file (téléchargement repris depuis le fichier .part)"""
+        if task is None or self.paused_tasks.pop(task.id, None) is None:
+            return
+        task.token.reset()
+        task.status = "En attente"
+        self.queue_journal.state(task, 'pending')
+        self._pool_for(task).submit_front(task)
+        self._ensure_queue_ticker()
+        self.schedule_queue_refresh()
+        print(f"▶️ Tâche reprise: {task.id}")
+    
+    def _remove_from_queue(self, task):
+        """Retire une tâche de la file d'attente (annule la tâche si elle est en cours)"""
+        if task is None:
+            return
+        title = self._get_task_title(task)
+        if not messagebox.askyesno("Confirmation", f"Retirer {title} de la file d'attente ?"):
+            return
+        if self._cancel_task(task):
+            print(f"🗑️ Tâche retirée de la file: {task.id}")
+        self.schedule_queue_refresh()
+    
+    def _cancel_task(self, task):
+        """Annule une tâche ; retourne True si elle a été retirée immédiatement (en attente ou en pause)"""
+        if task.status.startswith("Erreur"):
+            # Tâche déjà terminée en erreur : seule sa ligne reste à retirer
+            self.active_tasks.pop(task.id, None)
+            return True
+        task.token.cancel()
+        paused = self.paused_tasks.pop(task.id, None) is not None
+        if paused or self._pool_for(task).remove(task):
+            task.status = "Annulé ❌"
+            if paused:
+                self._discard_partial_output(task)
+            self._task_done(task)
+            return True
+        # En cours : le worker s'arrête au prochain point de contrôle et fait le ménage
+        return False
     
     def pause_queue(self):
         """Met en pause la file d'attente"""
-        self.queue_worker_running = False
+        for pool in self._queue_pools():
+            pool.scheduler.pause()
         self.pause_queue_button.configure(state="disabled")
         self.resume_queue_button.configure(state="normal")
         messagebox.showinfo("File d'attente", "File d'attente mise en pause")
@@ -1451,8 +2094,9 @@ class MacTubeApp:
     
     def resume_queue(self):
         """Reprend la file d'attente"""
-        if not self.queue_worker_running:
-            self.start_queue_worker()
+        if self.io_pool.scheduler.paused:
+            for pool in self._queue_pools():
+                pool.scheduler.resume()
             self.pause_queue_button.configure(state="normal")
             self.resume_queue_button.configure(state="disabled")
             messagebox.showinfo("File d'attente", "File d'attente reprise")
@@ -1612,81 +2256,88 @@ class MacTubeApp:
             if self.ffmpeg_path:
                 ydl_opts['ffmpeg_location'] = self.ffmpeg_path
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # Extraire les informations
-                info = ydl.extract_info(url, download=False)
-                
-                # Récupérer les informations de base
-                title = info.get('title', 'Titre inconnu')
-                duration = info.get('duration', 0)
-                channel = info.get('uploader', 'Chaîne inconnue')
-                thumbnail_url = info.get('thumbnail', '')
-                
-                # Récupérer les formats disponibles
-                formats = info.get('formats', [])
-                streams = []
-                
-                # Traiter chaque format
-                for fmt in formats:
-                    if fmt.get('vcodec') != 'none' and fmt.get('resolution'):
-                        # Format vidéo avec résolution
-                        if fmt.get('acodec') != 'none':
-                            # Vidéo + audio
-                            stream_type = 'video+audio'
-                        else:
-                            # Vidéo seulement
-                            stream_type = 'video_only'
-                        
-                        streams.append({
-                            'format_id': fmt.get('format_id'),
-                            'resolution': fmt.get('resolution'),
-                            'filesize': fmt.get('filesize'),
-                            'type': stream_type,
-                            'format_obj': fmt,
-                            'ext': fmt.get('ext'),
-                            'fps': fmt.get('fps')
-                        })
-                    elif fmt.get('acodec') != 'none' and not fmt.get('vcodec', 'none') == 'none':
-                        # Format audio seulement
-                        streams.append({
-                            'format_id': fmt.get('format_id'),
-                            'resolution': f"Audio {fmt.get('abr', 'N/A')}kbps",
-                            'filesize': fmt.get('filesize'),
-                            'type': 'audio_only',
-                            'format_obj': fmt,
-                            'ext': fmt.get('ext'),
-                            'abr': fmt.get('abr')
-                        })
-                
-                # Trier les streams par qualité
-                def sort_key(stream):
-                    if 'Audio' in stream['resolution']:
-                        return -1  # Audio en dernier
+            # Vidéo déjà analysée : réponse immédiate depuis le cache disque
+            video_id = extract_video_id(url)
+            info = self.metadata_cache.get(video_id)
+            if info is not None:
+                print(f"🗃️ Métadonnées en cache pour {video_id}")
+            else:
+                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    info = extract_info(ydl, url)
+                self.metadata_cache.put(video_id, info)
+            
+            # Récupérer les informations de base
+            title = info.get('title', 'Titre inconnu')
+            duration = info.get('duration', 0)
+            channel = info.get('uploader', 'Chaîne inconnue')
+            thumbnail_url = info.get('thumbnail', '')
+            
+            # Récupérer les formats disponibles
+            formats = info.get('formats', [])
+            streams = []
+            
+            # Traiter chaque format
+            for fmt in formats:
+                if fmt.get('vcodec') != 'none' and fmt.get('resolution'):
+                    # Format vidéo avec résolution
+                    if fmt.get('acodec') != 'none':
+                        # Vidéo + audio
+                        stream_type = 'video+audio'
+                    else:
+                        # Vidéo seulement
+                        stream_type = 'video_only'
                     
-                    res = stream['resolution']
-                    if 'x' in res:  # Format "1920x1080"
-                        try:
-                            height = int(res.split('x')[1])
-                            return height
-                        except:
-                            return 0
-                    return 0
-                
-                streams.sort(key=sort_key, reverse=True)
-                
-                # Créer l'objet d'information
-                video_info = {
-                    'title': title,
-                    'duration': duration,
-                    'channel': channel,
-                    'thumbnail_url': thumbnail_url,
-                    'streams': streams,
-                    'yt_object': info
-                }
-                
-                # Mettre à jour l'interface
-                self.root.after(0, self._update_video_info, video_info)
+                    streams.append({
+                        'format_id': fmt.get('format_id'),
+                        'resolution': fmt.get('resolution'),
+                        'filesize': fmt.get('filesize'),
+                        'type': stream_type,
+                        'format_obj': fmt,
+                        'ext': fmt.get('ext'),
+                        'fps': fmt.get('fps')
+                    })
+                elif fmt.get('acodec') != 'none' and not fmt.get('vcodec', 'none') == 'none':
+                    # Format audio seulement
+                    streams.append({
+                        'format_id': fmt.get('format_id'),
+                        'resolution': f"Audio {fmt.get('abr', 'N/A')}kbps",
+                        'filesize': fmt.get('filesize'),
+                        'type': 'audio_only',
+                        'format_obj': fmt,
+                        'ext': fmt.get('ext'),
+                        'abr': fmt.get('abr')
+                    })
+            
+            # Trier les streams par qualité
+            def sort_key(stream):
+                if 'Audio' in stream['resolution']:
+                    return -1  # Audio en dernier
                 
+                res = stream['resolution']
+                if 'x' in res:  # Format "1920x1080"
+                    try:
+                        height = int(res.split('x')[1])
+                        return height
+                    except:
+                        return 0
+                return 0
+            
+            streams.sort(key=sort_key, reverse=True)
+            
+            # Créer l'objet d'information
+            video_info = {
+                'title': title,
+                'duration': duration,
+                'channel': channel,
+                'thumbnail_url': thumbnail_url,
+                'streams': streams,
+                'yt_object': info,
+                'url': url
+            }
+            
+            # Mettre à jour l'interface
+            self.root.after(0, self._update_video_info, video_info)
+            
         except Exception as e:
             error_msg = f"Erreur lors de l'analyse : {str(e)}"
             print(error_msg)
@@ -1710,8 +2361,8 @@ class MacTubeApp:
         
         self.video_channel.configure(text=f"📺 Chaîne: {info['channel']}")
         
-        # Charger la miniature
-        self._load_thumbnail(info['thumbnail_url'])
+        # Charger la miniature (asynchrone)
+        self._load_thumbnail(info['yt_object'].get('id') or extract_video_id(info['url']), info['thumbnail_url'])
         
         # Mettre à jour les qualités disponibles avec filtre style screenshot
         quality_values = []
@@ -1817,33 +2468,16 @@ class MacTubeApp:
         # Actualiser l'historique
         self.refresh_history()
     
-    def _load_thumbnail(self, url):
-        """Charge et affiche la miniature de la vidéo"""
-        try:
-            # Créer une session requests avec SSL désactivé
-            session = requests.Session()
-            session.verify = False
-            
-            response = session.get(url, timeout=10)
-            if response.status_code == 200:
-                # Charger l'image avec Pillow
-                from PIL import Image
-                image = Image.open(io.BytesIO(response.content))
-                
-                # Redimensionner à 320x180 en gardant les proportions
-                image.thumbnail((320, 180), Image.Resampling.LANCZOS)
-                
-                # Convertir pour CustomTkinter (meilleure compatibilité HiDPI)
-                ctk_image = ctk.CTkImage(light_image=image, size=(320, 180))
-                
-                # Mettre à jour la miniature
-                self.thumbnail.set_image(ctk_image)
-                
-        except Exception as e:
+    def _load_thumbnail(self, video_id, url):
+        """Demande la miniature de la vidéo au service (l'image arrive sur le thread Tk)"""
+        def on_error(error):
             error_text = "Erreur de chargement\nde la miniature"
-            if "SSL" in str(e) or "certificate" in str(e).lower():
+            if "SSL" in str(error) or "certificate" in str(error).lower():
                 error_text = "Erreur SSL lors du\nchargement de la miniature"
             self.thumbnail.set_error(error_text)
+        
+        if not self.thumbnail_service.load("analysis", video_id, url, self.thumbnail.set_image, on_error):
+            self.thumbnail.set_placeholder("⏳\nChargement...")
     
     def _format_size(self, size_bytes):
         """Formate la taille en MB/GB"""
@@ -1905,14 +2539,24 @@ class MacTubeApp:
                 messagebox.showerror("Erreur", f"Impossible de créer le dossier: {e}")
                 return
         
+        # Réutiliser l'info de l'analyse si l'URL n'a pas changé depuis
+        url = self.url_entry.get().strip()
+        info = None
+        if self.clean_youtube_url(url) == self.video_info.get('url'):
+            info = self.video_info.get('yt_object')
+        
         # Ajouter à la file d'attente
         task = self.add_to_queue(
-            self.url_entry.get().strip(),
+            url,
             selected_quality,
             output_format,
             filename,
-            download_path
+            download_path,
+            info=info
         )
+        if task is None:
+            self.status_label.configure(text="⏭️ Vidéo déjà téléchargée")
+            return
         
         # Mettre à jour l'interface
         self.status_label.configure(text=f"Ajouté à la file d'attente: {task.id}")
@@ -1928,6 +2572,7 @@ class MacTubeApp:
     
     def _download_video_thread(self, stream_info, output_format):
         """Thread pour le téléchargement de la vidéo avec yt-dlp"""
+        finished = threading.Event()
         try:
             # Générer le nom de fichier
             custom_filename = self.filename_entry.get().strip()
@@ -1963,31 +2608,41 @@ class MacTubeApp:
             if self.ffmpeg_path:
                 ydl_opts['ffmpeg_location'] = self.ffmpeg_path
             
-            # Hook de progression pour yt-dlp
-            def progress_hook(d):
-                if d['status'] == 'downloading':
-                    if 'total_bytes' in d and d['total_bytes']:
-                        percent = d['downloaded_bytes'] / d['total_bytes']
-                        speed = d.get('speed', 0)
-                        speed_str = f"{speed/1024/1024:.1f} MB/s" if speed else "-- MB/s"
-                        status = f"Téléchargement... {percent*100:.1f}% - {speed_str}"
-                        self.root.after(0, self.progress_bar.update_progress, status, percent)
-                elif d['status'] == 'finished':
-                    self.root.after(0, self.progress_bar.update_progress, "Finalisation...", 0.9)
-            
-            ydl_opts['progress_hooks'] = [progress_hook]
+            # Progression : le hook écrit les compteurs, l'interface les échantillonne
+            progress = MacTubeProgressSlot()
+            ydl_opts['progress_hooks'] = [progress.write]
             
             # Mettre à jour le statut
             self.root.after(0, self.progress_bar.update_progress, "Début du téléchargement...", 0)
+            self.root.after(SAMPLE_INTERVAL_MS, self._poll_download_progress, progress, finished)
             
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([self.url_entry.get().strip()])
+                info = self.video_info['yt_object']
+                if is_info_fresh(info):
+                    download_with_info(ydl, info)
+                else:
+                    ydl.download([self.video_info['url']])
             
             # Terminé
             self.root.after(0, self._download_complete, output_path)
             
         except Exception as e:
             self.root.after(0, self._show_error, f"Erreur lors du téléchargement : {str(e)}")
+        finally:
+            finished.set()
+    
+    def _poll_download_progress(self, progress, finished):
+        """Affiche la progression du téléchargement direct (4 Hz) jusqu'à sa fin"""
+        if finished.is_set():
+            return
+        if progress.sample():
+            if progress.status == 'finished':
+                self.progress_bar.update_progress("Finalisation...", 0.9)
+            else:
+                status = (f"Téléchargement... {progress.percent:.1f}% - {format_speed(progress.speed)}"
+                          f" - {format_eta(progress.eta)}")
+                self.progress_bar.update_progress(status, progress.percent / 100)
+        self.root.after(SAMPLE_INTERVAL_MS, self._poll_download_progress, progress, finished)
     
     def _download_complete(self, output_path):
         """Appelé quand le téléchargement est terminé"""
@@ -2163,6 +2818,10 @@ class MacTubeApp:
             if hasattr(self, 'max_downloads_label'):
                 self.max_downloads_label.configure(text_color=text_color)
                 print("✅ Label max téléchargements mis à jour")
+            if hasattr(self, 'max_transcodes_label'):
+                self.max_transcodes_label.configure(text_color=text_color)
+            if hasattr(self, 'cache_stats_label'):
+                self.cache_stats_label.configure(text_color=text_color)
             
             # Mettre à jour tous les labels de navigation
             if hasattr(self, 'navigation'):
@@ -2365,9 +3024,23 @@ class MacTubeApp:
     def on_closing(self):
         """Gestionnaire de fermeture avec nettoyage automatique de l'historique"""
         try:
+            # Arrêter la distribution des tâches
+            for pool in self._queue_pools():
+                pool.stop()
+            
             # Nettoyer l'historique automatiquement
             self.clear_history_on_exit()
             
+            if hasattr(self, 'metadata_resolver'):
+                self.metadata_resolver.shutdown()
+            if hasattr(self, 'metadata_cache'):
+                self.metadata_cache.close()
+            if hasattr(self, 'thumbnail_service'):
+                self.thumbnail_service.shutdown()
+            # Les tâches en attente ou en cours restent dans le journal pour le prochain lancement
+            if hasattr(self, 'queue_journal'):
+                self.queue_journal.close()
+            
             # Fermeture normale
             if hasattr(self, 'root'):
                 self.root.quit()
@@ -2385,6 +3058,10 @@ class MacTubeHistory:
     def __init__(self):
         self.history_file = Path.home() / ".mactube_history.json"
         self.downloads = self.load_history()
+        # Index (ID vidéo, qualité, format) → entrée, pour détecter les doublons en O(1)
+        self._index = {}
+        for download in self.downloads:
+            self._index_download(download)
     
     def load_history(self):
         """Charge l'historique depuis le fichier"""
@@ -2404,7 +3081,7 @@ class MacTubeHistory:
         except Exception as e:
             print(f"Erreur de sauvegarde: {e}")
     
-    def add_download(self, title, url, path, format, quality):
+    def add_download(self, title, url, path, format, quality, video_id=None, file=None):
         """Ajoute un téléchargement à l'historique"""
         download = {
             'title': title,
@@ -2412,11 +3089,26 @@ class MacTubeHistory:
             'path': path,
             'format': format,
             'quality': quality,
+            'video_id': video_id or extract_video_id(url),
+            'file': file,
             'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         self.downloads.append(download)
+        self._index_download(download)
         self.save_history()
     
+    def _index_download(self, download):
+        video_id = download.get('video_id') or extract_video_id(download.get('url'))
+        if video_id:
+            self._index[(video_id, download.get('quality'), download.get('format'))] = download
+    
+    def find(self, key):
+        """Retourne l'entrée dont le fichier existe encore pour cette clé, ou None"""
+        download = self._index.get(key)
+        if download and download.get('file') and os.path.exists(download['file']):
+            return download
+        return None
+    
     def get_downloads(self):
         """Récupère tous les téléchargements"""
         return self.downloads
@@ -2424,6 +3116,7 @@ class MacTubeHistory:
     def clear(self):
         """Efface l'historique"""
         self.downloads = []
+        self._index.clear()
         self.save_history()
 
 def main():
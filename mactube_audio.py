@@ -9,6 +9,7 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import os
+import re
 import threading
 import yt_dlp
 from pathlib import Path
@@ -16,8 +17,72 @@ from pathlib import Path
 # Imports personnalisés
 from mactube_theme import MacTubeTheme
 from mactube_ffmpeg import get_ffmpeg_path
+from mactube_metadata import extract_info, extract_video_id
+from mactube_progress import MacTubeProgressSlot, SAMPLE_INTERVAL_MS
+
+# Motifs d'URL YouTube reconnus (compilés une seule fois)
+YOUTUBE_URL_PATTERNS = [
+    re.compile(r'youtube\.com/watch\?v=[a-zA-Z0-9_-]{11}'),  # ID exactement 11 caractères
+    re.compile(r'youtu\.be/[a-zA-Z0-9_-]{11}'),              # ID exactement 11 caractères
+    re.compile(r'youtube\.com/embed/[a-zA-Z0-9_-]{11}'),      # ID exactement 11 caractères
+    re.compile(r'youtube\.com/v/[a-zA-Z0-9_-]{11}'),         # Ancien format
+    re.compile(r'youtube\.com/attribution_link\?.*v=[a-zA-Z0-9_-]{11}'),  # Liens de partage
+]
+WATCH_ID_PATTERN = re.compile(r'youtube\.com/watch\?v=([a-zA-Z0-9_-]{11})')
+
+# Ingestion bulk : taille des lots envoyés à la file et nombre max
+# d'URLs invalides conservées pour l'affichage
+BULK_BATCH_SIZE = 500
+MAX_INVALID_SAMPLES = 200
+
+
+def normalize_youtube_url(url):
+    """Retourne (clé de déduplication, URL propre), ou None si ce n'est pas une URL YouTube
+
+    Version silencieuse de clean/validate pour les gros fichiers : l'URL est
+    réduite à sa forme canonique watch?v=ID quand l'ID est reconnu.
+    """
+    video_id = extract_video_id(url)
+    if video_id:
+        return video_id, f"https://www.youtube.com/watch?v={video_id}"
+    if 'youtube.com' in url or 'youtu.be' in url:
+        # Format non reconnu : accepté tel quel, comme validate_youtube_url
+        return url, url
+    return None
+
+
+def new_bulk_stats():
+    """Compteurs remplis par iter_bulk_urls"""
+    return {'lines': 0, 'valid': 0, 'duplicates': 0, 'invalid': 0, 'invalid_samples': []}
+
+
+def iter_bulk_urls(path, stats):
+    """Lit un fichier d'URLs ligne à ligne et produit les URLs propres sans doublons
+
+    Le fichier n'est jamais chargé en entier ; seuls les IDs déjà vus sont
+    gardés en mémoire. `stats` est mis à jour au fil de la lecture.
+    """
+    seen = set()
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line_num, line in enumerate(f, 1):
+            stats['lines'] = line_num
+            url = line.strip()
+            if not url or url.startswith('#'):  # Ignorer les lignes vides et commentaires
+                continue
+            normalized = normalize_youtube_url(url)
+            if normalized is None:
+                stats['invalid'] += 1
+                if len(stats['invalid_samples']) < MAX_INVALID_SAMPLES:
+                    stats['invalid_samples'].append(f"Ligne {line_num}: {url}")
+                continue
+            key, clean_url = normalized
+            if key in seen:
+                stats['duplicates'] += 1
+                continue
+            seen.add(key)
+            stats['valid'] += 1
+            yield clean_url
 
-# Pas d'imports spéciaux nécessaires
 
 class MacTubeAudioExtractor:
     """Interface d'extraction audio pour MacTube"""
@@ -28,6 +93,9 @@ class MacTubeAudioExtractor:
         self.app = app
         self.is_extracting = False
         self.download_path = str(Path.home() / "Downloads")
+        # Dernière analyse (réutilisée par la file d'attente pour éviter une ré-extraction)
+        self.analysed_url = None
+        self.analysed_info = None
         # Récupérer le chemin FFmpeg depuis l'app si disponible
         self.ffmpeg_path = getattr(app, 'ffmpeg_path', None) if app else None
         self.create_audio_interface()
@@ -421,17 +489,27 @@ class MacTubeAudioExtractor:
             if ffmpeg_path:
                 ydl_opts['ffmpeg_location'] = ffmpeg_path
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # Extraire les informations
-                info = ydl.extract_info(url, download=False)
-                
-                # Récupérer les informations de base
-                title = info.get('title', 'Titre inconnu')
-                duration = info.get('duration', 0)
-                channel = info.get('uploader', 'Chaîne inconnue')
-                
-                # Mettre à jour l'interface
-                self.parent.after(0, self._update_audio_info, title, duration, channel)
+            # Cache disque des métadonnées partagé avec l'application
+            cache = getattr(self.app, 'metadata_cache', None)
+            video_id = extract_video_id(url)
+            info = cache.get(video_id) if cache is not None else None
+            if info is not None:
+                print(f"🗃️ Métadonnées en cache pour {video_id}")
+            else:
+                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    info = extract_info(ydl, url)
+                if cache is not None:
+                    cache.put(video_id, info)
+            self.analysed_url = url
+            self.analysed_info = info
+            
+            # Récupérer les informations de base
+            title = info.get('title', 'Titre inconnu')
+            duration = info.get('duration', 0)
+            channel = info.get('uploader', 'Chaîne inconnue')
+            
+            # Mettre à jour l'interface
+            self.parent.after(0, self._update_audio_info, title, duration, channel)
                 
         except Exception as e:
             self.parent.after(0, self._show_error, f"Erreur lors de l'analyse : {str(e)}")
@@ -478,9 +556,13 @@ class MacTubeAudioExtractor:
             filename = self.filename_entry.get().strip() or "%(title)s"
             download_path = self.dest_entry.get().strip() or self.download_path
 
-            # Ajouter la tâche à la file (type audio)
-            app.add_to_queue(clean_url, quality, output_format, filename, download_path, task_type="audio")
-            self.status_label.configure(text="Ajouté à la file d'attente audio")
+            # Ajouter la tâche à la file (type audio), avec l'info de l'analyse si disponible
+            info = self.analysed_info if clean_url == self.analysed_url else None
+            task = app.add_to_queue(clean_url, quality, output_format, filename, download_path, task_type="audio", info=info)
+            if task is None:
+                self.status_label.configure(text="⏭️ Audio déjà extrait")
+            else:
+                self.status_label.configure(text="Ajouté à la file d'attente audio")
             self.extract_button.configure(text="🎵 Ajouté à la file")
         except Exception as e:
             print(f"❌ Erreur lors de l'ajout à la file d'attente: {e}")
@@ -538,19 +620,13 @@ class MacTubeAudioExtractor:
             if ffmpeg_path:
                 ydl_opts['ffmpeg_location'] = ffmpeg_path
             
-            # Hook de progression
-            def progress_hook(d):
-                if d['status'] == 'downloading':
-                    if 'total_bytes' in d and d['total_bytes']:
-                        percent = d['downloaded_bytes'] / d['total_bytes']
-                        self.parent.after(0, self.progress_bar.update_progress, "Téléchargement...", percent)
-                elif d['status'] == 'finished':
-                    self.parent.after(0, self.progress_bar.update_progress, "Conversion audio...", 0.9)
-            
-            ydl_opts['progress_hooks'] = [progress_hook]
+            # Progression : le hook écrit les compteurs, l'interface les échantillonne
+            progress = MacTubeProgressSlot()
+            ydl_opts['progress_hooks'] = [progress.write]
             
             # Mettre à jour le statut
             self.parent.after(0, self.progress_bar.update_progress, "Début de l'extraction...", 0)
+            self.parent.after(SAMPLE_INTERVAL_MS, self._poll_extraction_progress, progress)
             
             # Nettoyer les fichiers potentiellement existants avant de commencer
             self._cleanup_temp_files(output_path)
@@ -600,6 +676,17 @@ class MacTubeAudioExtractor:
         else:
             return "bestaudio"
     
+    def _poll_extraction_progress(self, progress):
+        """Affiche la progression de l'extraction (4 Hz) tant qu'elle est en cours"""
+        if not self.is_extracting:
+            return
+        if progress.sample():
+            if progress.status == 'finished':
+                self.progress_bar.update_progress("Conversion audio...", 0.9)
+            else:
+                self.progress_bar.update_progress("Téléchargement...", progress.percent / 100)
+        self.parent.after(SAMPLE_INTERVAL_MS, self._poll_extraction_progress, progress)
+    
     def _extraction_complete(self, output_path):
         """Appelé quand l'extraction est terminée"""
         self.is_extracting = False
@@ -620,8 +707,6 @@ class MacTubeAudioExtractor:
     
     def clean_youtube_url(self, url):
         """Nettoie l'URL YouTube en supprimant les paramètres de playlist"""
-        import re
-        
         # Solution simple et efficace : couper avant &list=
         if '&list=' in url:
             clean_url = url.split('&list=')[0]
@@ -631,7 +716,7 @@ class MacTubeAudioExtractor:
         # Si pas de &list=, vérifier s'il y a d'autres paramètres problématiques
         if '&start_radio=' in url or '&feature=' in url or '&ab_channel=' in url:
             # Extraire l'ID de la vidéo et reconstruire une URL propre
-            match = re.search(r'youtube\.com/watch\?v=([a-zA-Z0-9_-]{11})', url)
+            match = WATCH_ID_PATTERN.search(url)
             if match:
                 video_id = match.group(1)
                 clean_url = f"https://www.youtube.com/watch?v={video_id}"
@@ -690,23 +775,10 @@ class MacTubeAudioExtractor:
             print(f"⚠️  Erreur lors du nettoyage: {e}")
     
     def validate_youtube_url(self, url):
-        """Valide l'URL YouTube avec une validation robuste"""
-        import re
-        
-        # Nettoyer d'abord l'URL
-        clean_url = self.clean_youtube_url(url)
-        
+        """Valide une URL YouTube (déjà nettoyée par clean_youtube_url)"""
         # Vérifier que c'est une URL YouTube valide
-        patterns = [
-            r'youtube\.com/watch\?v=[a-zA-Z0-9_-]{11}',  # ID exactement 11 caractères
-            r'youtu\.be/[a-zA-Z0-9_-]{11}',              # ID exactement 11 caractères
-            r'youtube\.com/embed/[a-zA-Z0-9_-]{11}',      # ID exactement 11 caractères
-            r'youtube\.com/v/[a-zA-Z0-9_-]{11}',         # Ancien format
-            r'youtube\.com/attribution_link\?.*v=[a-zA-Z0-9_-]{11}'  # Liens de partage
-        ]
-        
-        for pattern in patterns:
-            if re.search(pattern, clean_url):
+        for pattern in YOUTUBE_URL_PATTERNS:
+            if pattern.search(url):
                 return True
         
         # Si l'URL n'est pas reconnue, essayer de la valider directement
@@ -758,97 +830,114 @@ class MacTubeAudioExtractor:
         print(f"✅ Fichier chargé: {filename} ({size_str})")
     
     def process_bulk_file(self):
-        """Traite le fichier .txt et valide les URLs"""
+        """Analyse le fichier .txt en arrière-plan (validation et dédoublonnage)"""
         if not self.bulk_file_path:
             messagebox.showwarning("Attention", "Veuillez d'abord sélectionner un fichier .txt")
             return
+        if not self.app:
+            messagebox.showerror("Erreur", "Impossible d'accéder à la file d'attente")
+            return
         
+        self.process_bulk_button.configure(state="disabled")
+        self.file_info_label.configure(text="⏳ Analyse du fichier en cours...")
+        threading.Thread(target=self._scan_bulk_file, args=(self.bulk_file_path,), daemon=True).start()
+    
+    def _scan_bulk_file(self, path):
+        """Thread : premier passage sur le fichier pour compter les URLs"""
         try:
-            # Lire le fichier
-            with open(self.bulk_file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            # Nettoyer et valider les URLs
-            valid_urls = []
-            invalid_urls = []
-            
-            for line_num, line in enumerate(lines, 1):
-                url = line.strip()
-                if url and not url.startswith('#'):  # Ignorer les lignes vides et commentaires
-                    # Nettoyer l'URL
-                    clean_url = self.clean_youtube_url(url)
-                    
-                    # Valider l'URL
-                    if self.validate_youtube_url(clean_url):
-                        valid_urls.append(clean_url)
-                    else:
-                        invalid_urls.append(f"Ligne {line_num}: {url}")
+            stats = new_bulk_stats()
+            for count, _ in enumerate(iter_bulk_urls(path, stats), 1):
+                if count % 5000 == 0:
+                    self.parent.after(0, self._update_bulk_status, f"⏳ Analyse du fichier... {count} URLs valides")
+            self.parent.after(0, self._confirm_bulk_file, path, stats)
+        except Exception as e:
+            self.parent.after(0, self._bulk_error, f"Erreur lors du traitement du fichier:\n{str(e)}")
+    
+    def _update_bulk_status(self, text):
+        """Met à jour le texte d'état du bulk"""
+        self.file_info_label.configure(text=text)
+    
+    def _bulk_error(self, error_msg):
+        """Affiche une erreur bulk et réactive le bouton"""
+        self.process_bulk_button.configure(state="normal")
+        messagebox.showerror("Erreur", error_msg)
+    
+    def _confirm_bulk_file(self, path, stats):
+        """Demande confirmation puis lance l'ingestion (thread Tk)"""
+        self.process_bulk_button.configure(state="normal")
+        
+        # Afficher les résultats
+        if stats['valid']:
+            # Confirmation avec nom du fichier
+            filename = os.path.basename(path)
+            result = messagebox.askyesno(
+                "Confirmation",
+                f"Fichier: {filename}\n\n"
+                f"✅ URLs valides: {stats['valid']}\n"
+                f"🔁 Doublons ignorés: {stats['duplicates']}\n"
+                f"❌ URLs invalides: {stats['invalid']}\n\n"
+                f"Voulez-vous ajouter les URLs valides à la file d'attente ?"
+            )
             
-            # Afficher les résultats
-            if valid_urls:
-                # Confirmation avec nom du fichier
-                filename = os.path.basename(self.bulk_file_path)
-                result = messagebox.askyesno(
-                    "Confirmation",
-                    f"Fichier: {filename}\n\n"
-                    f"✅ URLs valides: {len(valid_urls)}\n"
-                    f"❌ URLs invalides: {len(invalid_urls)}\n\n"
-                    f"Voulez-vous ajouter les URLs valides à la file d'attente ?"
-                )
-                
-                if result:
-                    self.add_bulk_urls_to_queue(valid_urls)
+            if result:
+                self.add_bulk_file_to_queue(path, stats['valid'])
             else:
-                messagebox.showwarning("Aucune URL valide", "Aucune URL YouTube valide trouvée dans le fichier.")
-            
-            # Afficher les URLs invalides si il y en a
-            if invalid_urls:
-                self.show_invalid_urls_popup(invalid_urls)
-                
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Erreur lors du traitement du fichier:\n{str(e)}")
+                self.update_file_info(path)
+        else:
+            messagebox.showwarning("Aucune URL valide", "Aucune URL YouTube valide trouvée dans le fichier.")
+        
+        # Afficher les URLs invalides si il y en a
+        if stats['invalid_samples']:
+            invalid_urls = list(stats['invalid_samples'])
+            hidden = stats['invalid'] - len(invalid_urls)
+            if hidden > 0:
+                invalid_urls.append(f"... et {hidden} autres")
+            self.show_invalid_urls_popup(invalid_urls)
     
-    def add_bulk_urls_to_queue(self, urls):
-        """Ajoute les URLs valides à la file d'attente"""
-        if not self.app:
-            messagebox.showerror("Erreur", "Impossible d'accéder à la file d'attente")
-            return
+    def add_bulk_file_to_queue(self, path, expected):
+        """Ajoute les URLs du fichier à la file d'attente, par lots et hors du thread Tk"""
+        # Lire les réglages bulk ici : les widgets ne sont accessibles que depuis le thread Tk
+        params = {
+            'quality': self.bulk_quality_combo.get(),
+            'output_format': self.bulk_format_combo.get(),
+            'filename': "%(title)s",  # Utiliser le nom par défaut, évite les collisions
+            # Utiliser le dossier de destination bulk s'il est défini, sinon le dossier par défaut
+            'download_path': self.bulk_dest_path.get() or self.download_path,
+        }
+        self.process_bulk_button.configure(state="disabled")
+        threading.Thread(target=self._ingest_bulk_file, args=(path, expected, params), daemon=True).start()
+    
+    def _ingest_bulk_file(self, path, expected, params):
+        """Thread : second passage, URLs envoyées à la file par lots"""
+        def on_progress(added):
+            self.parent.after(0, self._update_bulk_status,
+                              f"⏳ Ajout à la file d'attente... {added}/{expected}")
         
         try:
-            added_count = 0
-            for url in urls:
-                # Créer une tâche audio pour chaque URL avec les paramètres bulk
-                # Utiliser le dossier de destination bulk s'il est défini, sinon le dossier par défaut
-                download_path = self.bulk_dest_path.get() if self.bulk_dest_path.get() else self.download_path
-                
-                task = self.app.add_to_queue(
-                    url=url,
-                    quality=self.bulk_quality_combo.get(),
-                    output_format=self.bulk_format_combo.get(),
-                    filename="%(title)s",  # Utiliser le nom par défaut, évite les collisions
-                    download_path=download_path,
-                    task_type="audio",
-                    silent=True  # éviter toutes les pop-ups en mode bulk
-                )
-                added_count += 1
-            
-            # Mettre à jour l'interface avec le résultat
-            self.file_info_label.configure(
-                text=f"✅ {added_count} tâches audio ajoutées à la file d'attente !\n\n"
-                f"📋 Les URLs seront traitées une par une.\n"
-                f"🔍 Vérifiez l'onglet 'File d\'attente' pour suivre le progrès."
+            added = self.app.add_many_to_queue(
+                iter_bulk_urls(path, new_bulk_stats()),
+                task_type="audio",
+                batch_size=BULK_BATCH_SIZE,
+                on_progress=on_progress,
+                **params
             )
-            
-            # Indiquer le succès (pas de changement de couleur de bordure car plus de cadre)
-            
-            # Afficher un message dans la console
-            print(f"✅ {added_count} tâches audio ajoutées à la file d'attente")
-            
-            # Réinitialiser l'interface après un délai
-            self.parent.after(3000, self.reset_bulk_interface)
-            
+            self.parent.after(0, self._bulk_ingest_complete, added)
         except Exception as e:
-            messagebox.showerror("Erreur", f"Erreur lors de l'ajout à la file d'attente:\n{str(e)}")
+            self.parent.after(0, self._bulk_error, f"Erreur lors de l'ajout à la file d'attente:\n{str(e)}")
+    
+    def _bulk_ingest_complete(self, added_count):
+        """Affiche le résultat de l'ingestion bulk"""
+        self.process_bulk_button.configure(state="normal")
+        
+        # Mettre à jour l'interface avec le résultat
+        self.file_info_label.configure(
+            text=f"✅ {added_count} tâches audio ajoutées à la file d'attente !\n\n"
+            f"📋 Les URLs seront traitées une par une.\n"
+            f"🔍 Vérifiez l'onglet 'File d\'attente' pour suivre le progrès."
+        )
+        
+        # Réinitialiser l'interface après un délai
+        self.parent.after(3000, self.reset_bulk_interface)
     
     def show_invalid_urls_popup(self, invalid_urls):
         """Affiche une pop-up avec les URLs invalides"""
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MacTube Bandwidth - Limitation globale du débit des téléchargements
+Seau à jetons partagé par toutes les tâches de la file, avec répartition
+équitable entre téléchargements actifs et plage horaire sans limite
+"""
+
+import time
+import threading
+from collections import deque
+from datetime import datetime
+
+# Un téléchargement sans progression depuis ce délai (s) ne compte plus dans le partage
+# (compté à partir de la fin de son attente s'il dort sur sa part)
+ACTIVE_WINDOW = 3.0
+
+# Réserve maximale d'un seau, en secondes de débit (absorbe les à-coups)
+BURST_SECONDS = 1.0
+
+# Fenêtre de mesure du débit global affiché (s)
+METER_WINDOW = 2.0
+
+# Tranche d'attente (s) entre deux vérifications d'interruption
+SLEEP_SLICE = 0.25
+
+
+class MacTubeBandwidthGovernor:
+    """Limiteur de débit global (seau à jetons) partagé par les téléchargements
+
+    Chaque téléchargement actif dispose d'un seau rempli à `limite / n`
+    (n = nombre de téléchargements actifs) : la somme ne dépasse jamais la
+    limite et la part d'une tâche inactive revient aux autres. `throttle()`
+    est appelé depuis le hook de progression et dort le temps nécessaire.
+    """
+
+    def __init__(self, rate=0, unlimited_hours=None):
+        self.rate = rate  # octets/s ; 0 = illimité
+        self.unlimited_hours = unlimited_hours  # (début, fin) en heures locales, ou None
+        self._consumers = {}  # clé -> {'tokens', 'updated', 'last_seen', 'downloaded', 'file'}
+        self._meter = deque()  # (instant, octets) sur METER_WINDOW
+        self._meter_bytes = 0
+        self._lock = threading.Lock()
+
+    # -------- Réglages --------
+    def set_rate(self, rate):
+        """Change la limite globale (octets/s, 0 = illimité)"""
+        with self._lock:
+            self.rate = rate
+
+    def set_schedule(self, unlimited_hours):
+        """Plage horaire sans limite, ex: (22, 7) pour la nuit ; None = limite permanente"""
+        with self._lock:
+            self.unlimited_hours = unlimited_hours
+
+    def current_limit(self, now=None):
+        """Limite en vigueur (octets/s), 0 si illimité à cette heure"""
+        if not self.rate:
+            return 0
+        if self.unlimited_hours:
+            start, end = self.unlimited_hours
+            hour = (now or datetime.now()).hour
+            in_window = (start <= hour < end) if start < end else (hour >= start or hour < end)
+            if in_window:
+                return 0
+        return self.rate
+
+    # -------- Consommation --------
+    def throttle(self, key, downloaded, filename=None, should_stop=None):
+        """Compte les octets reçus par `key` et attend si sa part est dépassée
+
+        `downloaded` est le total cumulé du fichier (hook yt-dlp). Au premier
+        appel pour un fichier, il sert de base sans être décompté : un fichier
+        .part repris déclare d'emblée les octets des lancements précédents.
+        `should_stop()` interrompt l'attente.
+        Retourne la durée d'attente (s).
+        """
+        now = time.monotonic()
+        limit = self.current_limit()
+        with self._lock:
+            state = self._consumers.get(key)
+            if state is None:
+                state = {'tokens': 0.0, 'updated': now, 'last_seen': now, 'downloaded': downloaded, 'file': filename}
+                self._consumers[key] = state
+            if state['file'] != filename or downloaded < state['downloaded']:
+                # Nouveau fichier (ou compteur reparti) : nouvelle base, rien à décompter
+                state['file'] = filename
+                state['downloaded'] = downloaded
+            nbytes = downloaded - state['downloaded']
+            state['downloaded'] = downloaded
+            state['last_seen'] = now
+            self._record(now, nbytes)
+
+            if not limit:
+                state['tokens'] = 0.0
+                state['updated'] = now
+                return 0.0
+
+            active = sum(1 for s in self._consumers.values() if now - s['last_seen'] < ACTIVE_WINDOW)
+            share = limit / max(1, active)
+            state['tokens'] = min(share * BURST_SECONDS, state['tokens'] + (now - state['updated']) * share)
+            state['updated'] = now
+            state['tokens'] -= nbytes
+            delay = -state['tokens'] / share if state['tokens'] < 0 else 0.0
+            # Une tâche qui dort sur sa dette reste comptée dans le partage jusqu'à son réveil
+            state['last_seen'] = now + delay
+
+        # Attente hors verrou, par tranches pour rester interruptible (pause, annulation)
+        waited = 0.0
+        while waited < delay:
+            if should_stop is not None and should_stop():
+                with self._lock:
+                    # Attente interrompue : la part ne reste pas réservée jusqu'à l'échéance prévue
+                    state['last_seen'] = time.monotonic()
+                break
+            step = min(SLEEP_SLICE, delay - waited)
+            time.sleep(step)
+            waited += step
+        return waited
+
+    def release(self, key):
+        """Oublie un téléchargement terminé (sa part revient aux autres)"""
+        with self._lock:
+            self._consumers.pop(key, None)
+
+    # -------- Mesure --------
+    def _record(self, now, nbytes):
+        if nbytes:
+            self._meter.append((now, nbytes))
+            self._meter_bytes += nbytes
+        while self._meter and now - self._meter[0][0] > METER_WINDOW:
+            self._meter_bytes -= self._meter.popleft()[1]
+
+    def aggregate_rate(self):
+        """Débit global mesuré sur les METER_WINDOW dernières secondes (octets/s)"""
+        with self._lock:
+            self._record(time.monotonic(), 0)
+            return self._meter_bytes / METER_WINDOW
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            active = sum(1 for s in self._consumers.values() if now - s['last_seen'] < ACTIVE_WINDOW)
+        return {
+            'rate': self.aggregate_rate(),
+            'limit': self.current_limit(),
+            'active': active,
+        }
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MacTube Batch - Transcodage par lot
+Parcourt un dossier, un motif glob ou une sélection de fichiers, crée les
+tâches au fur et à mesure et garde un nombre borné de tâches en file
+"""
+
+import os
+import glob
+import time
+import threading
+
+# Extensions reconnues par type d'entrée
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mkv', '.mov', '.webm', '.flv', '.m4v', '.3gp'}
+AUDIO_EXTENSIONS = {'.mp3', '.aac', '.flac', '.wav', '.m4a', '.ogg'}
+
+# Motifs pour lesquels `make_job` ignore un fichier
+SKIP_UP_TO_DATE = 'up_to_date'
+SKIP_SAME_FORMAT = 'same_format'
+
+
+def iter_batch_inputs(source, extensions):
+    """
+    Produit les fichiers à traiter, sans construire la liste complète
+    source : dossier (parcouru récursivement), motif glob ou liste de fichiers.
+    """
+    if isinstance(source, (list, tuple)):
+        candidates = iter(source)
+    elif os.path.isdir(source):
+        candidates = _walk_files(source)
+    else:
+        candidates = glob.iglob(os.path.expanduser(source), recursive=True)
+
+    for path in candidates:
+        if os.path.splitext(path)[1].lower() in extensions and os.path.isfile(path):
+            yield path
+
+
+def _walk_files(folder):
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.startswith('.'):
+                yield os.path.join(root, name)
+
+
+def is_up_to_date(input_path, output_path):
+    """Indique si la sortie existe et est plus récente que l'entrée"""
+    try:
+        return os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+    except OSError:
+        return False
+
+
+class MacTubeBatchJob:
+    """
+    Lot de transcodages alimenté à la demande
+    `make_job(path)` retourne les paramètres d'une tâche, ou le motif pour
+    lequel le fichier est ignoré (SKIP_*, None = déjà à jour) ;
+    `submit(params, on_finished)` ajoute la tâche à la file et la retourne.
+    Au plus `window` tâches du lot sont en file ou en cours ; une nouvelle
+    tâche est créée à chaque fin de tâche. Le parcours des fichiers se fait
+    sur un thread dédié, jamais sur celui de l'appelant (interface).
+    `on_update(summary)` est appelé après chaque tâche, `on_complete(summary)`
+    une fois le lot terminé.
+    """
+
+    def __init__(self, inputs, make_job, submit, window=4, on_update=None, on_complete=None):
+        self._inputs = iter(inputs)
+        self.make_job = make_job
+        self.submit = submit
+        self.window = max(1, window)
+        self.on_update = on_update
+        self.on_complete = on_complete
+        self.in_flight = 0
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+        self.skip_reasons = {}
+        self.bytes_in = 0
+        self.started_at = None
+        self.finished_at = None
+        self._exhausted = False
+        self.cancelled = False
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Lance le lot ; les premières tâches sont ajoutées par le thread du lot"""
+        self.started_at = time.monotonic()
+        self._wake.set()
+        threading.Thread(target=self._run, name="mactube-batch", daemon=True).start()
+
+    def cancel(self):
+        """Arrête d'alimenter le lot (les tâches déjà ajoutées suivent leur cours)"""
+        with self._lock:
+            self.cancelled = True
+            self._exhausted = True
+        self._wake.set()
+
+    def _run(self):
+        # Parcours du dossier et tests de fraîcheur (stat) hors du thread Tk
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._fill():
+                return
+
+    def _fill(self):
+        """Complète la fenêtre ; retourne True une fois le lot terminé"""
+        jobs = []
+        with self._lock:
+            while not self._exhausted and self.in_flight + len(jobs) < self.window:
+                path = next(self._inputs, None)
+                if path is None:
+                    self._exhausted = True
+                    break
+                params = self.make_job(path)
+                if not isinstance(params, dict):
+                    reason = params or SKIP_UP_TO_DATE
+                    self.skipped += 1
+                    self.skip_reasons[reason] = self.skip_reasons.get(reason, 0) + 1
+                    continue
+                jobs.append(params)
+            self.in_flight += len(jobs)
+            complete = self._exhausted and self.in_flight == 0 and self.finished_at is None
+            if complete:
+                self.finished_at = time.monotonic()
+
+        for params in jobs:
+            self.submit(params, self._task_finished)
+        if complete and self.on_complete:
+            self.on_complete(self.summary())
+        return complete
+
+    def _task_finished(self, task):
+        with self._lock:
+            self.in_flight -= 1
+            if task.status.startswith("Terminé"):
+                self.done += 1
+                try:
+                    self.bytes_in += os.path.getsize(task.input_path)
+                except OSError:
+                    pass
+            else:
+                self.failed += 1
+        if self.on_update:
+            self.on_update(self.summary())
+        self._wake.set()
+
+    def summary(self):
+        """Bilan du lot : fichiers traités, ignorés, en erreur et débit"""
+        end = self.finished_at or time.monotonic()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            'done': self.done,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'up_to_date': self.skip_reasons.get(SKIP_UP_TO_DATE, 0),
+            'same_format': self.skip_reasons.get(SKIP_SAME_FORMAT, 0),
+            'cancelled': self.cancelled,
+            'in_flight': self.in_flight,
+            'elapsed_s': elapsed,
+            'files_per_min': self.done / elapsed * 60 if elapsed > 0 else 0.0,
+            'mb_per_s': self.bytes_in / (1024 * 1024) / elapsed if elapsed > 0 else 0.0,
+            'finished': self.finished_at is not None,
+        }
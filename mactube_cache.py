@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MacTube Cache - Cache disque des métadonnées YouTube
+Conserve titre, durée, miniature et liste de formats allégée par ID vidéo
+(SQLite, expiration TTL et éviction LRU bornée)
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+# Champs conservés pour chaque format (sans les URLs de flux, qui expirent)
+FORMAT_FIELDS = (
+    'format_id', 'ext', 'resolution', 'width', 'height', 'fps',
+    'vcodec', 'acodec', 'abr', 'tbr', 'filesize', 'filesize_approx',
+)
+
+# Champs conservés au niveau de la vidéo
+INFO_FIELDS = ('id', 'title', 'duration', 'uploader', 'channel', 'thumbnail', 'webpage_url')
+
+
+def get_cache_dir():
+    """Retourne le dossier de cache utilisateur de MacTube (créé au besoin)"""
+    if sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches" / "MacTube"
+    elif sys.platform == "win32":
+        base = Path(os.environ.get('LOCALAPPDATA', Path.home() / "AppData" / "Local")) / "MacTube" / "Cache"
+    else:
+        base = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / ".cache")) / "mactube"
+    base.mkdir(parents=True, exist_ok=True)
+    return base
+
+
+def trim_info(info):
+    """Réduit un dict yt-dlp aux champs utiles à l'analyse
+
+    Le résultat est marqué `_mactube_trimmed` : il ne contient aucune URL
+    de flux et ne doit jamais servir directement au téléchargement.
+    """
+    trimmed = {key: info.get(key) for key in INFO_FIELDS}
+    trimmed['formats'] = [
+        {key: fmt.get(key) for key in FORMAT_FIELDS}
+        for fmt in info.get('formats') or []
+    ]
+    trimmed['_mactube_trimmed'] = True
+    return trimmed
+
+
+class MacTubeMetadataCache:
+    """Cache persistant des métadonnées, indexé par ID vidéo"""
+
+    def __init__(self, path=None, ttl=7 * 24 * 3600, max_entries=2000):
+        self.path = Path(path) if path else get_cache_dir() / "metadata.sqlite3"
+        self.ttl = ttl  # secondes ; 0 désactive le cache
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS metadata ("
+                " video_id TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS metadata_lru ON metadata(accessed_at)")
+            self._conn.commit()
+
+    def get(self, video_id):
+        """Retourne les métadonnées allégées d'une vidéo, ou None (absente/expirée)"""
+        if not video_id or not self.ttl:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, fetched_at FROM metadata WHERE video_id = ?", (video_id,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            data, fetched_at = row
+            if now - fetched_at > self.ttl:
+                self._conn.execute("DELETE FROM metadata WHERE video_id = ?", (video_id,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE metadata SET accessed_at = ? WHERE video_id = ?", (now, video_id)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(data)
+
+    def put(self, video_id, info):
+        """Enregistre (version allégée de) un dict yt-dlp"""
+        if not video_id or not self.ttl:
+            return
+        trimmed = info if info.get('_mactube_trimmed') else trim_info(info)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO metadata (video_id, data, fetched_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (video_id, json.dumps(trimmed, ensure_ascii=False), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_entries"""
+        count = self._conn.execute("SELECT COUNT(*) FROM metadata").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM metadata WHERE video_id IN "
+                "(SELECT video_id FROM metadata ORDER BY accessed_at ASC LIMIT ?)",
+                (excess,)
+            )
+            self.evictions += excess
+
+    def set_ttl(self, ttl):
+        """Change la durée de validité des entrées (0 = cache désactivé)"""
+        self.ttl = ttl
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            self._conn.execute("DELETE FROM metadata")
+            self._conn.commit()
+
+    def stats(self):
+        """Compteurs de hits/misses/évictions et taille du cache"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM metadata").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
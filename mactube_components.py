@@ -4,6 +4,7 @@
 Composants UI pour MacTube - YouTube Downloader pour macOS
 """
 
+import tkinter as tk
 import customtkinter as ctk
 from mactube_theme import MacTubeTheme
 
@@ -191,6 +192,11 @@ class MacTubeThumbnail:
         self.thumbnail_label.configure(image=image, text="")
         self.thumbnail_label.image = image  # Garder une référence
     
+    def set_placeholder(self, text="🎬\nMiniature"):
+        """Retire l'image et affiche un texte d'attente"""
+        self.thumbnail_label.configure(text=text, image="")
+        self.thumbnail_label.image = None
+    
     def set_error(self, error_text):
         """Affiche un message d'erreur"""
         self.thumbnail_label.configure(
@@ -205,3 +211,154 @@ class MacTubeThumbnail:
     def grid(self, **kwargs):
         """Grid la miniature"""
         self.frame.grid(**kwargs)
+
+class MacTubeVirtualList:
+    """Liste virtualisée : seules les lignes visibles existent
+    
+    Un petit pool de lignes est créé une fois puis réaffecté à la tranche
+    visible de `items` au défilement. `create_row(parent)` retourne un dict
+    contenant au moins 'frame' ; `bind_row(row, item)` affiche un élément
+    dans une ligne existante.
+    """
+    
+    def __init__(self, parent, create_row, bind_row, row_height=44, empty_text=""):
+        self.parent = parent
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.row_height = row_height  # estimation, remplacée par la hauteur mesurée de la première ligne
+        self._row_measured = False
+        self.items = []
+        self.first = 0
+        self.visible_rows = 10
+        self.pool = []
+        self.create_list(empty_text)
+    
+    def create_list(self, empty_text):
+        """Crée le conteneur des lignes et la barre de défilement"""
+        self.frame = ctk.CTkFrame(self.parent, fg_color="transparent")
+        
+        self.scrollbar = ctk.CTkScrollbar(self.frame, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        
+        self.rows_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        self.rows_frame.pack(side="left", fill="both", expand=True)
+        self.rows_frame.grid_columnconfigure(0, weight=1)
+        
+        # Message affiché quand la liste est vide
+        self.empty_label = MacTubeTheme.create_label_body(self.rows_frame, empty_text)
+        
+        # Le nombre de lignes du pool suit la hauteur disponible
+        self.rows_frame.bind("<Configure>", self._on_resize)
+        
+        # Molette liée aux widgets de la liste (jamais globalement : les autres
+        # zones défilantes gardent leur propre gestion de la molette)
+        self._bind_wheel(self.frame)
+    
+    def set_items(self, items):
+        """Remplace les éléments affichés (la position de défilement est conservée)"""
+        self.items = items
+        self._render()
+    
+    def refresh(self):
+        """Réaffiche la tranche visible"""
+        self._render()
+    
+    def scroll_to(self, first):
+        """Fait défiler pour que l'élément `first` soit en haut"""
+        self.first = first
+        self._render()
+    
+    def _render(self):
+        max_first = max(0, len(self.items) - self.visible_rows)
+        self.first = min(max(0, self.first), max_first)
+        
+        # Pool dimensionné à la hauteur visible, jamais au nombre d'éléments
+        while len(self.pool) < min(self.visible_rows, len(self.items)):
+            row = self.create_row(self.rows_frame)
+            row['frame'].grid(row=len(self.pool), column=0, sticky="ew")
+            self._bind_wheel(row['frame'])
+            row['shown'] = True
+            self.pool.append(row)
+            if not self._row_measured:
+                self._measure_row(row)
+        
+        for index, row in enumerate(self.pool):
+            item_index = self.first + index
+            if index < self.visible_rows and item_index < len(self.items):
+                self.bind_row(row, self.items[item_index])
+                if not row['shown']:
+                    row['frame'].grid()
+                    row['shown'] = True
+            elif row['shown']:
+                row['frame'].grid_remove()
+                row['shown'] = False
+        
+        if self.items:
+            self.empty_label.grid_remove()
+        else:
+            self.empty_label.grid(row=0, column=0, pady=20)
+        
+        if self.items:
+            total = len(self.items)
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self.visible_rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+    
+    def _measure_row(self, row):
+        """Remplace la hauteur estimée par celle, réelle, d'une ligne (contenu et marges)"""
+        row['frame'].update_idletasks()
+        height = row['frame'].winfo_reqheight()
+        if height <= 1:
+            return
+        self._row_measured = True
+        if height != self.row_height:
+            self.row_height = height
+            available = self.rows_frame.winfo_height()
+            if available > 1:
+                self.visible_rows = max(1, available // self.row_height)
+    
+    def _on_resize(self, event):
+        visible_rows = max(1, event.height // self.row_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self._render()
+    
+    def _on_scrollbar(self, *args):
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * len(self.items))
+        elif args[0] == "scroll":
+            step = self.visible_rows if args[2] == "pages" else 1
+            self.first += int(args[1]) * step
+        self._render()
+    
+    def _on_wheel(self, event):
+        if getattr(event, 'num', None) == 4:
+            delta = -1
+        elif getattr(event, 'num', None) == 5:
+            delta = 1
+        elif abs(event.delta) >= 120:
+            delta = -event.delta // 120  # Windows : multiples de 120
+        else:
+            delta = -event.delta  # macOS : petits incréments
+        if delta:
+            self.first += delta
+            self._render()
+        return "break"
+    
+    def _bind_wheel(self, widget):
+        """Lie la molette à un widget et à tous ses descendants Tk"""
+        # tk.Misc.bind : liaison directe, sans la redirection des widgets CustomTkinter
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            tk.Misc.bind(widget, sequence, self._on_wheel, add="+")
+        for child in widget.winfo_children():
+            self._bind_wheel(child)
+    
+    def pack(self, **kwargs):
+        """Pack la liste"""
+        self.frame.pack(**kwargs)
+    
+    def grid(self, **kwargs):
+        """Grid la liste"""
+        self.frame.grid(**kwargs)
@@ -5,8 +5,14 @@ Gère la détection et l'utilisation de FFmpeg dans le bundle
 """
 
 import os
+import re
 import sys
+import json
+import time
+import shutil
+import threading
 import subprocess
+from collections import OrderedDict, deque
 from pathlib import Path
 
 
@@ -61,6 +67,304 @@ def get_ffmpeg_path(verbose: bool = False):
     return None
 
 
+def get_ffprobe_path(ffmpeg_path=None):
+    """
+    Retourne le chemin vers ffprobe s'il est disponible
+    Cherche à côté de FFmpeg puis dans le système (le bundle n'embarque que FFmpeg)
+    """
+    if ffmpeg_path:
+        folder = Path(ffmpeg_path).parent
+        for name in ("ffprobe_binary", "ffprobe", "ffprobe.exe"):
+            candidate = folder / name
+            if candidate.exists() and os.access(candidate, os.X_OK):
+                return str(candidate)
+    return shutil.which("ffprobe")
+
+
+# Analyse de la sortie de "ffmpeg -i" (repli sans ffprobe)
+_DURATION_RE = re.compile(r'Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)')
+_BITRATE_RE = re.compile(r'bitrate: (\d+) kb/s')
+_INPUT_RE = re.compile(r'Input #0, ([^,]+(?:,[^,\s]+)*), from')
+_STREAM_RE = re.compile(r'Stream #0:(\d+)[^:]*: (Video|Audio|Subtitle|Data|Attachment): (\w+)(.*)')
+_SIZE_RE = re.compile(r', (\d{2,5})x(\d{2,5})')
+_RATE_RE = re.compile(r'(\d+) Hz')
+_CHANNELS_RE = re.compile(r'Hz, ([\w.()]+)')
+_FPS_RE = re.compile(r'([\d.]+) fps')
+_STREAM_BITRATE_RE = re.compile(r'(\d+) kb/s')
+
+# Cache des sondages : chemin → (mtime, taille, résultat)
+_PROBE_CACHE_SIZE = 256
+_probe_cache = OrderedDict()
+_probe_lock = threading.Lock()
+
+
+def _probe_with_ffprobe(ffprobe_path, path):
+    cmd = [
+        ffprobe_path, '-v', 'error',
+        '-print_format', 'json',
+        '-show_format', '-show_streams',
+        path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    if result.returncode != 0:
+        return None
+    data = json.loads(result.stdout or '{}')
+    fmt = data.get('format', {})
+    streams = []
+    for stream in data.get('streams', []):
+        frame_rate = stream.get('avg_frame_rate') or ''
+        fps = None
+        if '/' in frame_rate:
+            num, den = frame_rate.split('/', 1)
+            fps = float(num) / float(den) if float(den or 0) else None
+        streams.append({
+            'index': stream.get('index'),
+            'type': stream.get('codec_type'),
+            'codec': stream.get('codec_name'),
+            'width': stream.get('width'),
+            'height': stream.get('height'),
+            'fps': fps,
+            'sample_rate': int(stream['sample_rate']) if stream.get('sample_rate') else None,
+            'channels': stream.get('channels'),
+            'bit_rate': int(stream['bit_rate']) if stream.get('bit_rate') else None,
+        })
+    return {
+        'duration': float(fmt['duration']) if fmt.get('duration') else None,
+        'format_name': fmt.get('format_name'),
+        'bit_rate': int(fmt['bit_rate']) if fmt.get('bit_rate') else None,
+        'streams': streams,
+    }
+
+
+def _channel_count(layout):
+    """Nombre de canaux d'une disposition FFmpeg (mono, stereo, 5.1(side)...)"""
+    if layout == 'mono':
+        return 1
+    if layout == 'stereo':
+        return 2
+    match = re.match(r'(\d+)\.(\d+)', layout)
+    if match:
+        return int(match.group(1)) + int(match.group(2))
+    return None
+
+
+def parse_ffmpeg_info(output):
+    """Analyse l'en-tête affiché par "ffmpeg -i" (durée, conteneur, flux)"""
+    duration = None
+    match = _DURATION_RE.search(output)
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    bitrate = _BITRATE_RE.search(output)
+    container = _INPUT_RE.search(output)
+
+    streams = []
+    for line in output.splitlines():
+        match = _STREAM_RE.search(line)
+        if not match:
+            continue
+        index, kind, codec, details = match.groups()
+        stream = {
+            'index': int(index),
+            'type': kind.lower(),
+            'codec': codec,
+            'width': None,
+            'height': None,
+            'fps': None,
+            'sample_rate': None,
+            'channels': None,
+            'bit_rate': None,
+        }
+        if kind == 'Video':
+            size = _SIZE_RE.search(details)
+            if size:
+                stream['width'], stream['height'] = int(size.group(1)), int(size.group(2))
+            fps = _FPS_RE.search(details)
+            if fps:
+                stream['fps'] = float(fps.group(1))
+        elif kind == 'Audio':
+            rate = _RATE_RE.search(details)
+            if rate:
+                stream['sample_rate'] = int(rate.group(1))
+            channels = _CHANNELS_RE.search(details)
+            if channels:
+                stream['channels'] = _channel_count(channels.group(1))
+            stream_bitrate = _STREAM_BITRATE_RE.search(details)
+            if stream_bitrate:
+                stream['bit_rate'] = int(stream_bitrate.group(1)) * 1000
+        streams.append(stream)
+
+    return {
+        'duration': duration,
+        'format_name': container.group(1) if container else None,
+        'bit_rate': int(bitrate.group(1)) * 1000 if bitrate else None,
+        'streams': streams,
+    }
+
+
+def _probe_with_ffmpeg(ffmpeg_path, path):
+    # Sans fichier de sortie, FFmpeg affiche l'en-tête et s'arrête sans décoder
+    cmd = [ffmpeg_path, '-hide_banner', '-i', path]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    if 'Input #0' not in result.stderr:
+        return None
+    return parse_ffmpeg_info(result.stderr)
+
+
+def probe_media(path, ffmpeg_path=None):
+    """
+    Lit les métadonnées du conteneur (durée, flux, codecs) sans décoder le fichier
+    Utilise ffprobe (JSON) s'il est présent, sinon l'en-tête de "ffmpeg -i".
+    Le résultat est mis en cache par chemin, date de modification et taille.
+    Retourne None si le fichier ne peut pas être analysé.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = os.path.abspath(path)
+    with _probe_lock:
+        cached = _probe_cache.get(key)
+        if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+            _probe_cache.move_to_end(key)
+            return cached[2]
+
+    ffmpeg_path = ffmpeg_path or get_ffmpeg_path()
+    info = None
+    try:
+        ffprobe_path = get_ffprobe_path(ffmpeg_path)
+        if ffprobe_path:
+            info = _probe_with_ffprobe(ffprobe_path, path)
+        if info is None and ffmpeg_path:
+            info = _probe_with_ffmpeg(ffmpeg_path, path)
+    except (OSError, ValueError, subprocess.SubprocessError) as e:
+        print(f"⚠️ Analyse du fichier impossible ({path}): {e}")
+        return None
+    if info is None:
+        return None
+
+    # Raccourcis pour les étapes suivantes (choix de codec, copie de flux)
+    info['video_codec'] = next((s['codec'] for s in info['streams'] if s['type'] == 'video'), None)
+    info['audio_codec'] = next((s['codec'] for s in info['streams'] if s['type'] == 'audio'), None)
+    info['audio_bit_rate'] = next((s['bit_rate'] for s in info['streams'] if s['type'] == 'audio'), None)
+    if info['audio_bit_rate'] is None and info['audio_codec'] and not info['video_codec']:
+        # Fichier audio seul : le débit du conteneur est celui de la piste
+        info['audio_bit_rate'] = info.get('bit_rate')
+
+    with _probe_lock:
+        _probe_cache[key] = (stat.st_mtime, stat.st_size, info)
+        while len(_probe_cache) > _PROBE_CACHE_SIZE:
+            _probe_cache.popitem(last=False)
+    return info
+
+
+class MacTubeProgressParser:
+    """
+    Analyseur incrémental du flux "-progress pipe:1" de FFmpeg
+    Chaque bloc clé=valeur se termine par "progress=continue" (ou "end") ;
+    un instantané est alors transmis à `on_update`, au plus toutes les
+    `min_interval` secondes (le dernier bloc est toujours transmis).
+    """
+
+    def __init__(self, total_duration, on_update, min_interval=0.25):
+        self.total_duration = total_duration
+        self.on_update = on_update
+        self.min_interval = min_interval
+        self.out_time = 0.0
+        self.speed = None
+        self.fps = None
+        self.total_size = None
+        self.finished = False
+        self._last_emit = 0.0
+
+    def feed(self, line):
+        """Traite une ligne du flux de progression"""
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            return
+        value = value.strip()
+        if key == 'out_time_us' or key == 'out_time_ms':
+            # out_time_ms est lui aussi exprimé en microsecondes
+            if value.isdigit():
+                self.out_time = int(value) / 1_000_000
+        elif key == 'speed':
+            try:
+                self.speed = float(value.rstrip('x'))
+            except ValueError:
+                self.speed = None
+        elif key == 'fps':
+            try:
+                self.fps = float(value)
+            except ValueError:
+                pass
+        elif key == 'total_size':
+            if value.isdigit():
+                self.total_size = int(value)
+        elif key == 'progress':
+            self.finished = value == 'end'
+            now = time.monotonic()
+            if self.finished or now - self._last_emit >= self.min_interval:
+                self._last_emit = now
+                self.on_update(self.snapshot())
+
+    def snapshot(self):
+        """État courant : temps encodé, pourcentage, vitesse et temps restant"""
+        percent = None
+        eta = None
+        if self.total_duration:
+            percent = 100.0 if self.finished else min(self.out_time / self.total_duration * 100, 100)
+            if self.finished:
+                eta = 0.0
+            elif self.speed:
+                eta = max(self.total_duration - self.out_time, 0) / self.speed
+        return {
+            'out_time': self.out_time,
+            'percent': percent,
+            'speed': self.speed,
+            'fps': self.fps,
+            'total_size': self.total_size,
+            'eta': eta,
+            'finished': self.finished,
+        }
+
+
+def run_ffmpeg(cmd, parser=None, token=None):
+    """
+    Lance FFmpeg avec le flux de progression structuré et attend la fin
+    cmd commence par le chemin de FFmpeg ; "-progress pipe:1 -nostats" est
+    inséré juste après et chaque ligne est transmise à `parser.feed()`.
+    stderr est vidé en continu (seule la fin est gardée pour le message
+    d'erreur) afin que FFmpeg ne bloque jamais sur un tube plein.
+    token (MacTubeTaskToken) : FFmpeg est terminé dès qu'une annulation ou
+    une pause est demandée, puis TaskCancelled/TaskPaused est levée.
+    """
+    cmd = [cmd[0], '-hide_banner', '-nostats', '-progress', 'pipe:1'] + list(cmd[1:])
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1)
+    if token is not None:
+        token.attach(process)
+
+    stderr_tail = deque(maxlen=40)
+    stderr_thread = threading.Thread(target=lambda: stderr_tail.extend(process.stderr), daemon=True)
+    stderr_thread.start()
+
+    try:
+        for line in process.stdout:
+            if parser is not None:
+                parser.feed(line)
+            if token is not None and token.requested:
+                process.terminate()
+                break
+        return_code = process.wait()
+    finally:
+        if token is not None:
+            token.detach(process)
+    stderr_thread.join(timeout=5)
+    if token is not None:
+        token.check()
+    if return_code != 0:
+        raise RuntimeError(f"FFmpeg error: {''.join(stderr_tail)}")
+
+
 if __name__ == "__main__":
     print("🔍 Test de FFmpeg pour MacTube")
     print("=" * 40)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MacTube Fragments - Téléchargement concurrent des fragments (DASH/HLS)
+Règle automatiquement le nombre de fragments téléchargés en parallèle
+d'après le débit mesuré, et fournit un banc d'essai local
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+
+# Taille des requêtes HTTP par plage pour les formats non fragmentés (évite le bridage)
+HTTP_CHUNK_SIZE = 10 * 1024 * 1024
+
+# Bornes et valeur de départ du nombre de fragments simultanés
+FRAGMENT_MIN = 1
+FRAGMENT_MAX = 16
+FRAGMENT_INITIAL = 4
+
+# Écart relatif de débit en dessous duquel deux réglages sont jugés équivalents
+TOLERANCE = 0.05
+
+# Durée minimale (s) d'un fichier pour que sa mesure de débit soit retenue
+MIN_SAMPLE_SECONDS = 1.0
+
+# Lissage des débits mesurés pour un même réglage
+SMOOTHING = 0.5
+
+# Nombre de mesures sur un optimum avant de réexplorer les réglages voisins
+PROBE_EVERY = 10
+
+
+class MacTubeFragmentTuner:
+    """Réglage par montée de gradient du nombre de fragments simultanés
+
+    Chaque téléchargement fragmenté terminé rapporte son débit pour le
+    réglage utilisé (`record`). Tant que le débit progresse, le réglage
+    continue dans la même direction ; s'il se dégrade, il repart en sens
+    inverse. Sur un optimum local, il reste en place et réexplore ses
+    voisins toutes les PROBE_EVERY mesures (le réseau change).
+    `fixed` impose une valeur (réglage manuel).
+    """
+
+    def __init__(self, initial=FRAGMENT_INITIAL, minimum=FRAGMENT_MIN, maximum=FRAGMENT_MAX):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.fixed = None
+        self._level = max(minimum, min(maximum, initial))
+        self._direction = 1
+        self._scores = {}  # réglage -> débit lissé (octets/s)
+        self._settled = 0
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    @property
+    def level(self):
+        """Nombre de fragments simultanés à utiliser pour le prochain téléchargement"""
+        return self.fixed or self._level
+
+    def set_fixed(self, value):
+        """Impose un nombre de fragments (None = réglage automatique)"""
+        self.fixed = value
+
+    def record(self, level, downloaded_bytes, elapsed):
+        """Rapporte le débit d'un fichier fragmenté téléchargé avec `level` fragments"""
+        if elapsed < MIN_SAMPLE_SECONDS or not downloaded_bytes:
+            return self.level
+        throughput = downloaded_bytes / elapsed
+        with self._lock:
+            self.samples += 1
+            previous = self._scores.get(level)
+            self._scores[level] = throughput if previous is None else (
+                SMOOTHING * throughput + (1 - SMOOTHING) * previous
+            )
+            if self.fixed or level != self._level:
+                # Mesure d'un réglage imposé ou déjà abandonné : on la garde sans bouger
+                return self.level
+
+            current = self._scores[level]
+            down, up = self._neighbour(level - 1), self._neighbour(level + 1)
+            if down is not None and up is not None and down <= current and up <= current:
+                # Optimum local : on y reste, en oubliant de temps en temps les voisins
+                self._settled += 1
+                if self._settled >= PROBE_EVERY:
+                    self._settled = 0
+                    self._scores.pop(level - 1, None)
+                    self._scores.pop(level + 1, None)
+                return self._level
+            self._settled = 0
+
+            behind = self._neighbour(level - self._direction)
+            if behind is not None and current < behind * (1 - TOLERANCE):
+                # Le pas précédent était meilleur : demi-tour
+                self._direction = -self._direction
+            next_level = level + self._direction
+            if not self.minimum <= next_level <= self.maximum:
+                self._direction = -self._direction
+                next_level = level + self._direction
+            self._level = max(self.minimum, min(self.maximum, next_level))
+            return self._level
+
+    def _neighbour(self, level):
+        # Hors bornes : considéré comme moins bon que tout réglage mesuré
+        if not self.minimum <= level <= self.maximum:
+            return float('-inf')
+        return self._scores.get(level)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'level': self.level,
+                'auto': self.fixed is None,
+                'samples': self.samples,
+                'scores': dict(sorted(self._scores.items())),
+            }
+
+
+def _serve_hls(directory, latency, segment_count, segment_size):
+    """Serveur HTTP local servant une playlist HLS, avec une latence simulée par requête"""
+    from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+    with open(os.path.join(directory, "media.m3u8"), 'w') as f:
+        f.write("#EXTM3U\n#EXT-X-VERSION:3\n#EXT-X-TARGETDURATION:2\n#EXT-X-MEDIA-SEQUENCE:0\n")
+        for index in range(segment_count):
+            f.write(f"#EXTINF:2.0,\nsegment_{index:04d}.ts\n")
+        f.write("#EXT-X-ENDLIST\n")
+    payload = os.urandom(segment_size)
+    for index in range(segment_count):
+        with open(os.path.join(directory, f"segment_{index:04d}.ts"), 'wb') as f:
+            f.write(payload)
+
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=directory, **kwargs)
+
+        def do_GET(self):
+            time.sleep(latency)
+            super().do_GET()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _bench_download(url, output_dir, workers):
+    import yt_dlp
+
+    ydl_opts = {
+        'quiet': True,
+        'noprogress': True,
+        'no_warnings': True,
+        'outtmpl': os.path.join(output_dir, f"bench_{workers}.%(ext)s"),
+        'concurrent_fragment_downloads': workers,
+        'fixup': 'never',
+        'hls_use_mpegts': True,
+    }
+    started = time.monotonic()
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        ydl.download([url])
+    return time.monotonic() - started
+
+
+if __name__ == "__main__":
+    # Banc d'essai : fragments simultanés contre latence simulée, sur un serveur HLS local
+    print("⏱️ Banc d'essai des fragments simultanés")
+    print("=" * 40)
+
+    segment_count = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    segment_size = 256 * 1024
+    latencies = (0.0, 0.05, 0.15)
+    concurrency = (1, 2, 4, 8, 16)
+
+    bench_dir = tempfile.mkdtemp(prefix="mactube_fragments_")
+    try:
+        media_dir = os.path.join(bench_dir, "media")
+        os.makedirs(media_dir)
+        total_mb = segment_count * segment_size / (1024 * 1024)
+        print(f"🎬 {segment_count} fragments de {segment_size // 1024} Ko ({total_mb:.0f} Mo)")
+
+        for latency in latencies:
+            server = _serve_hls(media_dir, latency, segment_count, segment_size)
+            url = f"http://127.0.0.1:{server.server_address[1]}/media.m3u8"
+            results = {}
+            for workers in concurrency:
+                out_dir = tempfile.mkdtemp(dir=bench_dir)
+                results[workers] = _bench_download(url, out_dir, workers)
+                shutil.rmtree(out_dir, ignore_errors=True)
+            server.shutdown()
+
+            baseline = results[1]
+            line = ", ".join(
+                f"{workers}: {total_mb / elapsed:.1f} Mo/s (x{baseline / elapsed:.1f})"
+                for workers, elapsed in results.items()
+            )
+            print(f"🌐 Latence {latency * 1000:.0f} ms → {line}")
+
+        # Réglage automatique : le tuner converge-t-il vers le meilleur réglage ?
+        server = _serve_hls(media_dir, latencies[-1], segment_count, segment_size)
+        url = f"http://127.0.0.1:{server.server_address[1]}/media.m3u8"
+        tuner = MacTubeFragmentTuner(initial=1)
+        for _ in range(8):
+            level = tuner.level
+            out_dir = tempfile.mkdtemp(dir=bench_dir)
+            elapsed = _bench_download(url, out_dir, level)
+            shutil.rmtree(out_dir, ignore_errors=True)
+            tuner.record(level, segment_count * segment_size, elapsed)
+            print(f"🧩 Auto : {level} fragments → {total_mb / elapsed:.1f} Mo/s")
+        server.shutdown()
+        print(f"✅ Réglage retenu : {tuner.level} fragments")
+    finally:
+        shutil.rmtree(bench_dir, ignore_errors=True)
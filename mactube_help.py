@@ -294,7 +294,7 @@ class MacTubeHelp:
         
         features = [
             "• Détection automatique des qualités disponibles",
-            "• Affichage de la miniature YouTube",
+            "• Affichage de la miniature YouTube (chargée en arrière-plan, mise en cache sur disque)",
             "• Informations détaillées (titre, durée, chaîne)",
             "• Nom de fichier personnalisable",
             "• Intégration avec la file d'attente"
@@ -436,7 +436,12 @@ class MacTubeHelp:
         formats = [
             "• Formats vidéo : MP4, MKV, WebM, AVI, MOV",
             "• Formats audio : MP3, M4A, AAC, FLAC, WAV, OGG",
-            "• Qualités audio : 128, 192, 256, 320 kbps ou qualité maximale"
+            "• Qualités audio : 128, 192, 256, 320 kbps ou qualité maximale",
+            "• Remux sans ré-encodage quand les flux sont compatibles avec le format cible",
+            "• Profils d'encodage vidéo : Rapide, Équilibré, Archive",
+            "• Mode segmenté : les vidéos longues sont encodées par morceaux sur tous les cœurs",
+            "• Conversion par lot : un dossier, un motif (ex: ~/Musique/**/*.flac) ou plusieurs fichiers ; les fichiers déjà à jour ou déjà au format cible sont ignorés (comptés à part), et vider la file interrompt le lot",
+            "• Formats supplémentaires : plusieurs formats audio écrits en un seul décodage, suivis dans une seule tâche"
         ]
         
         for format_info in formats:
@@ -461,6 +466,7 @@ class MacTubeHelp:
         
         features = [
             "• Téléchargements simultanés (max 2 par défaut)",
+            "• Voies séparées : réseau pour les téléchargements, CPU pour les transcodages",
             "• Suivi en temps réel de la progression",
             "• Gestion des priorités et ordre d'exécution",
             "• Bouton 'Reprendre' pour relancer la file",
@@ -571,6 +577,13 @@ class MacTubeHelp:
         
         queue_options = [
             "• Téléchargements simultanés : 1 à 5 (slider)",
+            "• Transcodages simultanés : 1 au nombre de cœurs (slider, voie CPU séparée)",
+            "• Cache des métadonnées : analyse instantanée des vidéos déjà vues (Désactivé, 1, 7 ou 30 jours)",
+            "• Débit maximal : limite globale partagée équitablement entre les téléchargements, avec plage horaire sans limite (ex: la nuit)",
+            "• Fragments simultanés : les vidéos DASH/HLS sont téléchargées en plusieurs morceaux parallèles, nombre réglé automatiquement d'après le débit mesuré (ou imposé)",
+            "• Doublons ignorés : une vidéo déjà en file ou déjà téléchargée (même qualité et format) n'est pas ajoutée",
+            "• Boutons par tâche : ⏸️ pause (libère l'emplacement, reprise depuis le fichier partiel), ▶️ reprise, ❌ annulation immédiate",
+            "• Reprise automatique : la file est conservée à la fermeture (ou après un arrêt brutal) et les téléchargements interrompus reprennent là où ils s'étaient arrêtés",
             "• Bouton 'Vider la file d'attente' avec nettoyage automatique des fichiers temporaires"
         ]
         
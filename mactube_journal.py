@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MacTube Journal - Journal persistant de la file d'attente
+Enregistre ajouts, changements d'état et progression des tâches dans un
+fichier JSONL en ajout seul, pour reconstruire la file après un arrêt brutal
+"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+
+# Intervalle minimal (secondes) entre deux enregistrements de progression d'une tâche
+OFFSET_INTERVAL = 5.0
+
+# Taille minimale du journal (enregistrements) avant compaction automatique
+COMPACT_EVERY = 1000
+
+# Compaction quand le journal dépasse ce multiple du nombre de tâches vivantes
+COMPACT_RATIO = 4
+
+
+class MacTubeQueueJournal:
+    """Journal JSONL des tâches de la file (une ligne par événement)
+
+    Événements : 'enqueue' (tâche sérialisée), 'state' (pending/active),
+    'offset' (octets téléchargés et fichier .part), 'done' (terminée, en
+    erreur ou retirée). `load()` rejoue le journal et retourne les tâches
+    inachevées ; la compaction réécrit le fichier avec ces seules tâches.
+    Automatique quand les enregistrements morts dominent (COMPACT_RATIO),
+    elle se fait sur un thread dédié à partir d'un instantané : les ajouts
+    concurrents vont dans l'ancien fichier et sont recopiés avant l'échange.
+    """
+
+    def __init__(self, path=None, compact_every=COMPACT_EVERY):
+        self.path = Path(path) if path else Path.home() / ".mactube_queue.jsonl"
+        self.compact_every = compact_every
+        self._tasks = {}  # id -> {'task': dict, 'state': str, 'offset': dict|None}
+        self._last_offset = {}  # id -> instant du dernier enregistrement de progression
+        self._records = 0  # lignes du fichier courant
+        self._tail = None  # enregistrements ajoutés pendant une compaction en arrière-plan
+        self._compactor = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Rejoue le journal et retourne les tâches inachevées, dans l'ordre d'ajout"""
+        tasks = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Dernière ligne tronquée par un arrêt brutal
+                        continue
+                    self._apply(tasks, record)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"⚠️ Journal de la file illisible: {e}")
+
+        with self._lock:
+            self._tasks = tasks
+            self._compact_locked()
+        return list(tasks.values())
+
+    @staticmethod
+    def _apply(tasks, record):
+        op = record.get('op')
+        task_id = record.get('id')
+        if op == 'enqueue':
+            tasks[task_id] = {'task': record['task'], 'state': 'pending', 'offset': None}
+        elif task_id not in tasks:
+            return
+        elif op == 'state':
+            tasks[task_id]['state'] = record['state']
+        elif op == 'offset':
+            tasks[task_id]['offset'] = {key: record.get(key) for key in ('bytes', 'total', 'file')}
+        elif op == 'done':
+            del tasks[task_id]
+
+    # -------- Écriture --------
+    def enqueue(self, task):
+        """Enregistre l'ajout d'une tâche"""
+        self.enqueue_many([task])
+
+    def enqueue_many(self, tasks):
+        """Enregistre l'ajout d'un lot de tâches (une seule écriture)"""
+        self._append([{'op': 'enqueue', 'id': task.id, 'task': task.to_dict()} for task in tasks])
+
+    def state(self, task, state):
+        """Enregistre un changement d'état ('pending' ou 'active')"""
+        self._append([{'op': 'state', 'id': task.id, 'state': state}])
+
+    def offset(self, task, downloaded, total, filename):
+        """Enregistre la progression d'un téléchargement (au plus une fois par OFFSET_INTERVAL)"""
+        now = time.monotonic()
+        if now - self._last_offset.get(task.id, 0.0) < OFFSET_INTERVAL:
+            return
+        self._last_offset[task.id] = now
+        self._append([{'op': 'offset', 'id': task.id, 'bytes': downloaded, 'total': total, 'file': filename}])
+
+    def finish(self, task):
+        """Retire une tâche du journal (terminée, en erreur ou retirée de la file)"""
+        self.finish_many([task])
+
+    def finish_many(self, tasks):
+        for task in tasks:
+            self._last_offset.pop(task.id, None)
+        self._append([{'op': 'done', 'id': task.id} for task in tasks])
+
+    def _append(self, records):
+        if not records:
+            return
+        with self._lock:
+            if self._file is None:
+                return
+            for record in records:
+                self._apply(self._tasks, record)
+            try:
+                self._file.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+                self._file.flush()
+            except OSError as e:
+                print(f"⚠️ Écriture du journal impossible: {e}")
+                return
+            self._records += len(records)
+            if self._tail is not None:
+                self._tail.extend(records)
+            elif self._records >= max(self.compact_every, COMPACT_RATIO * len(self._tasks)):
+                self._start_compaction_locked()
+
+    # -------- Compaction --------
+    def compact(self):
+        """Réécrit le journal avec les seules tâches inachevées (bloquant)"""
+        self._wait_compaction()
+        with self._lock:
+            self._compact_locked()
+
+    def _wait_compaction(self):
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    @staticmethod
+    def _write_entries(f, entries):
+        """Écrit l'état compacté des tâches ; retourne le nombre de lignes"""
+        lines = 0
+        for task_id, entry in entries:
+            f.write(json.dumps({'op': 'enqueue', 'id': task_id, 'task': entry['task']}, ensure_ascii=False) + '\n')
+            lines += 1
+            if entry['state'] != 'pending':
+                f.write(json.dumps({'op': 'state', 'id': task_id, 'state': entry['state']}) + '\n')
+                lines += 1
+            if entry['offset']:
+                f.write(json.dumps(dict(entry['offset'], op='offset', id=task_id), ensure_ascii=False) + '\n')
+                lines += 1
+        return lines
+
+    def _compact_locked(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        tmp_path = self.path.with_suffix('.jsonl.tmp')
+        lines = None
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                lines = self._write_entries(f, self._tasks.items())
+                f.flush()
+                os.fsync(f.fileno())
+            # Remplacement atomique : l'ancien journal reste valide jusqu'ici
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Compaction du journal impossible: {e}")
+            lines = None
+        self._open_locked(lines)
+
+    def _open_locked(self, lines):
+        # lines = None : fichier non réécrit, sa taille réelle est inconnue
+        self._records = lines if lines is not None else self._records
+        try:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        except OSError as e:
+            print(f"⚠️ Journal de la file désactivé: {e}")
+
+    def _start_compaction_locked(self):
+        # Instantané des entrées (les dicts de tâche et de progression sont remplacés, jamais modifiés)
+        snapshot = [(task_id, dict(entry)) for task_id, entry in self._tasks.items()]
+        self._tail = []
+        self._compactor = threading.Thread(
+            target=self._compact_in_background, args=(snapshot,), name="mactube-journal", daemon=True
+        )
+        self._compactor.start()
+
+    def _compact_in_background(self, snapshot):
+        """Réécrit l'instantané hors verrou, puis recopie les ajouts récents et échange les fichiers"""
+        tmp_path = self.path.with_suffix('.jsonl.tmp')
+        replaced = False
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                lines = self._write_entries(f, snapshot)
+                f.flush()
+                os.fsync(f.fileno())
+                with self._lock:
+                    tail, self._tail = self._tail, None
+                    if self._file is None:
+                        # Journal fermé entre-temps : l'ancien fichier fait foi
+                        return
+                    f.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in tail))
+                    f.flush()
+                    os.fsync(f.fileno())
+                    os.replace(tmp_path, self.path)
+                    replaced = True
+                    self._file.close()
+                    self._file = None
+                    self._open_locked(lines + len(tail))
+        except OSError as e:
+            print(f"⚠️ Compaction du journal impossible: {e}")
+            with self._lock:
+                self._tail = None
+        finally:
+            if not replaced:
+                # Instantané abandonné : ne pas laisser le fichier temporaire sur le disque
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def __len__(self):
+        with self._lock:
+            return len(self._tasks)
+
+    def close(self):
+        """Ferme le journal (les tâches inachevées seront reprises au prochain lancement)"""
+        self._wait_compaction()
+        with self._lock:
+            if self._file is not None:
+                self._compact_locked()
+                self._file.close()
+                self._file = None
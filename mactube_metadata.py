@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MacTube Metadata - Résolution des métadonnées YouTube en arrière-plan
+Extrait les informations des vidéos hors du thread Tk et les partage
+avec l'étape de téléchargement (une seule extraction par URL)
+"""
+
+import re
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+import yt_dlp
+
+from mactube_queue import current_worker
+
+# Motifs d'ID vidéo YouTube (compilés une seule fois)
+VIDEO_ID_PATTERNS = [
+    re.compile(r'(?:youtube\.com/watch\?(?:.*&)?v=|youtu\.be/|youtube\.com/embed/|youtube\.com/v/|youtube\.com/shorts/)([a-zA-Z0-9_-]{11})'),
+    re.compile(r'youtube\.com/attribution_link\?.*v=([a-zA-Z0-9_-]{11})'),
+]
+
+
+def extract_video_id(url):
+    """Retourne l'ID YouTube (11 caractères) contenu dans l'URL, ou None"""
+    if not url:
+        return None
+    for pattern in VIDEO_ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    return None
+
+
+# Âge max d'un dict yt-dlp réutilisable pour télécharger (URLs de flux signées)
+INFO_MAX_AGE = 4 * 3600
+
+
+class MacTubeExtractionCounter:
+    """Compte les appels extract_info par vidéo (preuve d'extraction unique)"""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, url):
+        """Enregistre une extraction et retourne le total pour cette vidéo"""
+        key = extract_video_id(url) or url
+        with self._lock:
+            self._counts[key] += 1
+            return self._counts[key]
+
+    def count(self, url):
+        key = extract_video_id(url) or url
+        with self._lock:
+            return self._counts[key]
+
+    def stats(self):
+        with self._lock:
+            total = sum(self._counts.values())
+            return {
+                'urls': len(self._counts),
+                'extractions': total,
+                'max_per_url': max(self._counts.values(), default=0),
+                'repeated': [key for key, n in self._counts.items() if n > 1],
+            }
+
+
+extraction_counter = MacTubeExtractionCounter()
+
+
+def extract_info(ydl, url):
+    """extract_info(download=False) comptabilisé par extraction_counter"""
+    extraction_counter.record(url)
+    return ydl.extract_info(url, download=False)
+
+
+def is_info_fresh(info, max_age=INFO_MAX_AGE):
+    """Indique si les URLs de flux d'un dict yt-dlp sont encore utilisables"""
+    if not info or info.get('_mactube_trimmed'):
+        # Les métadonnées du cache disque n'ont pas d'URLs de flux
+        return False
+    epoch = info.get('epoch')
+    return epoch is None or (time.time() - epoch) < max_age
+
+
+def download_with_info(ydl, info):
+    """Télécharge à partir d'un dict yt-dlp déjà extrait, sans ré-extraction
+
+    Le dict est copié (sanitize_info) car process_ie_result le modifie ;
+    la sélection de format est refaite avec les options de `ydl`.
+    """
+    return ydl.process_ie_result(ydl.sanitize_info(info), download=True)
+
+
+def downloaded_filepath(info):
+    """Chemin du fichier final d'un téléchargement (après post-traitement), ou None"""
+    if not info:
+        return None
+    for download in info.get('requested_downloads') or []:
+        if download.get('filepath'):
+            return download['filepath']
+    return info.get('filepath')
+
+
+class MacTubeMetadataResolver:
+    """Résout titres et infos yt-dlp des tâches en arrière-plan
+
+    `resolve(task)` programme l'extraction sans bloquer ; `get_info(task)`
+    retourne l'info partagée, en attendant une extraction déjà en cours ou
+    en l'effectuant directement si elle n'a pas encore commencé.
+    Avec un cache de métadonnées, le titre d'une vidéo connue est résolu
+    sans réseau ; seul le téléchargement ré-extrait les URLs de flux.
+    """
+
+    def __init__(self, ffmpeg_path=None, max_workers=2, on_resolved=None, cache=None):
+        self.ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'extract_flat': False,
+        }
+        if ffmpeg_path:
+            self.ydl_opts['ffmpeg_location'] = ffmpeg_path
+        self.on_resolved = on_resolved
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mactube-metadata")
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Instances YoutubeDL des threads du résolveur (et celles en cours d'utilisation),
+        # fermées à l'arrêt ou, si occupées, dès la fin de leur extraction
+        self._instances = set()
+        self._busy = set()
+        self._closed = False
+
+    def resolve(self, task):
+        """Programme la résolution des métadonnées d'une tâche (non bloquant)"""
+        if getattr(task, 'info', None) is not None:
+            return
+        with self._lock:
+            if task.id not in self._futures:
+                self._futures[task.id] = self._executor.submit(self._resolve, task)
+
+    def get_info(self, task):
+        """Retourne l'info yt-dlp de la tâche (extraite au plus une fois)"""
+        if task.info is not None:
+            if is_info_fresh(task.info):
+                return task.info
+            # Flux expirés : une nouvelle extraction est nécessaire
+            task.info = None
+        with self._lock:
+            future = self._futures.get(task.id)
+            # Pas encore démarrée : l'extraire ici plutôt que d'attendre la file
+            if future is None or future.cancel():
+                future = None
+                self._futures.pop(task.id, None)
+        if future is None:
+            return self._resolve(task, need_info=True)
+        try:
+            future.result()
+        except CancelledError:
+            pass
+        return task.info if task.info is not None else self._resolve(task, need_info=True)
+
+    def shutdown(self):
+        """Arrête les résolutions en attente"""
+        with self._lock:
+            pending = list(self._futures.values())
+        for future in pending:
+            future.cancel()
+        self._executor.shutdown(wait=False)
+        # Instances libres fermées tout de suite ; les autres à la fin de leur extraction
+        with self._lock:
+            self._closed = True
+            idle = self._instances - self._busy
+            self._instances -= idle
+        for ydl in idle:
+            self._close_ydl(ydl)
+
+    @staticmethod
+    def _close_ydl(ydl):
+        try:
+            ydl.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def _ydl(self):
+        """Instance YoutubeDL réutilisée pour une extraction"""
+        # Sur un worker de la file : ressource du worker, fermée quand il se retire
+        worker = current_worker()
+        if worker is not None:
+            yield worker.get_resource(('metadata-ydl',), lambda: yt_dlp.YoutubeDL(self.ydl_opts))
+            return
+        # Sinon une instance par thread, suivie pour être fermée par shutdown()
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            ydl = self._local.ydl = yt_dlp.YoutubeDL(self.ydl_opts)
+        with self._lock:
+            self._instances.add(ydl)
+            self._busy.add(ydl)
+        try:
+            yield ydl
+        finally:
+            with self._lock:
+                self._busy.discard(ydl)
+                closing = self._closed
+                if closing:
+                    self._instances.discard(ydl)
+                    self._local.ydl = None
+            if closing:
+                self._close_ydl(ydl)
+
+    def _resolve(self, task, need_info=False):
+        try:
+            if task.info is None:
+                cached = None
+                if self.cache is not None and not need_info:
+                    cached = self.cache.get(task.video_id)
+                if cached is not None:
+                    # Titre connu : l'extraction complète attendra le téléchargement
+                    info = cached
+                else:
+                    with self._ydl() as ydl:
+                        info = extract_info(ydl, task.url)
+                    task.info = info
+                    if self.cache is not None:
+                        self.cache.put(task.video_id, info)
+                if not task.has_custom_title:
+                    task.video_title = info.get('title') or task.video_title
+        except Exception as e:
+            print(f"⚠️ Métadonnées indisponibles pour {task.url}: {e}")
+        finally:
+            with self._lock:
+                self._futures.pop(task.id, None)
+        if self.on_resolved:
+            self.on_resolved(task)
+        return task.info
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MacTube Progress - Agrégation de la progression des téléchargements
+Les hooks yt-dlp écrivent des compteurs bruts ; l'interface les échantillonne
+à fréquence fixe et calcule une vitesse lissée et un temps restant réel
+"""
+
+import time
+
+# Période d'échantillonnage côté interface (4 Hz)
+SAMPLE_INTERVAL_MS = 250
+
+# Lissage exponentiel de la vitesse (0..1, plus grand = plus réactif)
+SPEED_SMOOTHING = 0.3
+
+
+def format_speed(speed):
+    """Vitesse en octets/s -> texte affichable"""
+    if not speed:
+        return "-- MB/s"
+    return f"{speed / (1024 * 1024):.1f} MB/s"
+
+
+def format_eta(seconds):
+    """Temps restant en secondes -> texte affichable (m:ss ou h:mm:ss)"""
+    if seconds is None:
+        return "Calcul..."
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+class MacTubeProgressSlot:
+    """Progression d'une tâche : écrite par le hook, échantillonnée par l'interface
+
+    `write()` (thread du téléchargement) ne fait qu'une affectation d'un tuple,
+    sans verrou ni formatage. `sample()` (thread Tk) lit le dernier tuple et
+    met à jour la vitesse lissée ; son état n'est touché que par l'interface.
+    """
+
+    def __init__(self):
+        # (octets téléchargés, taille totale, statut, fichier)
+        self._raw = None
+        self._last = None  # (fichier, octets, instant) du dernier échantillon
+        self.speed = None  # octets/s, lissée
+        self.percent = 0.0
+        self.eta = None
+
+    def write(self, d):
+        """Hook yt-dlp : enregistre les compteurs bruts (appelé à chaque bloc)"""
+        self._raw = (
+            d.get('downloaded_bytes') or 0,
+            d.get('total_bytes') or d.get('total_bytes_estimate'),
+            d.get('status'),
+            d.get('filename'),
+        )
+
+    @property
+    def status(self):
+        raw = self._raw
+        return raw[2] if raw else None
+
+    def sample(self):
+        """Met à jour pourcentage, vitesse lissée et temps restant ; retourne False si rien de neuf"""
+        raw = self._raw
+        if raw is None:
+            return False
+        downloaded, total, status, filename = raw
+
+        if status == 'finished':
+            self.percent = 100.0
+            self.eta = 0
+            return True
+
+        # Vitesse mesurée entre deux échantillons : un blocage la fait décroître
+        now = time.monotonic()
+        last = self._last
+        if last is not None and last[0] == filename and downloaded >= last[1]:
+            elapsed = now - last[2]
+            if elapsed <= 0:
+                return False
+            instant = (downloaded - last[1]) / elapsed
+            self.speed = instant if self.speed is None else (
+                SPEED_SMOOTHING * instant + (1 - SPEED_SMOOTHING) * self.speed
+            )
+        # Nouveau fichier (ex: piste audio après la vidéo) : nouvelle base de mesure
+        self._last = (filename, downloaded, now)
+
+        if total:
+            self.percent = min(downloaded / total * 100, 100.0)
+            self.eta = (total - downloaded) / self.speed if self.speed else None
+        return True
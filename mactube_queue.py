@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MacTube Queue - Ordonnanceur de la file d'attente
+Distribue les tâches dans l'ordre FIFO dès qu'un emplacement se libère
+et les exécute sur un pool de workers persistants
+"""
+
+import threading
+import time
+from collections import deque, OrderedDict
+
+# Worker du thread courant (None hors du pool)
+_local = threading.local()
+
+
+def current_worker():
+    """Retourne le worker MacTube qui exécute le thread courant, ou None"""
+    return getattr(_local, 'worker', None)
+
+
+class TaskCancelled(Exception):
+    """Levée dans une tâche dont l'annulation a été demandée"""
+
+
+class TaskPaused(Exception):
+    """Levée dans une tâche dont la mise en pause a été demandée"""
+
+
+class MacTubeTaskToken:
+    """Jeton coopératif d'annulation et de pause d'une tâche
+
+    L'interface appelle `cancel()` ou `pause()` ; le code de la tâche appelle
+    `check()` à ses points de contrôle (hook de progression, lecture de la
+    sortie FFmpeg), qui lève TaskCancelled ou TaskPaused. Les processus
+    enregistrés via `attach()` sont terminés immédiatement.
+    """
+
+    def __init__(self):
+        self._request = None  # None, "cancel" ou "pause"
+        self._processes = set()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """Demande l'annulation de la tâche"""
+        self._set("cancel")
+
+    def pause(self):
+        """Demande la mise en pause de la tâche (l'annulation reste prioritaire)"""
+        if self._request != "cancel":
+            self._set("pause")
+
+    def reset(self):
+        """Efface la demande (reprise d'une tâche en pause)"""
+        self._request = None
+
+    @property
+    def requested(self):
+        return self._request is not None
+
+    @property
+    def cancelled(self):
+        return self._request == "cancel"
+
+    def check(self):
+        """Lève TaskCancelled ou TaskPaused si une demande est en attente"""
+        request = self._request
+        if request == "cancel":
+            raise TaskCancelled()
+        if request == "pause":
+            raise TaskPaused()
+
+    def attach(self, process):
+        """Enregistre un processus enfant à terminer en cas de demande"""
+        with self._lock:
+            self._processes.add(process)
+        if self.requested:
+            self._terminate(process)
+
+    def detach(self, process):
+        with self._lock:
+            self._processes.discard(process)
+
+    def _set(self, request):
+        self._request = request
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            self._terminate(process)
+
+    @staticmethod
+    def _terminate(process):
+        try:
+            process.terminate()
+        except OSError:
+            pass
+
+
+class MacTubeScheduler:
+    """File d'attente FIFO avec gestion des emplacements simultanés
+
+    Les tâches sont distribuées par `acquire_next()` dès qu'une tâche est en
+    attente et qu'un emplacement est libre, sans scrutation ni remise en fin
+    de file. Chaque tâche distribuée doit être rendue via `release()`.
+    """
+
+    def __init__(self, max_active=2):
+        self._condition = threading.Condition()
+        self._pending = deque()  # (tâche, horodatage d'entrée)
+        self._max_active = max(1, int(max_active))
+        self._active = 0
+        self._paused = False
+        self._stopped = False
+        # Instant où un emplacement s'est libéré alors que des tâches attendaient
+        self._slot_freed_at = None
+
+        # Compteurs exposés par stats()
+        self._dispatched = 0
+        self._completed = 0
+        self._last_latency = 0.0
+        self._max_latency = 0.0
+        self._total_latency = 0.0
+        self._total_wait = 0.0
+
+    # -------- Alimentation de la file --------
+    def put(self, task):
+        """Ajoute une tâche en fin de file"""
+        with self._condition:
+            self._pending.append((task, time.monotonic()))
+            self._condition.notify()
+
+    def put_front(self, task):
+        """Ajoute une tâche en tête de file (reprise d'une tâche en pause)"""
+        with self._condition:
+            self._pending.appendleft((task, time.monotonic()))
+            self._condition.notify()
+
+    def remove(self, task):
+        """Retire une tâche en attente ; retourne False si elle n'est plus en file"""
+        with self._condition:
+            for index, (pending_task, _) in enumerate(self._pending):
+                if pending_task is task:
+                    del self._pending[index]
+                    return True
+            return False
+
+    def put_many(self, tasks):
+        """Ajoute un lot de tâches en fin de file (un seul verrouillage)"""
+        now = time.monotonic()
+        with self._condition:
+            self._pending.extend((task, now) for task in tasks)
+            self._condition.notify_all()
+
+    def pending(self):
+        """Retourne une copie des tâches en attente (ordre FIFO)"""
+        with self._condition:
+            return [task for task, _ in self._pending]
+
+    def clear(self):
+        """Vide la file et retourne les tâches retirées"""
+        with self._condition:
+            removed = [task for task, _ in self._pending]
+            self._pending.clear()
+            return removed
+
+    def empty(self):
+        """Indique si aucune tâche n'est en attente"""
+        with self._condition:
+            return not self._pending
+
+    def qsize(self):
+        """Nombre de tâches en attente"""
+        with self._condition:
+            return len(self._pending)
+
+    # -------- Distribution --------
+    def acquire_next(self, timeout=None, should_exit=None):
+        """Attend une tâche et un emplacement libre, puis retourne la tâche
+
+        Retourne None si l'ordonnanceur est arrêté, si le délai expire ou si
+        `should_exit()` devient vrai (réévalué à chaque réveil).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if self._stopped or (should_exit is not None and should_exit()):
+                    return None
+                if self._pending and not self._paused and self._active < self._max_active:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+            task, enqueued_at = self._pending.popleft()
+            now = time.monotonic()
+            self._active += 1
+            self._dispatched += 1
+
+            # Latence de distribution : délai entre le moment où la tâche
+            # pouvait partir (entrée en file ou libération d'un emplacement)
+            # et son lancement effectif
+            ready_at = enqueued_at
+            if self._slot_freed_at is not None and self._slot_freed_at > ready_at:
+                ready_at = self._slot_freed_at
+            self._slot_freed_at = None
+            latency = now - ready_at
+            self._last_latency = latency
+            self._max_latency = max(self._max_latency, latency)
+            self._total_latency += latency
+            self._total_wait += now - enqueued_at
+            return task
+
+    def release(self):
+        """Libère l'emplacement occupé par une tâche terminée"""
+        with self._condition:
+            self._active = max(0, self._active - 1)
+            self._completed += 1
+            if self._pending:
+                self._slot_freed_at = time.monotonic()
+            self._condition.notify()
+
+    # -------- Contrôle --------
+    def set_max_active(self, value):
+        """Change le nombre d'emplacements simultanés (effet immédiat)"""
+        with self._condition:
+            self._max_active = max(1, int(value))
+            self._condition.notify_all()
+
+    @property
+    def max_active(self):
+        return self._max_active
+
+    @property
+    def active_count(self):
+        return self._active
+
+    def pause(self):
+        """Suspend la distribution (les tâches en cours continuent)"""
+        with self._condition:
+            self._paused = True
+
+    def resume(self):
+        """Reprend la distribution"""
+        with self._condition:
+            self._paused = False
+            self._condition.notify_all()
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def stop(self):
+        """Arrête définitivement la distribution et réveille les attentes"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    # -------- Statistiques --------
+    def stats(self):
+        """Retourne les compteurs de la file (profondeur, emplacements, latences)"""
+        with self._condition:
+            dispatched = self._dispatched
+            return {
+                'pending': len(self._pending),
+                'active': self._active,
+                'max_active': self._max_active,
+                'paused': self._paused,
+                'dispatched': dispatched,
+                'completed': self._completed,
+                'last_latency_ms': self._last_latency * 1000,
+                'avg_latency_ms': (self._total_latency / dispatched * 1000) if dispatched else 0.0,
+                'max_latency_ms': self._max_latency * 1000,
+                'avg_wait_s': (self._total_wait / dispatched) if dispatched else 0.0,
+            }
+
+
+class MacTubeDedupIndex:
+    """Index des tâches en file ou en cours, par clé de déduplication
+
+    Une clé (ID vidéo, qualité, format) n'est occupée que par une tâche :
+    `claim()` l'enregistre, ou retourne la tâche qui occupe déjà la clé.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def claim(self, task):
+        """Enregistre la tâche ; retourne la tâche existante si c'est un doublon"""
+        with self._lock:
+            existing = self._tasks.get(task.dedup_key)
+            if existing is not None:
+                return existing
+            self._tasks[task.dedup_key] = task
+            return None
+
+    def release(self, task):
+        """Libère la clé de la tâche (terminée, en erreur ou retirée)"""
+        with self._lock:
+            if self._tasks.get(task.dedup_key) is task:
+                del self._tasks[task.dedup_key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._tasks)
+
+
+class MacTubeWorker:
+    """Worker persistant du pool : exécute les tâches les unes après les autres"""
+
+    # Nombre max de ressources (ex: instances YoutubeDL) gardées par worker
+    MAX_RESOURCES = 4
+
+    def __init__(self, pool, index):
+        self.pool = pool
+        self.index = index
+        self.name = f"{pool.name}-{index}"
+        self.current_task = None
+        self.tasks_done = 0
+        self.busy_time = 0.0
+        self.started_at = time.monotonic()
+        self._busy_since = None
+        self._resources = OrderedDict()
+        self.thread = threading.Thread(target=self._run, name=f"mactube-{self.name}", daemon=True)
+
+    def get_resource(self, key, factory):
+        """Retourne une ressource réutilisable propre à ce worker (créée au besoin)"""
+        if key in self._resources:
+            self._resources.move_to_end(key)
+            return self._resources[key]
+        resource = factory()
+        self._resources[key] = resource
+        while len(self._resources) > self.MAX_RESOURCES:
+            _, oldest = self._resources.popitem(last=False)
+            self._close_resource(oldest)
+        return resource
+
+    def discard_resource(self, key):
+        """Ferme et oublie une ressource (ex: après une erreur)"""
+        resource = self._resources.pop(key, None)
+        if resource is not None:
+            self._close_resource(resource)
+
+    def _close_resource(self, resource):
+        close = getattr(resource, 'close', None)
+        if close:
+            try:
+                close()
+            except Exception:
+                pass
+
+    def utilisation(self):
+        """Fraction du temps de vie passée à exécuter des tâches (0..1)"""
+        busy = self.busy_time
+        if self._busy_since is not None:
+            busy += time.monotonic() - self._busy_since
+        alive = time.monotonic() - self.started_at
+        return busy / alive if alive > 0 else 0.0
+
+    def _should_retire(self):
+        return self.pool._retire(self)
+
+    def _run(self):
+        _local.worker = self
+        scheduler = self.pool.scheduler
+        try:
+            while not self._should_retire():
+                task = scheduler.acquire_next(should_exit=self._should_retire)
+                if task is None:
+                    break
+                self.current_task = task
+                self._busy_since = time.monotonic()
+                try:
+                    self.pool.handler(task)
+                except Exception as e:
+                    print(f"❌ Erreur dans le worker {self.name}: {e}")
+                finally:
+                    self.busy_time += time.monotonic() - self._busy_since
+                    self._busy_since = None
+                    self.current_task = None
+                    self.tasks_done += 1
+                    scheduler.release()
+        finally:
+            for key in list(self._resources):
+                self.discard_resource(key)
+            self.pool._worker_exited(self)
+
+
+class MacTubeWorkerPool:
+    """Pool de workers persistants alimenté par un MacTubeScheduler
+
+    La taille du pool est aussi la limite d'emplacements de l'ordonnanceur ;
+    `resize()` ajoute des workers immédiatement et retire les workers en trop
+    dès qu'ils ont terminé leur tâche en cours.
+    """
+
+    def __init__(self, name, handler, size=2):
+        self.name = name
+        self.handler = handler
+        self.size = max(1, int(size))
+        self.scheduler = MacTubeScheduler(self.size)
+        self._workers = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Démarre les workers"""
+        self.resize(self.size)
+
+    def resize(self, size):
+        """Change le nombre de workers (effet immédiat)"""
+        with self._lock:
+            self.size = max(1, int(size))
+            for index in range(self.size):
+                if index not in self._workers:
+                    worker = MacTubeWorker(self, index)
+                    self._workers[index] = worker
+                    worker.thread.start()
+        # Hors verrou du pool : les workers réveillés le reprennent via _retire()
+        self.scheduler.set_max_active(self.size)
+
+    def submit(self, task):
+        """Ajoute une tâche à la file du pool"""
+        self.scheduler.put(task)
+
+    def submit_many(self, tasks):
+        """Ajoute un lot de tâches à la file du pool"""
+        self.scheduler.put_many(tasks)
+
+    def submit_front(self, task):
+        """Ajoute une tâche en tête de la file du pool"""
+        self.scheduler.put_front(task)
+
+    def remove(self, task):
+        """Retire une tâche en attente de la file du pool"""
+        return self.scheduler.remove(task)
+
+    def stop(self):
+        """Arrête le pool (les tâches en cours se terminent)"""
+        self.scheduler.stop()
+
+    def _retire(self, worker):
+        """Indique si un worker est en trop ; si oui, il quitte le registre aussitôt
+        
+        Un worker retiré peut encore finir son nettoyage : resize() le remplace
+        sans attendre sa sortie effective.
+        """
+        with self._lock:
+            if worker.index < self.size:
+                return False
+            if self._workers.get(worker.index) is worker:
+                del self._workers[worker.index]
+            return True
+
+    def _worker_exited(self, worker):
+        with self._lock:
+            if self._workers.get(worker.index) is worker:
+                del self._workers[worker.index]
+
+    def workers(self):
+        with self._lock:
+            return [self._workers[i] for i in sorted(self._workers)]
+
+    def stats(self):
+        """Statistiques de l'ordonnanceur et utilisation de chaque worker"""
+        stats = self.scheduler.stats()
+        stats['workers'] = [
+            {
+                'name': worker.name,
+                'busy': worker.current_task is not None,
+                'tasks_done': worker.tasks_done,
+                'utilisation': worker.utilisation(),
+            }
+            for worker in self.workers()
+        ]
+        return stats
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MacTube Segments - Transcodage vidéo segmenté en parallèle
+Découpe la vidéo aux images clés, encode les segments sur tous les cœurs
+puis les recolle sans perte avec le démultiplexeur concat de FFmpeg
+"""
+
+import os
+import sys
+import math
+import time
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from mactube_ffmpeg import get_ffmpeg_path, probe_media, run_ffmpeg, MacTubeProgressParser
+
+# Durée minimale (secondes) pour laquelle le mode segmenté vaut la peine
+SEGMENT_MIN_DURATION = 600
+
+# Segments par worker : assez pour équilibrer la charge, peu pour limiter les raccords
+SEGMENTS_PER_WORKER = 2
+
+
+class _SegmentProgress:
+    """Agrège la progression des segments en un seul instantané (thread-safe)"""
+
+    def __init__(self, total_duration, segment_count, on_progress, min_interval=0.25):
+        self.total_duration = total_duration
+        self.on_progress = on_progress
+        self.min_interval = min_interval
+        self.started = time.monotonic()
+        self._done = [0.0] * segment_count
+        self._lock = threading.Lock()
+        self._last_emit = 0.0
+
+    def update(self, index, out_time):
+        with self._lock:
+            self._done[index] = out_time
+            now = time.monotonic()
+            if now - self._last_emit < self.min_interval:
+                return
+            self._last_emit = now
+            update = self.snapshot()
+        if self.on_progress:
+            self.on_progress(update)
+
+    def snapshot(self):
+        encoded = sum(self._done)
+        elapsed = time.monotonic() - self.started
+        speed = encoded / elapsed if elapsed > 0 else None
+        percent = min(encoded / self.total_duration * 100, 100) if self.total_duration else None
+        eta = None
+        if speed and self.total_duration:
+            eta = max(self.total_duration - encoded, 0) / speed
+        return {'percent': percent, 'speed': speed, 'eta': eta}
+
+
+def transcode_segmented(ffmpeg_path, input_path, output_path, duration, video_codec, video_args=(),
+                        audio_codec='copy', workers=None, on_progress=None, token=None, output_args=()):
+    """
+    Transcode la vidéo par segments encodés en parallèle
+    1. découpe du flux vidéo aux images clés (copie, sans décodage)
+    2. encodage des segments par `workers` processus FFmpeg simultanés
+    3. concaténation sans perte (concat) avec l'audio du fichier d'origine
+
+    on_progress reçoit {'percent', 'speed', 'eta'} agrégés sur tous les segments.
+    output_args (ex: étiquette hvc1) s'appliquent au fichier final concaténé.
+    token (MacTubeTaskToken) interrompt tous les processus FFmpeg en cours.
+    Retourne les durées de chaque étape.
+    """
+    workers = max(1, workers or os.cpu_count() or 2)
+    segment_time = max(10, math.ceil(duration / (workers * SEGMENTS_PER_WORKER)))
+    threads_per_segment = max(1, (os.cpu_count() or 2) // workers)
+    stats = {'workers': workers}
+
+    work_dir = Path(tempfile.mkdtemp(prefix="mactube_segments_"))
+    try:
+        # 1. Découpage aux images clés (flux vidéo seul, copié)
+        started = time.monotonic()
+        run_ffmpeg([
+            ffmpeg_path,
+            '-i', input_path,
+            '-map', '0:v:0', '-an', '-sn',
+            '-c', 'copy',
+            '-f', 'segment',
+            '-segment_time', str(segment_time),
+            '-reset_timestamps', '1',
+            '-y',
+            str(work_dir / "source_%05d.mkv")
+        ], token=token)
+        sources = sorted(work_dir.glob("source_*.mkv"))
+        if not sources:
+            raise RuntimeError("Découpage en segments impossible")
+        stats['segments'] = len(sources)
+        stats['split_s'] = time.monotonic() - started
+
+        # 2. Encodage parallèle des segments
+        started = time.monotonic()
+        progress = _SegmentProgress(duration, len(sources), on_progress)
+
+        def encode(index, source):
+            target = work_dir / f"encoded_{index:05d}.mkv"
+            parser = MacTubeProgressParser(
+                None, lambda update: progress.update(index, update['out_time']), min_interval=0.5
+            )
+            run_ffmpeg([
+                ffmpeg_path,
+                '-i', str(source),
+                '-c:v', video_codec,
+                *video_args,
+                '-threads', str(threads_per_segment),
+                '-an',
+                '-y',
+                str(target)
+            ], parser, token)
+            return target
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mactube-segment") as executor:
+            futures = [executor.submit(encode, index, source) for index, source in enumerate(sources)]
+            encoded = [future.result() for future in futures]
+        stats['encode_s'] = time.monotonic() - started
+
+        # 3. Concaténation sans ré-encodage, audio repris du fichier d'origine
+        started = time.monotonic()
+        concat_list = work_dir / "segments.txt"
+        with open(concat_list, 'w', encoding='utf-8') as f:
+            for path in encoded:
+                f.write(f"file '{path.as_posix()}'\n")
+        run_ffmpeg([
+            ffmpeg_path,
+            '-f', 'concat', '-safe', '0',
+            '-i', str(concat_list),
+            '-i', input_path,
+            '-map', '0:v:0', '-map', '1:a?',
+            '-c:v', 'copy',
+            *output_args,
+            '-c:a', audio_codec,
+            '-y',
+            output_path
+        ], token=token)
+        stats['concat_s'] = time.monotonic() - started
+
+        if on_progress:
+            on_progress({'percent': 100.0, 'speed': progress.snapshot()['speed'], 'eta': 0.0})
+        return stats
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # Banc d'essai : mode segmenté contre un seul processus, sur une mire testsrc
+    print("⏱️ Banc d'essai du transcodage segmenté")
+    print("=" * 40)
+
+    clip_duration = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    ffmpeg_path = get_ffmpeg_path(verbose=True)
+    if not ffmpeg_path:
+        print("❌ FFmpeg non trouvé")
+        sys.exit(1)
+
+    bench_dir = Path(tempfile.mkdtemp(prefix="mactube_bench_"))
+    try:
+        clip = str(bench_dir / "testsrc.mp4")
+        print(f"🎬 Génération d'une mire de {clip_duration}s (640x360, 30 ips)...")
+        run_ffmpeg([
+            ffmpeg_path,
+            '-f', 'lavfi', '-i', f"testsrc=duration={clip_duration}:size=640x360:rate=30",
+            '-f', 'lavfi', '-i', f"sine=frequency=440:duration={clip_duration}",
+            '-c:v', 'libx264', '-preset', 'ultrafast', '-g', '60',
+            '-c:a', 'aac',
+            '-y', clip
+        ])
+        duration = probe_media(clip, ffmpeg_path)['duration']
+        video_args = ['-preset', 'medium', '-crf', '21']
+
+        started = time.monotonic()
+        run_ffmpeg([
+            ffmpeg_path, '-i', clip,
+            '-c:v', 'libx264', *video_args,
+            '-c:a', 'copy',
+            '-y', str(bench_dir / "single.mkv")
+        ])
+        single = time.monotonic() - started
+        print(f"🐢 Un seul processus : {single:.1f}s")
+
+        started = time.monotonic()
+        stats = transcode_segmented(
+            ffmpeg_path, clip, str(bench_dir / "segmented.mkv"), duration,
+            'libx264', video_args
+        )
+        segmented = time.monotonic() - started
+        print(f"🚀 Segmenté ({stats['segments']} segments, {stats['workers']} workers) : {segmented:.1f}s "
+              f"(découpe {stats['split_s']:.1f}s, encodage {stats['encode_s']:.1f}s, concat {stats['concat_s']:.1f}s)")
+
+        result = probe_media(str(bench_dir / "segmented.mkv"), ffmpeg_path)
+        print(f"✅ Durée du résultat : {result['duration']:.1f}s / {duration:.1f}s")
+        print(f"📈 Accélération : {single / segmented:.2f}x")
+    finally:
+        shutil.rmtree(bench_dir, ignore_errors=True)
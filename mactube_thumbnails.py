@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MacTube Thumbnails - Chargement asynchrone des miniatures
+Téléchargement, décodage et redimensionnement hors du thread Tk, avec une
+session HTTP partagée, un cache mémoire LRU et un cache disque par ID vidéo
+"""
+
+import io
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import customtkinter as ctk
+
+from mactube_cache import get_cache_dir
+
+# Taille d'affichage des miniatures (pixels logiques)
+THUMBNAIL_SIZE = (320, 180)
+
+# Nombre d'images décodées gardées en mémoire
+MEMORY_ENTRIES = 64
+
+# Nombre de fichiers gardés dans le cache disque (les moins récemment lus sont supprimés)
+DISK_ENTRIES = 500
+
+# Délai maximal (s) de connexion et de lecture d'une miniature
+REQUEST_TIMEOUT = (3, 10)
+
+
+class MacTubeThumbnailService:
+    """Service de miniatures : seules des images prêtes à afficher atteignent l'interface
+
+    `load(slot, video_id, url, on_ready, on_error)` cherche l'image en
+    mémoire, puis sur disque, puis sur le réseau (pool de workers).
+    `deliver(callback)` replanifie les rappels sur le thread Tk (ex: un
+    `root.after(0, ...)`). Une seule demande est valide par emplacement
+    (`slot`) : le résultat d'une demande remplacée entre-temps est ignoré.
+    """
+
+    def __init__(self, deliver, size=THUMBNAIL_SIZE, max_workers=2, cache_dir=None,
+                 memory_entries=MEMORY_ENTRIES, disk_entries=DISK_ENTRIES):
+        self.deliver = deliver
+        self.size = size
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.cache_dir = cache_dir or get_cache_dir() / "thumbnails"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = {'memory': 0, 'disk': 0, 'network': 0}
+
+        # Session keep-alive partagée par les workers (SSL non vérifié, comme le reste de l'app)
+        self._session = requests.Session()
+        self._session.verify = False
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mactube-thumbnails")
+        self._images = OrderedDict()  # clé -> CTkImage
+        self._pending = {}  # clé -> future (une seule récupération par image)
+        self._latest = {}  # emplacement -> numéro de la dernière demande
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(video_id, url):
+        """Clé de cache : ID vidéo, ou empreinte de l'URL à défaut"""
+        return video_id or hashlib.sha1((url or "").encode('utf-8')).hexdigest()
+
+    def load(self, slot, video_id, url, on_ready, on_error=None):
+        """Demande la miniature d'une vidéo pour un emplacement de l'interface (thread Tk)
+
+        Retourne True si l'image était en mémoire (`on_ready` déjà appelé).
+        """
+        key = self.cache_key(video_id, url)
+        with self._lock:
+            self._counter += 1
+            request_id = self._latest[slot] = self._counter
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.hits['memory'] += 1
+        if image is not None:
+            on_ready(image)
+            return True
+        if not url and not video_id:
+            if on_error:
+                on_error(ValueError("Miniature indisponible"))
+            return False
+
+        def done(future):
+            # Thread du worker : on ne fait que replanifier sur le thread Tk
+            if future.cancelled():
+                return
+            error = future.exception()
+            self.deliver(lambda: self._finish(slot, request_id, future, error, on_ready, on_error))
+
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor.submit(self._fetch, key, url)
+                self._pending[key] = future
+                future.add_done_callback(lambda f: self._forget(key, f))
+        future.add_done_callback(done)
+        return False
+
+    def cancel(self, slot):
+        """Invalide la demande en cours d'un emplacement (son résultat sera ignoré)"""
+        with self._lock:
+            self._latest.pop(slot, None)
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def _finish(self, slot, request_id, future, error, on_ready, on_error):
+        # Thread Tk : ignorer le résultat d'une demande remplacée entre-temps
+        with self._lock:
+            if self._latest.get(slot) != request_id:
+                return
+        if error is not None:
+            if on_error:
+                on_error(error)
+            return
+        on_ready(future.result())
+
+    # -------- Workers --------
+    def _fetch(self, key, url):
+        """Charge une miniature (disque puis réseau) et retourne une CTkImage prête"""
+        from PIL import Image
+
+        path = self.cache_dir / f"{key}.jpg"
+        image = None
+        try:
+            with open(path, 'rb') as f:
+                image = Image.open(io.BytesIO(f.read()))
+                image.load()
+            os.utime(path)  # Dernière lecture, pour l'éviction
+            source = 'disk'
+        except (OSError, ValueError):
+            image = None
+
+        if image is None:
+            if not url:
+                raise ValueError("Miniature indisponible")
+            response = self._session.get(url, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            image = Image.open(io.BytesIO(response.content))
+            # Redimensionner en gardant les proportions (une seule fois, avant mise en cache)
+            image.thumbnail(self.size, Image.Resampling.LANCZOS)
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            self._store(path, image)
+            source = 'network'
+
+        # CTkImage ne crée ses PhotoImage Tk qu'à l'affichage : construite ici sans risque
+        ctk_image = ctk.CTkImage(light_image=image, size=self.size)
+        with self._lock:
+            self.hits[source] += 1
+            self._images[key] = ctk_image
+            self._images.move_to_end(key)
+            while len(self._images) > self.memory_entries:
+                self._images.popitem(last=False)
+        return ctk_image
+
+    def _store(self, path, image):
+        tmp_path = path.with_suffix('.jpg.tmp')
+        try:
+            image.save(tmp_path, format='JPEG', quality=90)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Cache des miniatures: écriture impossible ({e})")
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        try:
+            entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.jpg')]
+        except OSError:
+            return
+        if len(entries) <= self.disk_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.disk_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {'memory_entries': len(self._images), 'pending': len(self._pending), **self.hits}
+
+    def shutdown(self):
+        """Arrête les chargements en attente"""
+        with self._lock:
+            self._latest.clear()
+            pending = list(self._pending.values())
+        # Hors verrou : cancel() exécute aussitôt les rappels, dont _forget qui le reprend
+        for future in pending:
+            future.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._session.close()
@@ -9,6 +9,7 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import os
+import time
 import threading
 import subprocess
 from pathlib import Path
@@ -16,7 +17,92 @@ import sys
 
 # Imports personnalisés
 from mactube_theme import MacTubeTheme
-from mactube_ffmpeg import get_ffmpeg_path
+from mactube_ffmpeg import get_ffmpeg_path, probe_media, run_ffmpeg, MacTubeProgressParser
+from mactube_segments import transcode_segmented, SEGMENT_MIN_DURATION
+from mactube_batch import (
+    MacTubeBatchJob, iter_batch_inputs, is_up_to_date, VIDEO_EXTENSIONS, AUDIO_EXTENSIONS,
+    SKIP_UP_TO_DATE, SKIP_SAME_FORMAT
+)
+
+# Codecs qu'un conteneur de sortie accepte tels quels (copie de flux possible)
+CONTAINER_CODECS = {
+    'mp4': {
+        'video': {'h264', 'hevc', 'mpeg4', 'av1'},
+        'audio': {'aac', 'mp3', 'alac', 'ac3', 'eac3'},
+    },
+    'mkv': {
+        'video': {'h264', 'hevc', 'mpeg4', 'mpeg2video', 'vp8', 'vp9', 'av1'},
+        'audio': {'aac', 'mp3', 'opus', 'vorbis', 'flac', 'alac', 'ac3', 'eac3', 'pcm_s16le'},
+    },
+    'webm': {
+        'video': {'vp8', 'vp9', 'av1'},
+        'audio': {'opus', 'vorbis'},
+    },
+    'avi': {
+        'video': {'mpeg4', 'h264', 'mjpeg'},
+        'audio': {'mp3', 'ac3', 'pcm_s16le'},
+    },
+}
+
+# Encodeurs utilisés quand un flux doit être ré-encodé (vidéo, audio)
+CONTAINER_ENCODERS = {
+    'mp4': ('libx264', 'aac'),
+    'mkv': ('libx264', 'aac'),
+    'webm': ('libvpx-vp9', 'libopus'),
+    'avi': ('libx264', 'libmp3lame'),
+}
+
+# Conteneurs Apple : le HEVC doit y porter l'étiquette hvc1 (QuickTime, aperçu Finder)
+HVC1_CONTAINERS = {'mp4', 'mov'}
+HEVC_ENCODERS = {'libx265', 'hevc_videotoolbox'}
+
+
+# Encodeurs audio par format de sortie
+AUDIO_ENCODERS = {
+    '.mp3': 'libmp3lame',
+    '.aac': 'aac',
+    '.flac': 'flac',
+    '.wav': 'pcm_s16le',
+    '.m4a': 'aac',
+    '.ogg': 'libvorbis'
+}
+
+# Codecs audio qu'un format de sortie peut contenir tels quels (copie sans ré-encodage)
+AUDIO_COPY_CODECS = {
+    '.mp3': {'mp3'},
+    '.aac': {'aac'},
+    '.flac': {'flac'},
+    '.wav': {'pcm_s16le', 'pcm_s24le', 'pcm_f32le'},
+    '.m4a': {'aac', 'alac'},
+    '.ogg': {'vorbis', 'opus', 'flac'},
+}
+
+
+def _requested_kbps(quality):
+    """Débit demandé en kb/s ("192 kbps" -> 192), None pour la qualité maximale"""
+    digits = ''.join(c for c in (quality or '') if c.isdigit())
+    return int(digits) if digits else None
+
+
+# Profils d'encodage vidéo : compromis vitesse/qualité (x264 : preset/CRF, VP9 : cpu-used/CRF)
+ENCODER_PROFILES = {
+    "Rapide": {'preset': 'veryfast', 'crf': 23, 'vp9_cpu_used': 5, 'vp9_crf': 36},
+    "Équilibré": {'preset': 'medium', 'crf': 21, 'vp9_cpu_used': 2, 'vp9_crf': 32},
+    "Archive": {'preset': 'slow', 'crf': 18, 'vp9_cpu_used': 1, 'vp9_crf': 28},
+}
+DEFAULT_ENCODER_PROFILE = "Équilibré"
+
+# Types de lot proposés (libellé → type de tâche)
+BATCH_TYPES = {
+    "Conversion vidéo": "video_conversion",
+    "Extraction audio": "audio_extraction",
+    "Conversion audio": "audio_conversion",
+    "Sorties multiples (audio)": "audio_multi",
+}
+
+# Formats audio sans réglage de débit (sans perte, ou AAC en qualité maximale pour .m4a)
+LOSSLESS_AUDIO_FORMATS = {".flac", ".wav", ".m4a"}
+
 
 class MacTubeTranscoder:
     """Interface de transcodeur pour MacTube"""
@@ -44,6 +130,9 @@ class MacTubeTranscoder:
         self.audio_formats = [".mp3", ".aac", ".flac", ".wav", ".m4a", ".ogg"]
         self.audio_qualities = ["128 kbps", "192 kbps", "256 kbps", "320 kbps", "Qualité maximale"]
         
+        # Bilan des conversions vidéo par stratégie (remux, partial, transcode)
+        self.conversion_stats = {}
+        
         self.create_transcoder_interface()
         
         # Appliquer le thème
@@ -91,6 +180,13 @@ class MacTubeTranscoder:
         # Section 3: Conversion Audio
         self.create_audio_conversion_section()
         
+        # Séparateur 3
+        separator3_frame = ctk.CTkFrame(self.content_frame, fg_color=MacTubeTheme.get_color('border'), height=1)
+        separator3_frame.pack(fill="x", pady=(20, 15))
+        
+        # Section 4: Conversion par lot
+        self.create_batch_section()
+        
         # Appliquer le thème initial
         self.update_theme()
     
@@ -155,6 +251,36 @@ class MacTubeTranscoder:
         self.video_output_format.pack(side="right")
         self.video_output_format.set(".mp4")
         
+        # Profil d'encodage (vitesse / qualité)
+        profile_frame = ctk.CTkFrame(video_section_frame, fg_color="transparent")
+        profile_frame.pack(fill="x", pady=(0, 8))
+        
+        MacTubeTheme.create_label_body(profile_frame, "Profil d'encodage :").pack(side="left")
+        
+        self.video_profile = ctk.CTkComboBox(
+            profile_frame,
+            values=list(ENCODER_PROFILES.keys()),
+            state="readonly",
+            height=35,
+            font=ctk.CTkFont(size=12),
+            corner_radius=8,
+            width=150,
+            border_width=1,
+            border_color=MacTubeTheme.get_color('text_secondary')
+        )
+        self.video_profile.pack(side="right")
+        self.video_profile.set(DEFAULT_ENCODER_PROFILE)
+        
+        # Mode segmenté : vidéos longues encodées en parallèle sur tous les cœurs
+        self.video_segmented = tk.BooleanVar(value=False)
+        self.video_segmented_checkbox = ctk.CTkCheckBox(
+            video_section_frame,
+            text=f"Mode segmenté (vidéos de plus de {SEGMENT_MIN_DURATION // 60} min, tous les cœurs)",
+            variable=self.video_segmented,
+            font=ctk.CTkFont(size=12)
+        )
+        self.video_segmented_checkbox.pack(pady=(0, 8), anchor="w")
+        
         # Dossier de destination
         dest_frame = ctk.CTkFrame(video_section_frame, fg_color="transparent")
         dest_frame.pack(fill="x", pady=(0, 8))
@@ -393,6 +519,24 @@ class MacTubeTranscoder:
         self.audio_quality_conv.pack(side="right")
         self.audio_quality_conv.set("192 kbps")
         
+        # Formats supplémentaires : un seul décodage pour plusieurs sorties
+        extra_frame = ctk.CTkFrame(audio_conv_section_frame, fg_color="transparent")
+        extra_frame.pack(fill="x", pady=(0, 8))
+        
+        MacTubeTheme.create_label_body(extra_frame, "Formats supplémentaires :").pack(side="left")
+        
+        self.audio_extra_formats = {}
+        for audio_format in reversed(self.audio_formats):
+            variable = tk.BooleanVar(value=False)
+            ctk.CTkCheckBox(
+                extra_frame,
+                text=audio_format,
+                variable=variable,
+                width=60,
+                font=ctk.CTkFont(size=12)
+            ).pack(side="right", padx=(4, 0))
+            self.audio_extra_formats[audio_format] = variable
+        
         # Dossier de destination
         dest_frame = ctk.CTkFrame(audio_conv_section_frame, fg_color="transparent")
         dest_frame.pack(fill="x", pady=(0, 8))
@@ -430,6 +574,89 @@ class MacTubeTranscoder:
         )
         self.convert_audio_button.pack(pady=(5, 0))
     
+    def create_batch_section(self):
+        """Section 4: Conversion par lot (dossier, motif ou sélection multiple)"""
+        section_title = MacTubeTheme.create_label_section(
+            self.content_frame,
+            "📦 Conversion par lot"
+        )
+        section_title.pack(pady=(0, 8), anchor="w")
+        
+        batch_section_frame = ctk.CTkFrame(self.content_frame, fg_color="transparent")
+        batch_section_frame.pack(fill="x", pady=(0, 8))
+        
+        # Source : dossier, motif glob ou fichiers sélectionnés
+        source_frame = ctk.CTkFrame(batch_section_frame, fg_color="transparent")
+        source_frame.pack(fill="x", pady=(0, 8))
+        
+        MacTubeTheme.create_label_body(source_frame, "Source :").pack(side="left")
+        
+        self.batch_source = tk.StringVar()
+        self.batch_files = None
+        self.batch_job = None
+        # Un chemin saisi à la main remplace la sélection de fichiers
+        self.batch_source.trace_add("write", self._on_batch_source_edited)
+        self.batch_source_entry = ctk.CTkEntry(
+            source_frame,
+            textvariable=self.batch_source,
+            height=35,
+            font=ctk.CTkFont(size=12),
+            corner_radius=8,
+            border_width=1,
+            border_color=MacTubeTheme.get_color('text_secondary'),
+            placeholder_text="Dossier ou motif (ex: ~/Musique/**/*.flac)"
+        )
+        self.batch_source_entry.pack(side="left", fill="x", expand=True, padx=(10, 10))
+        
+        self.batch_files_button = MacTubeTheme.create_button_primary(
+            source_frame,
+            "Fichiers...",
+            command=self.select_batch_files,
+            width=100
+        )
+        self.batch_files_button.pack(side="right")
+        
+        self.batch_folder_button = MacTubeTheme.create_button_primary(
+            source_frame,
+            "Dossier...",
+            command=self.select_batch_folder,
+            width=100
+        )
+        self.batch_folder_button.pack(side="right", padx=(0, 10))
+        
+        # Type de conversion (format, qualité et destination repris de la section correspondante)
+        type_frame = ctk.CTkFrame(batch_section_frame, fg_color="transparent")
+        type_frame.pack(fill="x", pady=(0, 8))
+        
+        MacTubeTheme.create_label_body(type_frame, "Type (réglages de la section correspondante) :").pack(side="left")
+        
+        self.batch_type = ctk.CTkComboBox(
+            type_frame,
+            values=list(BATCH_TYPES.keys()),
+            state="readonly",
+            height=35,
+            font=ctk.CTkFont(size=12),
+            corner_radius=8,
+            width=180,
+            border_width=1,
+            border_color=MacTubeTheme.get_color('text_secondary')
+        )
+        self.batch_type.pack(side="right")
+        self.batch_type.set("Conversion audio")
+        
+        # Bilan du lot
+        self.batch_status_label = MacTubeTheme.create_label_body(batch_section_frame, "")
+        self.batch_status_label.pack(pady=(0, 8), anchor="w")
+        
+        # Bouton de lancement
+        self.convert_batch_button = MacTubeTheme.create_button_primary(
+            batch_section_frame,
+            "📦 Convertir le lot",
+            command=self.convert_batch,
+            width=200
+        )
+        self.convert_batch_button.pack(pady=(5, 0))
+    
     def execute_transcode_task(self, task):
         """Exécute une tâche de transcodage avec suivi de progression"""
         try:
@@ -442,6 +669,8 @@ class MacTubeTranscoder:
                 self._execute_audio_extraction_with_progress(task)
             elif task.task_type == "audio_conversion":
                 self._execute_audio_conversion_with_progress(task)
+            elif task.task_type == "audio_multi":
+                self._execute_multi_output_with_progress(task)
             else:
                 raise Exception(f"Type de tâche inconnu: {task.task_type}")
                 
@@ -503,6 +732,35 @@ class MacTubeTranscoder:
             self.audio_input_file_label.insert(0, f"📁 {filename}")
             self.audio_input_file_label.configure(state="readonly")
     
+    def select_batch_folder(self):
+        """Sélectionne un dossier à convertir (parcouru récursivement)"""
+        folder = filedialog.askdirectory(title="Choisir le dossier à convertir")
+        if folder:
+            self.batch_files = None
+            self.batch_source.set(folder)
+    
+    def select_batch_files(self):
+        """Sélectionne plusieurs fichiers à convertir"""
+        file_paths = filedialog.askopenfilenames(
+            title="Sélectionner les fichiers à convertir",
+            filetypes=[
+                ("Médias", "*.mp4 *.avi *.mkv *.mov *.webm *.flv *.m4v *.3gp *.mp3 *.aac *.flac *.wav *.m4a *.ogg"),
+                ("Tous les fichiers", "*.*")
+            ]
+        )
+        if file_paths:
+            self.batch_source.set(self._batch_files_text(file_paths))
+            self.batch_files = list(file_paths)
+    
+    @staticmethod
+    def _batch_files_text(file_paths):
+        return f"{len(file_paths)} fichiers sélectionnés"
+    
+    def _on_batch_source_edited(self, *args):
+        """Oublie la sélection de fichiers dès que la source est modifiée"""
+        if self.batch_files and self.batch_source.get() != self._batch_files_text(self.batch_files):
+            self.batch_files = None
+    
     def choose_video_destination(self):
         """Ouvre le dialogue de sélection de dossier pour la conversion vidéo"""
         folder = filedialog.askdirectory(title="Choisir le dossier de destination pour la vidéo")
@@ -556,6 +814,128 @@ class MacTubeTranscoder:
         except Exception as e:
             print(f"⚠️  Erreur lors de la détection du format: {e}")
     
+    def _output_path(self, task_type, input_path, output_format, dest_path):
+        """Chemin de sortie d'une conversion (suffixe selon le type, évite les conflits de nom)"""
+        input_name = Path(input_path).stem
+        if task_type == "video_conversion":
+            return os.path.join(dest_path, f"{input_name}_converted.{output_format.lstrip('.')}")
+        if task_type == "audio_extraction":
+            return os.path.join(dest_path, f"{input_name}_audio{output_format}")
+        return os.path.join(dest_path, f"{input_name}_converted{output_format}")
+    
+    def convert_batch(self):
+        """Lance la conversion par lot avec les réglages de la section choisie"""
+        if not (self.app and hasattr(self.app, 'add_transcode_to_queue')):
+            messagebox.showerror("Erreur", "Impossible d'accéder à la file d'attente")
+            return
+        
+        source = self.batch_files or self.batch_source.get().strip()
+        if not source:
+            messagebox.showerror("Erreur", "Veuillez choisir un dossier, un motif ou des fichiers")
+            return
+        
+        task_type = BATCH_TYPES[self.batch_type.get()]
+        if task_type == "video_conversion":
+            settings = {
+                'output_format': self.video_output_format.get(),
+                'quality': "N/A",
+                'download_path': self.video_dest_path.get() or self.download_path,
+                'profile': self.video_profile.get(),
+                'segmented': self.video_segmented.get(),
+            }
+            extensions = VIDEO_EXTENSIONS
+        elif task_type == "audio_extraction":
+            settings = {
+                'output_format': self.audio_output_format.get(),
+                'quality': self.audio_quality.get(),
+                'download_path': self.audio_dest_path.get() or self.download_path,
+            }
+            extensions = VIDEO_EXTENSIONS
+        elif task_type == "audio_multi":
+            targets = self._audio_targets(self.audio_output_format_conv.get(), self.audio_quality_conv.get())
+            settings = {
+                'output_format': "+".join(t['output_format'] for t in targets),
+                'quality': self.audio_quality_conv.get(),
+                'download_path': self.audio_conv_dest_path.get() or self.download_path,
+                'targets': targets,
+            }
+            extensions = AUDIO_EXTENSIONS | VIDEO_EXTENSIONS
+        else:
+            settings = {
+                'output_format': self.audio_output_format_conv.get(),
+                'quality': self.audio_quality_conv.get(),
+                'download_path': self.audio_conv_dest_path.get() or self.download_path,
+            }
+            extensions = AUDIO_EXTENSIONS
+        
+        def make_job(input_path):
+            if task_type == "audio_multi":
+                # À jour seulement si toutes les sorties le sont
+                outputs = [
+                    self._output_path("audio_conversion", input_path, target['output_format'], settings['download_path'])
+                    for target in settings['targets']
+                ]
+                if all(is_up_to_date(input_path, path) for path in outputs):
+                    return SKIP_UP_TO_DATE
+                return dict(settings, input_path=input_path, output_path=outputs[0], task_type=task_type)
+            # Vidéo déjà au format cible : rien à convertir (comme en conversion simple)
+            if task_type == "video_conversion" and Path(input_path).suffix.lower() == settings['output_format'].lower():
+                return SKIP_SAME_FORMAT
+            output_path = self._output_path(task_type, input_path, settings['output_format'], settings['download_path'])
+            if is_up_to_date(input_path, output_path):
+                return SKIP_UP_TO_DATE
+            return dict(settings, input_path=input_path, output_path=output_path, task_type=task_type)
+        
+        def submit(params, on_finished):
+            return self.app.add_transcode_to_queue(silent=True, on_finished=on_finished, **params)
+        
+        # Fenêtre bornée : de quoi occuper la voie CPU sans remplir la file de centaines de tâches
+        window = 2 * getattr(self.app, 'max_concurrent_transcodes', 2)
+        job = self.batch_job = MacTubeBatchJob(
+            iter_batch_inputs(source, extensions),
+            make_job,
+            submit,
+            window=window,
+            on_update=lambda summary: self.parent.after(0, self._update_batch_status, summary),
+            on_complete=lambda summary: self.parent.after(0, self._batch_complete, summary)
+        )
+        self.convert_batch_button.configure(state="disabled", text="📦 Lot en cours...")
+        self.batch_status_label.configure(text="⏳ Préparation du lot...")
+        job.start()
+    
+    def cancel_batch(self):
+        """Arrête d'alimenter le lot en cours (file d'attente vidée)"""
+        if self.batch_job is not None:
+            self.batch_job.cancel()
+    
+    @staticmethod
+    def _batch_skipped_text(summary):
+        text = f"{summary['up_to_date']} déjà à jour"
+        if summary['same_format']:
+            text += f", {summary['same_format']} déjà au format cible"
+        return text
+    
+    def _update_batch_status(self, summary):
+        """Affiche l'avancement du lot"""
+        self.batch_status_label.configure(
+            text=f"⏳ {summary['done']} convertis, {summary['failed']} en erreur, "
+                 f"{self._batch_skipped_text(summary)}, {summary['in_flight']} en cours"
+        )
+    
+    def _batch_complete(self, summary):
+        """Affiche le bilan du lot"""
+        self.batch_job = None
+        self.convert_batch_button.configure(state="normal", text="📦 Convertir le lot")
+        title = "⏹️ Lot interrompu" if summary['cancelled'] else "✅ Lot terminé"
+        text = (
+            f"{title} : {summary['done']} convertis, {summary['failed']} en erreur, "
+            f"{self._batch_skipped_text(summary)}\n"
+            f"⏱️ {summary['elapsed_s']:.0f}s - {summary['files_per_min']:.1f} fichiers/min, "
+            f"{summary['mb_per_s']:.1f} Mo/s"
+        )
+        self.batch_status_label.configure(text=text)
+        print(text)
+    
     def convert_video(self):
         """Convertit une vidéo vers un autre format"""
         if not self.video_file_path.get():
@@ -578,9 +958,7 @@ class MacTubeTranscoder:
             return
         
         # Générer le nom de fichier de sortie (éviter les conflits de nom)
-        input_name = Path(input_path).stem
-        output_ext = output_format.lstrip('.')  # Enlever le point du format de sortie
-        output_path = os.path.join(dest_path, f"{input_name}_converted.{output_ext}")
+        output_path = self._output_path("video_conversion", input_path, output_format, dest_path)
         
         # Ajouter à la file d'attente au lieu d'exécuter directement
         if self.app and hasattr(self.app, 'add_transcode_to_queue'):
@@ -590,7 +968,9 @@ class MacTubeTranscoder:
                 quality="N/A",  # Pas de qualité pour la conversion vidéo
                 output_path=output_path,
                 task_type="video_conversion",
-                download_path=dest_path
+                download_path=dest_path,
+                profile=self.video_profile.get(),
+                segmented=self.video_segmented.get()
             )
         else:
             messagebox.showerror("Erreur", "Impossible d'accéder à la file d'attente")
@@ -607,8 +987,7 @@ class MacTubeTranscoder:
         dest_path = self.audio_dest_path.get() or self.download_path
         
         # Générer le nom de fichier de sortie (éviter les conflits de nom)
-        input_name = Path(input_path).stem
-        output_path = os.path.join(dest_path, f"{input_name}_audio{output_format}")
+        output_path = self._output_path("audio_extraction", input_path, output_format, dest_path)
         
         # Ajouter à la file d'attente au lieu d'exécuter directement
         if self.app and hasattr(self.app, 'add_transcode_to_queue'):
@@ -635,22 +1014,40 @@ class MacTubeTranscoder:
         dest_path = self.audio_conv_dest_path.get() or self.download_path
         
         # Générer le nom de fichier de sortie (éviter les conflits de nom)
-        input_name = Path(input_path).stem
-        output_path = os.path.join(dest_path, f"{input_name}_converted{output_format}")
+        output_path = self._output_path("audio_conversion", input_path, output_format, dest_path)
+        
+        # Formats supplémentaires cochés : une seule tâche, un seul décodage
+        targets = self._audio_targets(output_format, quality)
         
         # Ajouter à la file d'attente au lieu d'exécuter directement
         if self.app and hasattr(self.app, 'add_transcode_to_queue'):
             self.app.add_transcode_to_queue(
                 input_path=input_path,
-                output_format=output_format,
+                output_format=output_format if len(targets) == 1 else "+".join(t['output_format'] for t in targets),
                 quality=quality,
                 output_path=output_path,
-                task_type="audio_conversion",
-                download_path=dest_path
+                task_type="audio_conversion" if len(targets) == 1 else "audio_multi",
+                download_path=dest_path,
+                targets=targets if len(targets) > 1 else None
             )
         else:
             messagebox.showerror("Erreur", "Impossible d'accéder à la file d'attente")
     
+    def _audio_targets(self, output_format, quality):
+        """Sorties de la conversion audio : format principal puis formats supplémentaires cochés"""
+        formats = [output_format] + [
+            audio_format for audio_format, variable in self.audio_extra_formats.items()
+            if variable.get() and audio_format != output_format
+        ]
+        formats.sort(key=self.audio_formats.index)
+        return [
+            {
+                'output_format': audio_format,
+                'quality': "Qualité maximale" if audio_format in LOSSLESS_AUDIO_FORMATS else quality,
+            }
+            for audio_format in formats
+        ]
+    
     def _convert_video_thread(self, input_path, output_path, output_format):
         """Thread de conversion vidéo"""
         try:
@@ -682,80 +1079,239 @@ class MacTubeTranscoder:
     
     def _execute_video_conversion_with_progress(self, task):
         """Exécute la conversion vidéo avec suivi de progression"""
-        import subprocess
-        import re
+        # Durée totale lue dans l'en-tête du conteneur (sans décodage)
+        total_duration = self._probe_duration(task)
         
-        # Obtenir la durée totale de la vidéo d'abord
-        probe_cmd = [
-            self.ffmpeg_path,
-            '-i', task.input_path,
-            '-f', 'null', '-'
-        ]
+        # Copier les flux déjà compatibles avec le conteneur cible
+        video_codec, audio_codec = self._plan_video_streams(task)
+        print(f"🧭 Stratégie {task.strategy}: vidéo={video_codec}, audio={audio_codec}, profil={task.profile}")
         
-        probe_result = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=30)
-        total_duration = self._parse_duration_from_ffmpeg(probe_result.stderr)
+        # Vidéo longue ré-encodée : segments en parallèle si demandé
+        if task.segmented and video_codec != 'copy' and (total_duration or 0) >= SEGMENT_MIN_DURATION:
+            self._execute_segmented_conversion(task, total_duration, video_codec, audio_codec)
+            return
         
         # Commande FFmpeg pour la conversion
         cmd = [
             self.ffmpeg_path,
             '-i', task.input_path,
-            '-c:v', 'libx264',  # Codec H.264 cross-platform
-            '-c:a', 'aac',      # Codec audio AAC
+            '-c:v', video_codec,
+            *self._encoder_args(video_codec, task.profile),
+            *self._video_tag_args(task, video_codec),
+            '-c:a', audio_codec,
+            '-threads', str(self._thread_cap()),
             '-y',               # Écraser le fichier existant
             task.output_path
         ]
         
         # Lancer FFmpeg avec suivi de progression
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1, universal_newlines=True)
-        
-        while True:
-            output = process.stderr.readline()
-            if output == '' and process.poll() is not None:
-                break
-            if output:
-                self._parse_ffmpeg_progress(output, task, total_duration)
-        
-        return_code = process.poll()
-        if return_code != 0:
-            _, stderr = process.communicate()
-            raise Exception(f"FFmpeg error: {stderr}")
+        self._run_ffmpeg_with_progress(cmd, task, total_duration)
     
-    def _parse_duration_from_ffmpeg(self, ffmpeg_output):
-        """Parse la durée totale depuis la sortie FFmpeg"""
-        import re
-        # Chercher la ligne "Duration: HH:MM:SS.ss"
-        duration_match = re.search(r'Duration: (\d{2}):(\d{2}):(\d{2})\.(\d{2})', ffmpeg_output)
-        if duration_match:
-            hours, minutes, seconds, centiseconds = map(int, duration_match.groups())
-            total_seconds = hours * 3600 + minutes * 60 + seconds + centiseconds / 100.0
-            return total_seconds
-        return None
+    def _execute_segmented_conversion(self, task, total_duration, video_codec, audio_codec):
+        """Conversion segmentée : les cœurs attribués à ce transcodage encodent un segment chacun"""
+        task.strategy = "segmented"
+        started = time.monotonic()
+        stats = transcode_segmented(
+            self.ffmpeg_path,
+            task.input_path,
+            task.output_path,
+            total_duration,
+            video_codec,
+            self._encoder_args(video_codec, task.profile),
+            audio_codec=audio_codec,
+            output_args=self._video_tag_args(task, video_codec),
+            workers=self._segment_workers(),
+            on_progress=lambda update: self._apply_progress(task, update),
+            token=getattr(task, 'token', None)
+        )
+        task.elapsed = time.monotonic() - started
+        print(f"🧩 {stats['segments']} segments sur {stats['workers']} workers "
+              f"(découpe {stats['split_s']:.1f}s, encodage {stats['encode_s']:.1f}s, concat {stats['concat_s']:.1f}s)")
+        self._record_conversion(task, total_duration)
     
-    def _parse_ffmpeg_progress(self, output_line, task, total_duration):
-        """Parse la progression depuis une ligne de sortie FFmpeg"""
-        import re
-        # Chercher la ligne avec "time=HH:MM:SS.ss"
-        time_match = re.search(r'time=(\d{2}):(\d{2}):(\d{2})\.(\d{2})', output_line)
-        if time_match and total_duration:
-            hours, minutes, seconds, centiseconds = map(int, time_match.groups())
-            current_time = hours * 3600 + minutes * 60 + seconds + centiseconds / 100.0
-            
-            # Calculer la progression en pourcentage
-            progress = min((current_time / total_duration) * 100, 100)
-            task.progress = progress
-            
-            # Extraire la vitesse si disponible
-            speed_match = re.search(r'speed=\s*([0-9.]+)x', output_line)
-            if speed_match:
-                speed = float(speed_match.group(1))
-                task.speed = f"{speed:.1f}x"
-            
-            # Calculer l'ETA approximative
-            if progress > 0 and speed_match:
-                remaining_time = (total_duration - current_time) / speed
-                task.eta = f"{remaining_time:.0f}s"
-            
-            print(f"Progression: {progress:.1f}%, Vitesse: {task.speed}, ETA: {task.eta}")
+    def _plan_video_streams(self, task):
+        """Choisit, flux par flux, entre copie et ré-encodage selon le conteneur cible
+        
+        Renseigne task.strategy : "remux" (tout est copié), "partial" (un seul
+        flux ré-encodé) ou "transcode". Retourne (codec vidéo, codec audio).
+        """
+        container = Path(task.output_path).suffix.lower().lstrip('.')
+        accepted = CONTAINER_CODECS.get(container, {'video': set(), 'audio': set()})
+        video_encoder, audio_encoder = CONTAINER_ENCODERS.get(container, ('libx264', 'aac'))
+        
+        # Sans analyse du fichier, tout ré-encoder (comportement historique)
+        probe = task.probe or {}
+        video_codec = 'copy' if probe.get('video_codec') in accepted['video'] else video_encoder
+        if probe and probe.get('audio_codec') is None:
+            audio_codec = 'copy'  # Pas de piste audio : rien à encoder
+        elif probe.get('audio_codec') in accepted['audio']:
+            audio_codec = 'copy'
+        else:
+            audio_codec = audio_encoder
+        
+        copied = [codec == 'copy' for codec in (video_codec, audio_codec)]
+        if all(copied):
+            task.strategy = "remux"
+        elif any(copied):
+            task.strategy = "partial"
+        else:
+            task.strategy = "transcode"
+        task.codec_plan = {'video': video_codec, 'audio': audio_codec}
+        return video_codec, audio_codec
+    
+    def _video_tag_args(self, task, video_codec):
+        """Étiquette hvc1 pour le HEVC copié ou encodé dans un MP4/MOV (ffmpeg écrit hev1 par défaut)"""
+        container = Path(task.output_path).suffix.lower().lstrip('.')
+        if container not in HVC1_CONTAINERS:
+            return []
+        copied_hevc = video_codec == 'copy' and (task.probe or {}).get('video_codec') == 'hevc'
+        if copied_hevc or video_codec in HEVC_ENCODERS:
+            return ['-tag:v', 'hvc1']
+        return []
+    
+    def _plan_audio_codec(self, task):
+        """Retourne "copy" si la piste audio source convient au format et à la qualité cibles, sinon l'encodeur"""
+        codec = self._audio_codec_for(task.output_path, task.probe, task.quality)
+        task.strategy = "remux" if codec == 'copy' else "transcode"
+        task.codec_plan = {'audio': codec}
+        return codec
+    
+    def _audio_codec_for(self, output_path, probe, quality=None):
+        """Copie si le codec source convient au conteneur et que son débit ne dépasse pas
+        celui demandé ("Qualité maximale" ou format sans perte : toujours copiable)"""
+        output_ext = Path(output_path).suffix.lower()
+        encoder = AUDIO_ENCODERS.get(output_ext, 'aac')
+        probe = probe or {}
+        if probe.get('audio_codec') not in AUDIO_COPY_CODECS.get(output_ext, ()):
+            return encoder
+        requested = _requested_kbps(quality)
+        if requested is None:
+            return 'copy'
+        source = probe.get('audio_bit_rate')
+        # Débit source inconnu ou supérieur : ré-encoder au débit choisi
+        if source and source <= requested * 1000 * 1.05:
+            return 'copy'
+        return encoder
+    
+    @staticmethod
+    def _audio_bitrate_args(codec, quality):
+        """Débit demandé pour un encodeur audio avec perte (aucun en copie ou sans perte)"""
+        requested = _requested_kbps(quality)
+        if codec in ('copy', 'flac', 'pcm_s16le') or requested is None:
+            return []
+        return ['-b:a', f'{requested}k']
+    
+    def _execute_multi_output_with_progress(self, task):
+        """Écrit plusieurs formats audio en un seul passage FFmpeg (un seul décodage)
+        
+        Chaque sortie a son propre mappage, codec et débit ; les sorties déjà à
+        jour sont ignorées. task.outputs porte l'état de chaque sortie.
+        """
+        total_duration = self._probe_duration(task)
+        
+        cmd = [self.ffmpeg_path, '-y', '-i', task.input_path]
+        pending = []
+        for output in task.outputs:
+            if is_up_to_date(task.input_path, output['path']):
+                output['status'] = "⏭️"
+                continue
+            codec = self._audio_codec_for(output['path'], task.probe, output['quality'])
+            cmd += ['-map', '0:a:0', '-c:a', codec]
+            cmd += self._audio_bitrate_args(codec, output['quality'])
+            cmd.append(output['path'])
+            output['codec'] = codec
+            output['status'] = "⏳"
+            pending.append(output)
+        
+        if not pending:
+            print(f"⏭️ Toutes les sorties sont à jour: {task.filename}")
+            return
+        
+        copied = [output['codec'] == 'copy' for output in pending]
+        task.strategy = "remux" if all(copied) else ("partial" if any(copied) else "transcode")
+        task.codec_plan = {output['output_format']: output['codec'] for output in pending}
+        print(f"🧭 {len(pending)} sorties en un passage: "
+              + ", ".join(f"{o['output_format']}={o['codec']}" for o in pending))
+        
+        try:
+            self._run_ffmpeg_with_progress(cmd, task, total_duration)
+        except Exception:
+            for output in pending:
+                output['status'] = "❌"
+            raise
+        for output in pending:
+            output['status'] = "✅" if os.path.exists(output['path']) else "❌"
+    
+    def _encoder_args(self, video_codec, profile_name):
+        """Options de l'encodeur vidéo pour le profil choisi (aucune en copie de flux)"""
+        profile = ENCODER_PROFILES.get(profile_name) or ENCODER_PROFILES[DEFAULT_ENCODER_PROFILE]
+        if video_codec == 'libx264':
+            return ['-preset', profile['preset'], '-crf', str(profile['crf'])]
+        if video_codec == 'libvpx-vp9':
+            return [
+                '-b:v', '0', '-crf', str(profile['vp9_crf']),
+                '-deadline', 'good', '-cpu-used', str(profile['vp9_cpu_used']),
+                '-row-mt', '1'
+            ]
+        return []
+    
+    def _thread_cap(self):
+        """Threads par transcodage : les cœurs partagés entre les transcodages simultanés"""
+        cpu_count = os.cpu_count() or 2
+        concurrent = getattr(self.app, 'max_concurrent_transcodes', 1) if self.app else 1
+        return max(1, cpu_count // max(1, concurrent))
+    
+    def _segment_workers(self):
+        """Workers du mode segmenté : les cœurs partagés entre les transcodages en cours"""
+        cpu_count = os.cpu_count() or 2
+        active = 1
+        if self.app and hasattr(self.app, 'cpu_pool'):
+            active = self.app.cpu_pool.scheduler.active_count
+        return max(1, cpu_count // max(1, active))
+    
+    def _record_conversion(self, task, media_duration):
+        """Ajoute la conversion au bilan par stratégie et l'affiche"""
+        stats = self.conversion_stats.setdefault(
+            task.strategy, {'count': 0, 'seconds': 0.0, 'media_seconds': 0.0}
+        )
+        stats['count'] += 1
+        stats['seconds'] += task.elapsed
+        stats['media_seconds'] += media_duration or 0.0
+        
+        if media_duration and task.elapsed > 0:
+            print(f"⚡ {task.strategy}: {task.elapsed:.1f}s pour {media_duration:.0f}s de média "
+                  f"({media_duration / task.elapsed:.0f}x temps réel)")
+    
+    def _probe_duration(self, task):
+        """Analyse le fichier d'entrée (mis en cache) et retourne sa durée en secondes"""
+        task.probe = probe_media(task.input_path, self.ffmpeg_path)
+        if task.probe is None:
+            print(f"⚠️ Durée inconnue pour {task.input_path}, progression indisponible")
+            return None
+        return task.probe['duration']
+    
+    def _run_ffmpeg_with_progress(self, cmd, task, total_duration):
+        """Lance FFmpeg et reporte sa progression (flux "-progress") sur la tâche"""
+        started = time.monotonic()
+        parser = MacTubeProgressParser(total_duration, lambda update: self._apply_progress(task, update))
+        run_ffmpeg(cmd, parser, getattr(task, 'token', None))
+        
+        task.elapsed = time.monotonic() - started
+        if task.strategy:
+            self._record_conversion(task, total_duration)
+        
+        snapshot = parser.snapshot()
+        if snapshot['speed']:
+            print(f"✅ FFmpeg terminé: {task.filename} ({snapshot['speed']:.1f}x)")
+    
+    def _apply_progress(self, task, update):
+        """Reporte un instantané de progression FFmpeg sur la tâche"""
+        if update['percent'] is not None:
+            task.progress = update['percent']
+        if update['speed']:
+            task.speed = f"{update['speed']:.1f}x"
+        if update['eta'] is not None:
+            task.eta = f"{update['eta']:.0f}s"
     
     def _extract_audio_thread(self, input_path, output_path, output_format, quality):
         """Thread d'extraction audio depuis vidéo"""
@@ -804,54 +1360,25 @@ class MacTubeTranscoder:
     
     def _execute_audio_extraction_with_progress(self, task):
         """Exécute l'extraction audio avec suivi de progression"""
-        import subprocess
-        
-        # Déterminer le codec selon le format
-        codec_map = {
-            '.mp3': 'libmp3lame',
-            '.aac': 'aac',
-            '.flac': 'flac',
-            '.wav': 'pcm_s16le',
-            '.m4a': 'aac',
-            '.ogg': 'libvorbis'
-        }
+        # Durée totale et codec source lus dans l'en-tête du conteneur (sans décodage)
+        total_duration = self._probe_duration(task)
         
-        output_ext = Path(task.output_path).suffix.lower()
-        codec = codec_map.get(output_ext, 'aac')
-        
-        # Obtenir la durée totale de la vidéo d'abord
-        probe_cmd = [
-            self.ffmpeg_path,
-            '-i', task.input_path,
-            '-f', 'null', '-'
-        ]
-        
-        probe_result = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=30)
-        total_duration = self._parse_duration_from_ffmpeg(probe_result.stderr)
+        # Copier la piste audio si le format cible peut la contenir
+        codec = self._plan_audio_codec(task)
+        print(f"🧭 Stratégie {task.strategy}: audio={codec}")
         
         cmd = [
             self.ffmpeg_path,
             '-i', task.input_path,
             '-vn',  # Pas de vidéo
             '-c:a', codec,
+            *self._audio_bitrate_args(codec, task.quality),
             '-y',
             task.output_path
         ]
         
         # Lancer FFmpeg avec suivi de progression
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1, universal_newlines=True)
-        
-        while True:
-            output = process.stderr.readline()
-            if output == '' and process.poll() is not None:
-                break
-            if output:
-                self._parse_ffmpeg_progress(output, task, total_duration)
-        
-        return_code = process.poll()
-        if return_code != 0:
-            _, stderr = process.communicate()
-            raise Exception(f"FFmpeg error: {stderr}")
+        self._run_ffmpeg_with_progress(cmd, task, total_duration)
     
     def _convert_audio_thread(self, input_path, output_path, output_format, quality):
         """Thread de conversion audio"""
@@ -899,53 +1426,24 @@ class MacTubeTranscoder:
     
     def _execute_audio_conversion_with_progress(self, task):
         """Exécute la conversion audio avec suivi de progression"""
-        import subprocess
-        
-        # Déterminer le codec selon le format
-        codec_map = {
-            '.mp3': 'libmp3lame',
-            '.aac': 'aac',
-            '.flac': 'flac',
-            '.wav': 'pcm_s16le',
-            '.m4a': 'aac',
-            '.ogg': 'libvorbis'
-        }
-        
-        output_ext = Path(task.output_path).suffix.lower()
-        codec = codec_map.get(output_ext, 'aac')
-        
-        # Obtenir la durée totale du fichier audio d'abord
-        probe_cmd = [
-            self.ffmpeg_path,
-            '-i', task.input_path,
-            '-f', 'null', '-'
-        ]
+        # Durée totale et codec source lus dans l'en-tête du conteneur (sans décodage)
+        total_duration = self._probe_duration(task)
         
-        probe_result = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=30)
-        total_duration = self._parse_duration_from_ffmpeg(probe_result.stderr)
+        # Copier la piste audio si le format cible peut la contenir
+        codec = self._plan_audio_codec(task)
+        print(f"🧭 Stratégie {task.strategy}: audio={codec}")
         
         cmd = [
             self.ffmpeg_path,
             '-i', task.input_path,
             '-c:a', codec,
+            *self._audio_bitrate_args(codec, task.quality),
             '-y',
             task.output_path
         ]
         
         # Lancer FFmpeg avec suivi de progression
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1, universal_newlines=True)
-        
-        while True:
-            output = process.stderr.readline()
-            if output == '' and process.poll() is not None:
-                break
-            if output:
-                self._parse_ffmpeg_progress(output, task, total_duration)
-        
-        return_code = process.poll()
-        if return_code != 0:
-            _, stderr = process.communicate()
-            raise Exception(f"FFmpeg error: {stderr}")
+        self._run_ffmpeg_with_progress(cmd, task, total_duration)
     
     def on_audio_format_change(self, value):
         """Gère le changement de format audio pour l'extraction depuis vidéo"""
@@ -994,7 +1492,9 @@ class MacTubeTranscoder:
                 self.scrollable_frame.configure(fg_color=bg_card)
             
             # Configurer les couleurs des combobox
-            for combo in [getattr(self, 'video_output_format', None), 
+            for combo in [getattr(self, 'video_output_format', None),
+                         getattr(self, 'video_profile', None),
+                         getattr(self, 'batch_type', None),
                          getattr(self, 'audio_output_format', None),
                          getattr(self, 'audio_quality', None),
                          getattr(self, 'audio_output_format_conv', None),
@@ -1007,6 +1507,7 @@ class MacTubeTranscoder:
             
             # Configurer les couleurs des champs de destination
             for entry in [getattr(self, 'video_dest_entry', None),
+                         getattr(self, 'batch_source_entry', None),
                          getattr(self, 'audio_dest_entry', None),
                          getattr(self, 'audio_conv_dest_entry', None)]:
                 if entry is not None:
@@ -1025,7 +1526,10 @@ class MacTubeTranscoder:
                           getattr(self, 'convert_audio_button', None),
                           getattr(self, 'video_dest_button', None),
                           getattr(self, 'audio_dest_button', None),
-                          getattr(self, 'audio_conv_dest_button', None)]:
+                          getattr(self, 'audio_conv_dest_button', None),
+                          getattr(self, 'batch_folder_button', None),
+                          getattr(self, 'batch_files_button', None),
+                          getattr(self, 'convert_batch_button', None)]:
                 if button is not None:
                     try:
                         button.configure(text_color=MacTubeTheme.get_color('text_light'))